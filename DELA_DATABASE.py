@@ -1,331 +1,44 @@
 # ------------------ Hoofdstuk 1: Imports & Basisvariabelen ------------------
+# Hoofdstukken 1 t/m 4 (configuratie, database, migraties, back-ups, onderhoud,
+# zoekindexen, landcodes en steden) staan in dela_core.py, zonder GUI, zodat
+# ook dela_cli.py ze kan gebruiken.
 import os
 import csv
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 from tkinter import filedialog
 from PIL import Image, ImageTk
 import sqlite3
-import difflib
+import sys
+import threading
 from datetime import datetime
 
-# Basismap
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
-# CSV bestanden (voor fallback of eerste inlees)
-CONTACTS_CSV = os.path.join(BASE_DIR, "contacts.csv")
-PROJECTS_CSV = os.path.join(BASE_DIR, "projects.csv")
-FLEMISH_CITIES_CSV = os.path.join(BASE_DIR, "flemish_cities.csv")
-
-# Huidige gebruiker (wordt ingesteld na login)
-current_user = None
-
-# Standaard landcode
-DEFAULT_CC = "+32"
-
-# Aanhef-keuzes
-SALUTATIONS = ["Dhr.", "Mevr.", "Familie", "Firma"]
-
-# Vlaamse steden inladen
-def load_flemish_cities():
-    cities = {}
-    if os.path.exists(FLEMISH_CITIES_CSV):
-        with open(FLEMISH_CITIES_CSV, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                stad = row.get("stad")
-                postcode = row.get("postcode")
-                if stad and postcode:
-                    cities[stad] = postcode
-    return cities
-
-FLEMISH_CITIES = load_flemish_cities()
-
-# ------------------ Hoofdstuk 2: Bestands- en Database Config ------------------
-
-import os
-
-# Bepaal de basisdirectory waar het script draait
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
-# Pad naar SQLite database (wordt aangemaakt indien niet aanwezig)
-DB_PATH = os.path.join(BASE_DIR, "dela_database.db")
-
-# Headerdefinities bestaan enkel nog ter referentie,
-# want SQLite gebruikt geen CSV headers. Deze blijven handig
-# als standaard veldenlijst bij inserts/updates.
-CONTACT_HEADERS = [
-    "type", "bedrijf", "rechtsvorm", "aanhef", "voornaam", "achternaam",
-    "gsm_cc", "gsm_num", "tel_cc", "tel_num", "email", "functie",
-    "rijksregisternummer", "straat", "huisnummer", "postcode", "stad",
-    "land", "laatst_gewijzigd_door", "laatst_gewijzigd_op"
-]
-
-PROJECT_HEADERS = [
-    "bureau", "projectnummer", "gekoppeld_nummer", "klant",
-    "projectnaam", "adres", "type_project", "status",
-    "laatst_gewijzigd_door", "laatst_gewijzigd_op"
-]
-
-# Vlaamse steden → wordt gebruikt in dropdowns
-FLEMISH_CITIES_CSV = os.path.join(BASE_DIR, "flemish_cities.csv")
-
-def load_flemish_cities():
-    """Laad Vlaamse steden en postcodes uit CSV bestand."""
-    cities = {}
-    if os.path.exists(FLEMISH_CITIES_CSV):
-        with open(FLEMISH_CITIES_CSV, encoding="utf-8") as f:
-            for line in f:
-                parts = line.strip().split(";")
-                if len(parts) == 2:
-                    stad, postcode = parts
-                    cities[stad] = postcode
-    return cities
-
-FLEMISH_CITIES = load_flemish_cities()
-
-# Standaard landcode
-DEFAULT_CC = "+32"
-
-# standaard collega's 
-DEFAULT_USERS = [
-    "Felix",
-    "Kris",
-    "Michael",
-    "Pascal",
-    "Heidi V.",
-    "Heidi D.",
-    "Marie-Roos",
-    "Jelle",
-    "Quinten",
-    "Rik"
-]
-
-# ------------------ Hoofdstuk 2.B: SQLite Database helpers ------------------
-# Dit stuk vervangt de CSV-opslag door SQLite.
-# Het definieert connectie, initialisatie en hulpfuncties om queries uit te voeren.
-
-import sqlite3
-
-def db_connect():
-    """Open een SQLite connectie (autocommit uit, moet afgesloten worden)."""
-    return sqlite3.connect(DB_PATH)
-
-def db_init():
-    """Maak tabellen aan indien ze nog niet bestaan en voeg default users toe."""
-    conn = db_connect()
-    cur = conn.cursor()
-
-    # Tabel voor contacten
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS contacts (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        type TEXT,               -- 'persoon' of 'bedrijf'
-        bedrijf TEXT,
-        rechtsvorm TEXT,
-        aanhef TEXT,
-        voornaam TEXT,
-        achternaam TEXT,
-        gsm_cc TEXT,
-        gsm_num TEXT,
-        tel_cc TEXT,
-        tel_num TEXT,
-        email TEXT,
-        functie TEXT,
-        rijksregisternummer TEXT,
-        straat TEXT,
-        huisnummer TEXT,
-        postcode TEXT,
-        stad TEXT,
-        land TEXT,
-        laatst_gewijzigd_door TEXT,
-        laatst_gewijzigd_op TEXT
-    );
-    """)
-
-    # Tabel voor projecten
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS projects (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        bureau TEXT,
-        projectnummer TEXT,
-        gekoppeld_nummer TEXT,
-        klant TEXT,
-        projectnaam TEXT,
-        adres TEXT,
-        type_project TEXT,
-        status TEXT,
-        laatst_gewijzigd_door TEXT,
-        laatst_gewijzigd_op TEXT
-    );
-    """)
-
-    # Tabel voor users (collega’s)
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        naam TEXT UNIQUE
-    );
-    """)
-
-    # ✅ Voeg de standaard collega’s toe als ze nog niet bestaan
-    for user in DEFAULT_USERS:
-        cur.execute("INSERT OR IGNORE INTO users (naam) VALUES (?)", (user,))
-
-    conn.commit()
-    conn.close()
-
-def db_query(query, params=(), fetchone=False, fetchall=False, commit=False):
-    """
-    Algemene hulpfunctie om queries uit te voeren.
-    - fetchone=True → geeft 1 rij terug
-    - fetchall=True → geeft lijst van rijen terug
-    - commit=True → voert commit uit (INSERT/UPDATE/DELETE)
-    """
-    conn = db_connect()
-    conn.row_factory = sqlite3.Row  # maakt dict-achtige toegang mogelijk
-    cur = conn.cursor()
-    cur.execute(query, params)
-
-    result = None
-    if fetchone:
-        result = cur.fetchone()
-    elif fetchall:
-        result = cur.fetchall()
-
-    if commit:
-        conn.commit()
-
-    conn.close()
-    return result
-
-def db_insert(table, data: dict):
-    """Insert een dict in de gegeven tabel."""
-    keys = ", ".join(data.keys())
-    placeholders = ", ".join(["?"] * len(data))
-    values = list(data.values())
-    query = f"INSERT INTO {table} ({keys}) VALUES ({placeholders})"
-    db_query(query, values, commit=True)
-
-def db_update(table, data: dict, where_clause: str, where_params=()):
-    """Update records in een tabel met dict data + WHERE clause."""
-    sets = ", ".join([f"{k}=?" for k in data.keys()])
-    values = list(data.values()) + list(where_params)
-    query = f"UPDATE {table} SET {sets} WHERE {where_clause}"
-    db_query(query, values, commit=True)
-
-# ------------------ Hoofdstuk 3: Landcodes & Telefoonnummer-formattering ------------------ 
-# ------------------ Landcodes & formattering ------------------ 
-# Dropdown toont "+32 (België)" etc.; we bewaren enkel de code (bv. "+32") 
-COUNTRY_CODES = [ 
-    ("+32", "België"), 
-    ("+31", "Nederland"), 
-    ("+33", "Frankrijk"), 
-    ("+34", "Spanje"), 
-    ("+352", "Luxemburg"), 
-    ("+41", "Zwitserland"), 
-    ("+420", "Tsjechië"), 
-    ("+48", "Polen"), 
-    ("+36", "Hongarije"), 
-    ("+351", "Portugal"), 
-    ("+44", "Engeland/VK"), 
-    ("+353", "Ierland"), 
-    ("+45", "Denemarken"), 
-    ("+39", "Italië"), 
-    ("+30", "Griekenland"), 
-    ("+43", "Oostenrijk"), 
-    ("+46", "Zweden"), 
-    ("+358", "Finland"), 
-    ("+47", "Noorwegen"), 
-] 
-
-DEFAULT_CC = "+32" 
-
-def code_label_list(): 
-    return [f"{cc} ({name})" for cc, name in COUNTRY_CODES] 
-
-def label_to_code(label): 
-    # " +32 (België) " -> "+32" 
-    return label.split(" ", 1)[0].strip() 
-
-def code_to_label(code): 
-    for cc, name in COUNTRY_CODES: 
-        if cc == code: 
-            return f"{cc} ({name})" 
-    return f"{code} (?)" 
-
-def only_digits(s: str) -> str: 
-    return "".join(ch for ch in s if ch.isdigit()) 
-
-def format_phone(cc: str, digits: str, mobile_hint=False) -> str: 
-    """Grove formattering: BE specifiek, anderen generiek in paren.""" 
-    digits = only_digits(digits) 
-    if not cc: 
-        cc = DEFAULT_CC 
-    # België 
-    if cc == "+32": 
-        if not digits: 
-            return "+32 (0)" 
-        if (len(digits) >= 8 and digits[0] == "4") or mobile_hint: 
-            first = digits[:3] 
-            rest = digits[3:] 
-        else: 
-            first = digits[:2] 
-            rest = digits[2:] 
-        pairs = [rest[i:i+2] for i in range(0, len(rest), 2)] 
-        pairs = [p for p in pairs if p] 
-        pieces = " ".join([first] + pairs) if first else " ".join(pairs) 
-        return f"+32 (0) {pieces}".strip() 
-    # NL grove benadering 
-    if cc == "+31": 
-        if not digits: 
-            return "+31 (0)" 
-        first = digits[:2]; rest = digits[2:] 
-        pairs = [rest[i:i+2] for i in range(0, len(rest), 2)] 
-        pairs = [p for p in pairs if p] 
-        return f"+31 (0) {first} " + " ".join(pairs) if pairs else f"+31 (0) {first}" 
-    # Generiek 
-    pairs = [digits[i:i+2] for i in range(0, len(digits), 2)] 
-    pairs = [p for p in pairs if p] 
-    return f"{cc} (0) {' '.join(pairs)}".strip() 
-
-# ------------------ Hoofdstuk 4: Vlaamse steden & Postcodes ------------------ 
-# ------------------ Dit stuk probeert de CSV vlaamse_gemeenten.csv te laden met kolommen stad en postcode. Als dat bestand er niet is, wordt een kleine ingebouwde lijst gebruikt (enkel een aantal bekende steden). Resultaat wordt opgeslagen in FLEMISH_CITIES. ------------------ 
-# ------------------ Vlaamse steden (stad -> postcode) ------------------ 
-def load_flemish_cities(): 
-    """ 
-    Probeert vlaamse_gemeenten.csv te lezen met kolommen: stad, postcode. 
-    Als niet aanwezig, gebruikt een kleine ingebouwde lijst. 
-    """ 
-    data = {} 
-    if os.path.exists(FLEMISH_CITIES_CSV): 
-        enc = detect_encoding(FLEMISH_CITIES_CSV) 
-        with open(FLEMISH_CITIES_CSV, "r", encoding=enc, newline="") as f: 
-            reader = csv.DictReader(f) 
-            for row in reader: 
-                stad = (row.get("stad") or "").strip() 
-                pc = (row.get("postcode") or "").strip() 
-                if stad and pc: 
-                    data[stad] = pc 
-    else: 
-        # Kleine testlijst — vervang door CSV om ALLES te hebben 
-        sample = [ 
-            ("Antwerpen", "2000"), ("Gent", "9000"), ("Brugge", "8000"), 
-            ("Leuven", "3000"), ("Kortrijk", "8500"), ("Hasselt", "3500"), 
-            ("Mechelen", "2800"), ("Oostende", "8400"), ("Aalst", "9300"), 
-            ("Roeselare", "8800"), ("Sint-Niklaas", "9100") 
-        ] 
-        data = {s: p for s, p in sample} 
-    return data 
-
-FLEMISH_CITIES = load_flemish_cities() 
+import dela_core
+from dela_core import (
+    ARCHIVE_MIN_AGE_DAYS, ARCHIVE_STATUSES, ATTACH_CATEGORIES, BACKUP_DIR, BASE_DIR,
+    BULK_FIELDS, DEFAULT_CC, DEFAULT_USERS, DQ_REPORT_COLUMNS, FLEMISH_CITIES, FUZZY_FEW_HITS,
+    LAG_THRESHOLD_MS, LAG_TICK_MS, OMNI_DEBOUNCE_MS, PROJECT_FACETS, SALUTATIONS,
+    SORT_EXPRESSIONS, add_attachment, apply_company_links, archive_candidates, archive_projects,
+    archived_project_ids, attachment_copy, cached_project, cached_record, code_label_list,
+    code_to_label, company_names, contact_by_rrn, contact_index_search, contact_search_where,
+    dashboard_data, db_analyze, db_backup, db_bulk_history, db_bulk_preview, db_bulk_undo,
+    db_bulk_update, db_collect_blobs, db_health_report, db_init, db_insert, db_migrate,
+    db_query, db_restore, db_update_by_id, db_upsert, db_vacuum, dq_apply, dq_scan, dq_summary,
+    email_domain_from_search, format_lag_stack, format_phone, fuzzy_suggest, geo_center,
+    geo_near_condition, import_postcode_centroids, keyset_page, label_to_code, lag_monitor,
+    list_attachments, next_project_number, now_str, omni_search, only_digits, prefetch_record,
+    project_facet_counts, project_facet_where, project_union, propose_company_links,
+    rebuild_statistics, remove_attachment, request_thumbnail, restore_projects, rrn_from_search,
+    rrn_open_issues, rrn_problem, setup_logging, snapshot_label, start_backup_scheduler,
+    start_lag_monitor, start_maintenance_scheduler, start_snapshot_refresher,
+    stop_thumbnail_pool, sync_conflicts, sync_discard_conflict, sync_export, sync_import,
+    sync_make_copy, sync_retry_conflicts, ui_pref_get, ui_pref_set,
+)
 
 # ------------------ Hoofdstuk 5: Basis GUI (startscherm & login) ------------------
 # Startscherm met logo's en login van de gebruiker.
 # Dit bepaalt wie 'current_user' is voor logging bij wijzigingen.
 
-from PIL import Image, ImageTk
-
 current_user = None
 
 def show_home():
@@ -369,7 +82,7 @@ def show_home():
 
     def do_login():
         global current_user
-        current_user = user_var.get()
+        current_user = dela_core.current_user = user_var.get()
         messagebox.showinfo("Ingelogd", f"Welkom {current_user}!")
         home.destroy()
 
@@ -380,8 +93,6 @@ def show_home():
 # ------------------ Hoofdstuk 6: Projectenmodule (algemeen & menu) ------------------
 # - Algemene helpers + entry points voor zoeken/bewerken
 
-from tkinter import messagebox
-
 def _require_user():
     if not globals().get("current_user"):
         messagebox.showwarning("Login vereist", "Gelieve eerst in te loggen via het startscherm.")
@@ -406,25 +117,218 @@ def nieuw_project_window():
         return
     new_project_wizard()
 
-# ------------------ Hoofdstuk 7: Projecten (zoeken & bewerken + Nieuw project wizard) ------------------
+# ------------------ Hoofdstuk 6.B: Sorteerbare, gepagineerde resultaatlijsten ------------------
+# Klikbare kolomkoppen (klik = sorteren, nogmaals = omkeren) en pagina's die
+# bijladen bij het scrollen. De query zelf staat in keyset_page (Hoofdstuk 2.G).
 
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import sqlite3
+def make_sortable(tree, headers, table, pref_key, default, on_change):
+    """
+    Maak de kolomkoppen van `tree` klikbaar voor alle kolommen met een
+    sorteerexpressie in SORT_EXPRESSIONS[table]. De laatste keuze wordt per
+    gebruiker bewaard onder pref_key. Geeft de (muteerbare) sorteerstatus terug.
+    """
+    sortable = SORT_EXPRESSIONS[table]
+    col, desc = default
+    saved = ui_pref_get(pref_key)
+    if saved:
+        c, _, d = saved.partition(":")
+        if c in sortable:
+            col, desc = c, (d == "desc")
+    state = {"col": col, "desc": desc}
+
+    def refresh_headings():
+        for c, text in headers.items():
+            arrow = (" ▼" if state["desc"] else " ▲") if c == state["col"] else ""
+            tree.heading(c, text=text + arrow)
+
+    def on_click(c):
+        if state["col"] == c:
+            state["desc"] = not state["desc"]
+        else:
+            state["col"], state["desc"] = c, False
+        ui_pref_set(pref_key, f"{c}:{'desc' if state['desc'] else 'asc'}")
+        refresh_headings()
+        on_change()
+
+    for c in headers:
+        if c in sortable:
+            tree.heading(c, command=lambda c=c: on_click(c))
+    refresh_headings()
+    return state
+
+def keyset_grid(tree, scrollbar, table, select_cols, sort_state, row_values, readonly=False):
+    """
+    Koppel `tree` aan keyset-paginering: de eerste pagina bij reload(),
+    volgende pagina's zodra de gebruiker onderaan de lijst komt.
+    select_cols: enkel de getoonde kolommen (plus id); row_values(r) krijgt
+    een lichte record (namedtuple, zie record_type) en geeft (iid, values)
+    terug. readonly=True voor raadplegen.
+    Een geselecteerde rij wordt meteen op de achtergrond volledig opgehaald
+    (recordcache, Hoofdstuk 2.W), zodat detail en bewerken direct openen.
+    Geeft reload(where, params, archive=False) terug.
+    """
+    state = {"where": [], "params": (), "after": None, "done": True, "archive": False}
+
+    def load_more():
+        if state["done"]:
+            return
+        rows, state["after"] = keyset_page(table, select_cols, sort_state["col"], sort_state["desc"],
+                                           state["where"], state["params"], state["after"], readonly=readonly,
+                                           archive=state["archive"])
+        state["done"] = state["after"] is None
+        for r in rows:
+            iid, values = row_values(r)
+            tree.insert("", "end", iid=iid, values=values)
+
+    def reload(where=None, params=(), archive=False):
+        state.update(where=list(where or []), params=tuple(params), after=None, done=False, archive=archive)
+        tree.delete(*tree.get_children())
+        load_more()
+
+    def on_scroll(first, last):
+        scrollbar.set(first, last)
+        if float(last) >= 0.999 and not state["done"]:
+            tree.after_idle(load_more)
+
+    def on_select(_evt=None):
+        sel = tree.selection()
+        if len(sel) == 1:
+            prefetch_record(table, int(sel[0]), readonly=readonly)
+
+    tree.configure(yscrollcommand=on_scroll)
+    tree.bind("<<TreeviewSelect>>", on_select, add="+")
+    return reload
+
+def did_you_mean_bar(parent, **pack_opts):
+    """
+    Balk "Bedoelde je: …" met klikbare suggesties (fuzzy zoeken, Hoofdstuk 2.S).
+    Geeft show(items) terug; items = [(tekst, command)], leeg → balk verbergen.
+    """
+    bar = tk.Frame(parent)
+
+    def show(items):
+        for w in bar.winfo_children():
+            w.destroy()
+        if not items:
+            bar.pack_forget()
+            return
+        tk.Label(bar, text="Bedoelde je:").pack(side="left")
+        for tekst, command in items:
+            tk.Button(bar, text=tekst, relief="flat", fg="blue", cursor="hand2", command=command).pack(side="left", padx=2)
+        bar.pack(**pack_opts)
+
+    return show
+
+# ------------------ Hoofdstuk 6.C: Vensterbeheer ------------------
+# Eén venster per soort (zoeken, dashboard, …) of per record: een tweede klik
+# brengt het bestaande venster naar voren. De contactformulieren worden niet
+# afgebroken maar verborgen en teruggezet in een kleine pool (load() zet alle
+# velden terug). Bij het sluiten worden traces op variabelen expliciet
+# opgeruimd, anders houden ze hun closures (en het venster) in leven.
+
+FORM_POOL_MAX = 2
+_windows = {}    # sleutel -> Toplevel
+_form_pool = {}  # soort -> [vrije formulieren]
+
+def focus_window(key):
+    """Breng het venster met deze sleutel naar voren; None als het niet (meer) bestaat."""
+    win = _windows.get(key)
+    if win is None:
+        return None
+    if not win.winfo_exists():
+        _windows.pop(key, None)
+        return None
+    win.deiconify()
+    win.lift()
+    win.focus_force()
+    return win
+
+def register_window(win, key=None, variables=()):
+    """
+    Houd `win` bij onder `key` (optioneel) en ruim bij het sluiten de traces
+    van `variables` op.
+    """
+    if key is not None:
+        _windows[key] = win
+
+    def on_destroy(evt):
+        if evt.widget is not win:
+            return  # <Destroy> komt ook voor elk kindvenster
+        if key is not None and _windows.get(key) is win:
+            del _windows[key]
+        for var in variables:
+            release_traces(var)
+
+    win.bind("<Destroy>", on_destroy, add="+")
+    return win
+
+def replace_window(key):
+    """Sluit een bestaand venster voor dit record (detailpagina's tonen altijd verse gegevens)."""
+    win = _windows.pop(key, None)
+    if win is not None and win.winfo_exists():
+        win.destroy()
 
-# --- Fallback voor now_str ---
-try:
-    now_str
-except NameError:
-    from datetime import datetime
-    def now_str():
-        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+def release_traces(var):
+    for mode, cbname in var.trace_info():
+        try:
+            var.trace_remove(mode, cbname)
+        except tk.TclError:
+            pass
+
+def take_pooled_form(kind, build):
+    """Een vrij formulier uit de pool, of een nieuw gebouwd (build() geeft {"win", "load"})."""
+    free = _form_pool.setdefault(kind, [])
+    while free:
+        form = free.pop()
+        if form["win"].winfo_exists():
+            return form
+    form = build()
+    form["kind"] = kind
+    form["win"].protocol("WM_DELETE_WINDOW", lambda: release_form(form))
+    return form
+
+def show_pooled_form(form, key=None):
+    form["key"] = key
+    if key is not None:
+        _windows[key] = form["win"]
+    form["win"].deiconify()
+    form["win"].lift()
+    form["win"].focus_force()
+
+def release_form(form):
+    """Sluiten: verbergen en terug in de pool (of afbreken als de pool vol is)."""
+    key = form.get("key")
+    if key is not None and _windows.get(key) is form["win"]:
+        del _windows[key]
+    free = _form_pool.setdefault(form["kind"], [])
+    if len(free) < FORM_POOL_MAX and form["win"].winfo_exists():
+        form["win"].withdraw()
+        free.append(form)
+    else:
+        form["win"].destroy()
+
+def close_all_windows():
+    """
+    Bij afmelden: alle vensters afbreken, ook verborgen formulieren uit de pool
+    en formulieren zonder sleutel, zodat niets met gegevens van de vorige
+    gebruiker blijft hangen.
+    """
+    _windows.clear()
+    _form_pool.clear()
+    for w in root.winfo_children():
+        if isinstance(w, tk.Toplevel):
+            w.destroy()
+
+# ------------------ Hoofdstuk 7: Projecten (zoeken & bewerken + Nieuw project wizard) ------------------
 
 # =================== Zoek / Bewerk Projecten ===================
 def open_project_search(mode="view"):
     """Zoekvenster voor projecten (view of edit)"""
-    win = tk.Toplevel(root)
-    win.title("Projecten zoeken" + (" (bewerken)" if mode=="edit" else ""))
+    if focus_window(("project_search", mode)):
+        return
+    win = register_window(tk.Toplevel(root), ("project_search", mode))
+    win.title("Projecten zoeken" + (" (bewerken)" if mode=="edit" else snapshot_label()))
+    readonly = (mode == "view")  # raadplegen neemt nooit schrijflocks (Hoofdstuk 2.K)
     win.geometry("1100x640")
 
     # Filters
@@ -441,14 +345,67 @@ def open_project_search(mode="view"):
         e.grid(row=0,column=col*2+1, sticky="w", padx=(0,8), pady=6)
         vars_[key] = v
 
+    # Nabijheid: straal rond een postcode of gemeente (R*Tree, Hoofdstuk 2.J)
+    tk.Label(filter_frame, text="Nabij (postcode/gemeente)").grid(row=1, column=0, columnspan=2, sticky="w", padx=(8,4))
+    near_var = tk.StringVar()
+    tk.Entry(filter_frame, textvariable=near_var, width=18).grid(row=1, column=2, columnspan=2, sticky="w", padx=(0,8))
+    tk.Label(filter_frame, text="Straal (km)").grid(row=1, column=4, sticky="w", padx=(8,4))
+    km_var = tk.StringVar(value="5")
+    tk.Entry(filter_frame, textvariable=km_var, width=6).grid(row=1, column=5, sticky="w", padx=(0,8))
+    # Standaard enkel actieve projecten; het archief (Hoofdstuk 2.Q) enkel op vraag
+    archive_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(filter_frame, text="Archief meezoeken", variable=archive_var,
+                   command=lambda: do_search()).grid(row=1, column=6, columnspan=2, sticky="w", padx=(8,4))
+
     btns = tk.Frame(filter_frame)
     btns.grid(row=0, column=len(fields)*2, padx=8)
     tk.Button(btns, text="Zoeken", width=10, command=lambda: do_search()).pack(side="left", padx=4)
-    tk.Button(btns, text="Reset", width=10, command=lambda: [v.set("") for v in vars_.values()] + [do_search()]).pack(side="left", padx=4)
+    tk.Button(btns, text="Reset", width=10, command=lambda: [v.set("") for v in vars_.values()] + [near_var.set("")]
+              + [facet_selected.update({k: None for k in facet_selected})] + [do_search()]).pack(side="left", padx=4)
+    if mode == "edit":
+        tk.Button(btns, text="Bulk bewerken…", width=14, command=lambda: bulk_edit_selection()).pack(side="left", padx=4)
+
+    # Weinig of geen treffers → gelijkende klant-/projectnamen voorstellen
+    show_did_you_mean = did_you_mean_bar(win, after=filter_frame, fill="x", padx=10)
+
+    # Facetten (links): klik op een waarde om te filteren, nogmaals om te wissen
+    facet_box = tk.LabelFrame(win, text="Facetten")
+    facet_box.pack(side="left", fill="y", padx=(10,0), pady=(6,2))
+    facet_tree = ttk.Treeview(facet_box, show="tree", selectmode="none", height=20)
+    facet_tree.column("#0", width=200)
+    facet_tree.pack(fill="both", expand=True)
+    facet_selected = {facet: None for facet, _ in PROJECT_FACETS}
+    facet_items = {}  # iid -> (facet, waarde)
+
+    def refresh_facets():
+        try:
+            counts = project_facet_counts(facet_selected, readonly=readonly, archive=archive_var.get())
+        except sqlite3.OperationalError:
+            return
+        facet_tree.delete(*facet_tree.get_children())
+        facet_items.clear()
+        for facet, label in PROJECT_FACETS:
+            gid = facet_tree.insert("", "end", text=label, open=True)
+            for waarde, n in counts.get(facet, []):
+                mark = "✔ " if facet_selected[facet] == waarde else ""
+                iid = facet_tree.insert(gid, "end", text=f"{mark}{waarde or '(leeg)'} ({n})")
+                facet_items[iid] = (facet, waarde)
+
+    def on_facet_click(evt):
+        item = facet_items.get(facet_tree.identify_row(evt.y))
+        if not item:
+            return
+        facet, waarde = item
+        facet_selected[facet] = None if facet_selected[facet] == waarde else waarde
+        do_search()
+
+    facet_tree.bind("<ButtonRelease-1>", on_facet_click)
+    # Terug in dit venster: aantallen bijwerken (goedkoop dankzij de generatie-cache)
+    win.bind("<FocusIn>", lambda e: refresh_facets() if e.widget is win else None)
 
     # Resultaten tabel
     cols = ("bureau","projectnummer","klant","projectnaam","adres","status","laatst_gewijzigd_door","laatst_gewijzigd_op")
-    tree = ttk.Treeview(win, columns=cols, show="headings")
+    tree = ttk.Treeview(win, columns=cols, show="headings", selectmode=("extended" if mode=="edit" else "browse"))
     headers = {"bureau":"Bureau","projectnummer":"Projectnummer","klant":"Klant","projectnaam":"Projectnaam",
                "adres":"Adres","status":"Status","laatst_gewijzigd_door":"Gewijzigd door","laatst_gewijzigd_op":"Gewijzigd op"}
     widths  = {"bureau":110,"projectnummer":130,"klant":160,"projectnaam":220,"adres":240,"status":110,
@@ -459,9 +416,17 @@ def open_project_search(mode="view"):
     tree.pack(fill="both", expand=True, padx=10, pady=(6,2))
 
     yscroll = ttk.Scrollbar(win, orient="vertical", command=tree.yview)
-    tree.configure(yscroll=yscroll.set)
     yscroll.place(in_=tree, relx=1.0, rely=0, relheight=1.0, x=-1)
 
+    # Sorteren via kolomkoppen + keyset-paginering (Hoofdstuk 6.B)
+    sort_state = make_sortable(tree, headers, "projects", f"sort.project_search.{mode}",
+                               ("laatst_gewijzigd_op", True), lambda: do_search())
+    reload = keyset_grid(
+        tree, yscroll, "projects",
+        ("id",) + cols, sort_state,
+        lambda r: (str(r.id), tuple(v or "" for v in r[1:-1])),
+        readonly=readonly)
+
     # Dubbelklik
     def selected_id():
         sel = tree.selection()
@@ -477,6 +442,14 @@ def open_project_search(mode="view"):
 
     tree.bind("<Double-1>", on_double)
 
+    def bulk_edit_selection():
+        ids = [int(i) for i in tree.selection()]
+        archived = archived_project_ids(ids) if ids else set()
+        if archived:
+            messagebox.showinfo("Bulk bewerken", f"{len(archived)} gearchiveerde project(en) worden overgeslagen.\n"
+                                "Open een project om het terug te zetten.", parent=win)
+        open_bulk_edit("projects", [i for i in ids if i not in archived], after_change=do_search)
+
     # Zoeken functie
     def do_search():
         where, params = [], []
@@ -485,36 +458,47 @@ def open_project_search(mode="view"):
             if val:
                 where.append(f"{key} LIKE ?")
                 params.append(f"%{val}%")
-        where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+        facet_conds, facet_params = project_facet_where(facet_selected)
+        where += facet_conds
+        params += facet_params
+        near = near_var.get().strip()
+        if near:
+            center = geo_center(near)
+            try:
+                km = float(km_var.get().replace(",", "."))
+            except ValueError:
+                km = 0
+            if not center or km <= 0:
+                messagebox.showwarning("Nabijheid", f"Onbekende postcode/gemeente of ongeldige straal: '{near}'.", parent=win)
+                return
+            cond, cond_params = geo_near_condition("projects", center[0], center[1], km)
+            where.append(cond)
+            params += cond_params
         try:
-            rows = db_query(f"""
-                SELECT id, bureau, projectnummer, klant, projectnaam, adres, status, laatst_gewijzigd_door, laatst_gewijzigd_op
-                FROM projects
-                {where_sql} ORDER BY COALESCE(laatst_gewijzigd_op,'') DESC, id DESC
-            """, tuple(params), fetchall=True)
+            reload(where, params, archive=archive_var.get())
         except sqlite3.OperationalError as e:
             messagebox.showerror("Databasefout", f"Query mislukt:\n{e}")
             return
-
-        for iid in tree.get_children(): tree.delete(iid)
-        if rows:
-            for r in rows:
-                tree.insert("", "end", iid=str(r["id"]), values=(
-                    r["bureau"] or "", r["projectnummer"] or "", r["klant"] or "",
-                    r["projectnaam"] or "", r["adres"] or "", r["status"] or "",
-                    r.get("laatst_gewijzigd_door","") or "", r.get("laatst_gewijzigd_op","") or ""
-                ))
+        refresh_facets()
+        items = []
+        if len(tree.get_children()) < FUZZY_FEW_HITS:
+            for key in ("klant", "projectnaam"):
+                for tekst, _ in fuzzy_suggest(vars_[key].get().strip(), "projects", limit=3, readonly=readonly):
+                    items.append((tekst, lambda k=key, t=tekst: (vars_[k].set(t), do_search())))
+        show_did_you_mean(items)
 
     do_search()
 
 
 # =================== Detail / Edit ===================
 def show_project_detail(project_id:int):
-    row = db_query("SELECT * FROM projects WHERE id=?", (project_id,), fetchone=True)
+    row, archived = cached_project(project_id, readonly=True)
     if not row:
         messagebox.showerror("Fout","Project niet gevonden."); return
-    win = tk.Toplevel(root)
-    win.title(f"Project {row['projectnummer']} – detail"); win.geometry("640x520")
+    replace_window(("project", project_id))
+    win = register_window(tk.Toplevel(root), ("project", project_id))
+    win.title(f"Project {row['projectnummer']} – detail{' (archief)' if archived else ''}{snapshot_label()}")
+    win.geometry("640x860")
     frame = tk.Frame(win); frame.pack(fill="both", expand=True, padx=10, pady=10)
     frame.grid_columnconfigure(1, weight=1)
 
@@ -526,15 +510,30 @@ def show_project_detail(project_id:int):
                       ("Klant","klant"),("Projectnaam","projectnaam"),("Adres","adres"),
                       ("Status","status"),("Laatst gewijzigd door","laatst_gewijzigd_door"),("Laatst gewijzigd op","laatst_gewijzigd_op")]:
         add(label,row.get(key,""), r); r+=1
+
+    build_related_panel(win, [
+        ("Klant", lambda: related_company(row.get("klant") or "")),
+        ("Andere projecten van deze klant", lambda: [x for x in related_projects_of_client([row.get("klant")]) if x[1] != project_id]),
+        ("Gekoppelde projecten", lambda: related_linked_projects(row)),
+    ]).pack(fill="both", expand=True, padx=10, pady=(0, 4))
+    build_attachments_panel(win, project_id).pack(fill="both", expand=True, padx=10, pady=(0, 4))
     tk.Button(win, text="Sluiten", command=win.destroy).pack(pady=8)
 
 
 def open_project_edit_form(project_id:int):
-    row = db_query("SELECT * FROM projects WHERE id=?", (project_id,), fetchone=True)
+    if focus_window(("project_edit", project_id)):
+        return
+    row, archived = cached_project(project_id)
+    if row and archived:
+        if not messagebox.askyesno("Archief", "Dit project staat in het archief.\n"
+                                   "Terugzetten bij de actieve projecten om het te bewerken?"):
+            return
+        restore_projects([project_id])
+        row = cached_record("projects", project_id)
     if not row:
         messagebox.showerror("Fout","Project niet gevonden."); return
-    win = tk.Toplevel(root)
-    win.title(f"Project {row['projectnummer']} bewerken"); win.geometry("660x520"); win.grid_columnconfigure(1, weight=1)
+    win = register_window(tk.Toplevel(root), ("project_edit", project_id))
+    win.title(f"Project {row['projectnummer']} bewerken"); win.geometry("660x780"); win.grid_columnconfigure(1, weight=1)
 
     def mk_row(label,value,r,readonly=False):
         tk.Label(win,text=label+":", anchor="w").grid(row=r,column=0, sticky="w", padx=10, pady=6)
@@ -550,22 +549,28 @@ def open_project_edit_form(project_id:int):
     v_klant  = mk_row("Klant", row.get("klant",""),3)
     v_naam   = mk_row("Projectnaam", row.get("projectnaam",""),4)
     v_adres  = mk_row("Adres", row.get("adres",""),5)
-    v_status = mk_row("Status", row.get("status",""),6)
+    v_postcode = mk_row("Postcode", row.get("postcode",""),6)
+    v_stad   = mk_row("Stad", row.get("stad",""),7)
+    v_status = mk_row("Status", row.get("status",""),8)
 
     def save():
         try:
-            db_update("projects", {
+            db_update_by_id("projects", project_id, {
                 "gekoppeld_nummer": v_koppeld.get().strip(),
                 "klant": v_klant.get().strip(),
                 "projectnaam": v_naam.get().strip(),
                 "adres": v_adres.get().strip(),
+                "postcode": v_postcode.get().strip(),
+                "stad": v_stad.get().strip(),
                 "status": v_status.get().strip(),
                 "laatst_gewijzigd_door": globals().get("current_user") or "",
                 "laatst_gewijzigd_op": now_str()
-            }, "id=?", (project_id,))
+            })
             messagebox.showinfo("Succes","Wijzigingen opgeslagen"); win.destroy()
         except sqlite3.Error as e:
             messagebox.showerror("Fout", f"Opslaan mislukt:\n{e}")
+    build_attachments_panel(win, project_id, editable=True).grid(row=9, column=0, columnspan=2, sticky="nsew", padx=10, pady=6)
+    win.grid_rowconfigure(9, weight=1)
     tk.Button(win, text="Opslaan", command=save).grid(row=99,column=1, sticky="e", padx=10,pady=12)
 
 
@@ -666,56 +671,41 @@ def new_project_wizard():
 
     # --- Functie voor automatisch projectnummer (onvoorwaardelijk zoals in je werkende versie) ---
     def next_number(bureau):
-        conn = get_connection()
-        cur = conn.cursor()
+        num_var.set(next_project_number(bureau))
         if bureau == "Delafontaine":
-            cur.execute(
-                "SELECT projectnummer FROM projects "
-                "WHERE projectnummer NOT LIKE 'V%' "
-                "ORDER BY CAST(projectnummer AS INTEGER) DESC LIMIT 1"
-            )
-            row = cur.fetchone()
-            last_num = int(row[0]) if row else 0
-            num_var.set(str(last_num + 1))
             kopp_var.set("V")  # gekoppeld Vectornummer (optioneel)
             kopp_label.config(text="Gekoppeld Vector nummer (optioneel)")
         else:
-            cur.execute(
-                "SELECT projectnummer FROM projects "
-                "WHERE projectnummer LIKE 'V%' "
-                "ORDER BY CAST(SUBSTR(projectnummer,2) AS INTEGER) DESC LIMIT 1"
-            )
-            row = cur.fetchone()
-            last_num = int(row[0][1:]) if row else 0
-            num_var.set(f"V{last_num + 1}")
             kopp_var.set("")  # gekoppeld Delafontaine nummer (optioneel)
             kopp_label.config(text="Gekoppeld Delafontaine nummer (optioneel)")
-        conn.close()
 
     bureau_var.trace_add("write", lambda *args: next_number(bureau_var.get()))
+    register_window(win, variables=(bureau_var,))
     next_number(bureau_var.get())  # initialisatie (zet meteen correcte defaults)
 
     # --- Opslaan ---
     def save():
         try:
             adres = " ".join([straat_var.get().strip(), huisnr_var.get().strip()]).strip()
-            db_update(
+            kopp = kopp_var.get().strip()
+            db_insert(
                 "projects",
                 {
                     "bureau": bureau_var.get(),
                     "projectnummer": num_var.get().strip(),
-                    "gekoppeld_nummer": kopp_var.get().strip(),
+                    "gekoppeld_nummer": "" if kopp.upper() == "V" else kopp,  # enkel het voorvoegsel → leeg
                     "klant": klant_var.get().strip(),
                     "projectnaam": naam_var.get().strip(),
                     "adres": adres,
                     "stad": stad_var.get().strip(),
                     "postcode": postcode_var.get().strip(),
                     "groep": groep_var.get().strip(),
-                    "type": type_var.get().strip(),
+                    "type_project": type_var.get().strip(),
+                    "status": "nieuw",
+                    "jaar": datetime.now().strftime("%Y"),
                     "laatst_gewijzigd_door": globals().get("current_user"),
                     "laatst_gewijzigd_op": now_str(),
                 },
-                insert=True,
             )
             messagebox.showinfo("Succes", f"Project '{num_var.get()}' succesvol aangemaakt.")
             win.destroy()
@@ -736,7 +726,9 @@ def search_contacts():
         messagebox.showwarning("Login vereist", "Gelieve eerst in te loggen via het startscherm.")
         return
 
-    search_win = tk.Toplevel(root)
+    if focus_window(("contact_search",)):
+        return
+    search_win = register_window(tk.Toplevel(root), ("contact_search",))
     search_win.title("Contacten zoeken")
     search_win.geometry("600x400")
 
@@ -745,48 +737,81 @@ def search_contacts():
     entry = tk.Entry(search_win, textvariable=keyword_var, width=50)
     entry.pack(pady=5)
 
+    # Type-ahead uit de contactindex in het geheugen (Hoofdstuk 2.L)
+    suggest_box = tk.Listbox(search_win, height=0, width=70)
+    suggestions = []
+
+    def update_suggestions(evt=None):
+        if evt is not None and evt.keysym in ("Return", "Down", "Up", "Escape"):
+            return
+        suggestions[:] = contact_index_search(keyword_var.get(), limit=8)
+        suggest_box.delete(0, "end")
+        for e in suggestions:
+            extra = " · ".join(x for x in (e.bedrijf if e.type == "persoon" else "", e.email, e.stad) if x)
+            suggest_box.insert("end", f"{e.naam}  —  {extra}" if extra else e.naam)
+        if suggestions:
+            suggest_box.config(height=len(suggestions))
+            suggest_box.pack(after=entry, pady=(0, 5))
+        else:
+            suggest_box.pack_forget()
+
+    def open_suggestion(_evt=None):
+        sel = suggest_box.curselection()
+        if not sel:
+            return
+        suggest_box.pack_forget()
+        open_contact(suggestions[sel[0]].id)
+
+    entry.bind("<KeyRelease>", update_suggestions)
+    entry.bind("<Down>", lambda e: suggestions and (suggest_box.focus_set(), suggest_box.selection_set(0)))
+    entry.bind("<Escape>", lambda e: suggest_box.pack_forget())
+    suggest_box.bind("<Return>", open_suggestion)
+    suggest_box.bind("<Double-1>", open_suggestion)
+
     results_frame = tk.Frame(search_win)
     results_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-    tree = ttk.Treeview(results_frame, columns=("type", "naam", "bedrijf", "email"), show="headings")
-    tree.heading("type", text="Type")
-    tree.heading("naam", text="Naam")
-    tree.heading("bedrijf", text="Bedrijf")
-    tree.heading("email", text="E-mail")
-    tree.pack(fill="both", expand=True)
+    headers = {"type": "Type", "naam": "Naam", "bedrijf": "Bedrijf", "email": "E-mail"}
+    tree = ttk.Treeview(results_frame, columns=tuple(headers), show="headings")
+    tree.pack(side="left", fill="both", expand=True)
 
     scrollbar = ttk.Scrollbar(results_frame, orient="vertical", command=tree.yview)
-    tree.configure(yscroll=scrollbar.set)
     scrollbar.pack(side="right", fill="y")
 
-    def do_search(*args):
-        tree.delete(*tree.get_children())
-        kw = f"%{keyword_var.get().strip()}%"
-        rows = db_query("""
-            SELECT * FROM contacts
-            WHERE bedrijf LIKE ? OR voornaam LIKE ? OR achternaam LIKE ? OR email LIKE ?
-            ORDER BY laatst_gewijzigd_op DESC
-        """, (kw, kw, kw, kw), fetchall=True)
+    sort_state = make_sortable(tree, headers, "contacts", "sort.search_contacts",
+                               ("laatst_gewijzigd_op", True), lambda: do_search())
+    reload = keyset_grid(
+        tree, scrollbar, "contacts", ("id", "type", "display_name", "bedrijf", "email"), sort_state,
+        lambda r: (str(r.id), (r.type or "", r.display_name or "", r.bedrijf or "", r.email or "")))
+    show_did_you_mean = did_you_mean_bar(search_win, after=entry, pady=(0, 5))
 
-        for r in rows:
-            naam = f"{r['voornaam']} {r['achternaam']}".strip()
-            tree.insert("", "end", values=(r["type"], naam, r["bedrijf"], r["email"]), tags=(r["id"],))
+    def do_search(*args):
+        # Rijksregisternummer en '@domein' zijn exacte index-lookups (dela_core)
+        term = keyword_var.get().strip()
+        reload(*contact_search_where(term))
+        items = []
+        if len(tree.get_children()) < FUZZY_FEW_HITS and not (rrn_from_search(term) or email_domain_from_search(term)):
+            items = [(tekst, lambda t=tekst: (keyword_var.set(t), do_search()))
+                     for tekst, _ in fuzzy_suggest(term, "contacts")]
+        show_did_you_mean(items)
 
-    entry.bind("<Return>", do_search)
+    entry.bind("<Return>", lambda e: (suggest_box.pack_forget(), do_search()))
 
     def on_open_detail(event):
-        item = tree.focus()
-        if not item:
+        row_id = tree.focus()
+        if not row_id:
             return
-        row_id = tree.item(item, "tags")[0]
-        r = db_query("SELECT * FROM contacts WHERE id=?", (row_id,), fetchone=True)
+        open_contact(row_id)
+
+    def open_contact(row_id):
+        r = cached_record("contacts", row_id)
         if not r:
             return
 
         if r["type"] == "persoon":
-            open_person_form(existing=dict(r))
+            open_person_form(existing=r)
         else:
-            open_company_form(existing=dict(r))
+            open_company_form(existing=r)
 
     tree.bind("<Double-1>", on_open_detail)
 
@@ -802,9 +827,12 @@ def show_contact_page(contact):
         messagebox.showerror("Fout", "Geen contact geselecteerd.")
         return
 
-    detail_win = tk.Toplevel(root)
-    detail_win.title(f"Contact: {contact.get('voornaam','')} {contact.get('achternaam','')}".strip())
-    detail_win.geometry("500x500")
+    key = ("contact", contact.get("id")) if contact.get("id") else None
+    if key:
+        replace_window(key)
+    detail_win = register_window(tk.Toplevel(root), key)
+    detail_win.title(f"Contact: {contact.get('voornaam','')} {contact.get('achternaam','')}".strip() + snapshot_label())
+    detail_win.geometry("500x720")
 
     frame = tk.Frame(detail_win)
     frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -849,10 +877,247 @@ def show_contact_page(contact):
             open_company_form(existing=contact)
         detail_win.destroy()
 
+    # Gerelateerde records (lazy per groep)
+    naam = f"{contact.get('voornaam','')} {contact.get('achternaam','')}".strip()
+    if contact.get("type") == "persoon":
+        groups = [("Bedrijf", lambda: related_company(contact.get("bedrijf", ""))),
+                  ("Projecten van deze klant", lambda: related_projects_of_client([naam]))]
+    else:
+        groups = [("Personen bij dit bedrijf", lambda: related_persons_of_company(contact.get("bedrijf", ""))),
+                  ("Projecten van deze klant", lambda: related_projects_of_client([contact.get("bedrijf", "")]))]
+    build_related_panel(detail_win, groups).pack(fill="both", expand=True, padx=10, pady=(0, 6))
+
     tk.Button(detail_win, text="Bewerken", command=edit_contact).pack(pady=10)
     tk.Button(detail_win, text="Sluiten", command=detail_win.destroy).pack(pady=5)
 
 
+# ------------------ Hoofdstuk 10.B: Gerelateerde records ------------------
+# Uitklapbaar paneel op de detailpagina's van contacten en projecten.
+# Elke groep wordt pas geladen wanneer ze opengeklapt wordt, met één query
+# die door een index uit Hoofdstuk 2.C bediend wordt.
+
+def related_persons_of_company(bedrijf):
+    """Personen die aan dit bedrijf gekoppeld zijn (index op type+bedrijf)."""
+    if not bedrijf:
+        return []
+    rows = db_query("""
+        SELECT id, display_name, functie FROM contacts
+        WHERE type='persoon' AND bedrijf=?
+        ORDER BY sort_key
+    """, (bedrijf,), fetchall=True, readonly=True)
+    return [("contact", r["id"], r["display_name"] or "", r["functie"] or "")
+            for r in rows]
+
+def related_company(bedrijf):
+    """Het bedrijfsrecord met deze naam (index op type+bedrijf)."""
+    if not bedrijf:
+        return []
+    rows = db_query("""
+        SELECT id, bedrijf, rechtsvorm, stad FROM contacts
+        WHERE type='bedrijf' AND bedrijf=?
+    """, (bedrijf,), fetchall=True, readonly=True)
+    return [("contact", r["id"], f"{r['bedrijf']} {r['rechtsvorm'] or ''}".strip(), r["stad"] or "")
+            for r in rows]
+
+def related_projects_of_client(klanten):
+    """Projecten waarvan de klant één van de opgegeven namen is (index op klant)."""
+    klanten = [k for k in klanten if k]
+    if not klanten:
+        return []
+    marks = ", ".join("?" * len(klanten))
+    # De historiek van een klant hoort erbij: ook het archief (index op klant in beide)
+    query, params = project_union(f"SELECT id, projectnummer, projectnaam, status FROM {{src}} WHERE klant IN ({marks})",
+                                  klanten, archive=True)
+    rows = db_query(query + " ORDER BY projectnummer", params, fetchall=True, readonly=True, archive=True)
+    return [("project", r["id"], f"{r['projectnummer'] or ''} – {r['projectnaam'] or ''}", r["status"] or "")
+            for r in rows]
+
+def related_linked_projects(project):
+    """Projecten die via gekoppeld_nummer (in beide richtingen) verbonden zijn."""
+    nummer = (project.get("projectnummer") or "").strip()
+    gekoppeld = (project.get("gekoppeld_nummer") or "").strip()
+    if not nummer and not gekoppeld:
+        return []
+    # Twee geïndexeerde kolommen in één OR → SQLite gebruikt beide indexen
+    query, params = project_union(
+        "SELECT id, projectnummer, projectnaam, status FROM {src} WHERE (projectnummer=? OR gekoppeld_nummer=?) AND id<>?",
+        (gekoppeld or None, nummer or None, project.get("id") or 0), archive=True)
+    rows = db_query(query + " ORDER BY projectnummer", params, fetchall=True, readonly=True, archive=True)
+    return [("project", r["id"], f"{r['projectnummer'] or ''} – {r['projectnaam'] or ''}", r["status"] or "")
+            for r in rows]
+
+def build_related_panel(parent, groups):
+    """
+    Maak een paneel met uitklapbare groepen.
+    groups: lijst van (titel, loader); loader geeft tuples (soort, id, tekst, detail).
+    """
+    box = tk.LabelFrame(parent, text="Gerelateerd")
+    tree = ttk.Treeview(box, columns=("detail",), show="tree", height=7)
+    tree.column("#0", width=300, stretch=True)
+    tree.column("detail", width=140, stretch=True)
+    tree.pack(side="left", fill="both", expand=True)
+    sb = ttk.Scrollbar(box, orient="vertical", command=tree.yview)
+    sb.pack(side="right", fill="y")
+    tree.configure(yscroll=sb.set)
+
+    loaders = {}   # groep-iid -> (titel, loader)
+    targets = {}   # rij-iid -> (soort, id)
+
+    for titel, loader in groups:
+        gid = tree.insert("", "end", text=titel, open=False)
+        tree.insert(gid, "end", text="…")  # placeholder zodat de groep uitklapbaar is
+        loaders[gid] = (titel, loader)
+
+    def on_open(_evt=None):
+        gid = tree.focus()
+        if gid not in loaders:
+            return
+        titel, loader = loaders.pop(gid)  # slechts één keer laden per paginaopening
+        tree.delete(*tree.get_children(gid))
+        try:
+            items = loader()
+        except sqlite3.Error as e:
+            tree.insert(gid, "end", text=f"Fout bij laden: {e}")
+            return
+        for soort, rid, tekst, detail in items:
+            iid = tree.insert(gid, "end", text=tekst, values=(detail,))
+            targets[iid] = (soort, rid)
+        tree.item(gid, text=f"{titel} ({len(items)})")
+
+    def on_double(_evt=None):
+        target = targets.get(tree.focus())
+        if not target:
+            return
+        soort, rid = target
+        if soort == "project":
+            show_project_detail(rid)
+        else:
+            r = cached_record("contacts", rid, readonly=True)
+            if r:
+                show_contact_page(r)
+
+    tree.bind("<<TreeviewOpen>>", on_open)
+    tree.bind("<Double-1>", on_double)
+    return box
+
+
+# ------------------ Hoofdstuk 10.C: Bijlagen bij projecten ------------------
+# Lijst van bijlagen met miniatuur (uit de procespool van dela_core, Hoofdstuk 2.P).
+# Op de detailpagina enkel openen; in het bewerkformulier ook toevoegen/verwijderen.
+
+def open_with_system(path):
+    """Open een bestand met het standaardprogramma van het besturingssysteem."""
+    import subprocess
+    if hasattr(os, "startfile"):
+        os.startfile(path)
+    elif sys.platform == "darwin":
+        subprocess.Popen(["open", path])
+    else:
+        subprocess.Popen(["xdg-open", path])
+
+def build_attachments_panel(parent, project_id, editable=False):
+    box = tk.LabelFrame(parent, text="Bijlagen")
+    tree = ttk.Treeview(box, columns=("categorie", "grootte"), show="tree headings", height=5)
+    tree.heading("#0", text="Bestand")
+    tree.heading("categorie", text="Soort")
+    tree.heading("grootte", text="Grootte")
+    tree.column("#0", width=240)
+    tree.column("categorie", width=90)
+    tree.column("grootte", width=70, anchor="e")
+    tree.pack(side="left", fill="both", expand=True)
+    preview = tk.Label(box, width=22, text="")
+    preview.pack(side="left", fill="y", padx=6)
+    rows = {}  # iid -> rij uit project_attachments
+
+    def load():
+        tree.delete(*tree.get_children())
+        rows.clear()
+        try:
+            found = list_attachments(project_id, readonly=not editable)
+        except sqlite3.Error as e:
+            tree.insert("", "end", text=f"Fout bij laden: {e}")
+            return
+        for r in found:
+            kb = max(1, round(r["grootte"] / 1024))
+            iid = tree.insert("", "end", text=r["bestandsnaam"], values=(r["categorie"] or "", f"{kb:,} KB"))
+            rows[iid] = r
+
+    def show_preview(_evt=None):
+        r = rows.get(tree.focus())
+        preview.config(image="", text="")
+        preview.image = None
+        if not r:
+            return
+        try:
+            future = request_thumbnail(r["sha256"], r["bestandsnaam"])
+        except OSError:
+            future = None
+        if future is None:
+            preview.config(text="(geen voorbeeld)")
+            return
+        wanted = tree.focus()
+
+        def poll():
+            if not preview.winfo_exists() or tree.focus() != wanted:
+                return
+            if not future.done():
+                preview.after(100, poll)
+                return
+            try:
+                img = ImageTk.PhotoImage(Image.open(future.result()))
+            except Exception:
+                preview.config(text="(geen voorbeeld)")
+                return
+            preview.config(image=img)
+            preview.image = img  # referentie bewaren
+
+        preview.config(text="…")
+        poll()
+
+    def open_selected(_evt=None):
+        r = rows.get(tree.focus())
+        if not r:
+            return
+        try:
+            open_with_system(attachment_copy(r["sha256"], r["bestandsnaam"]))
+        except OSError as e:
+            messagebox.showerror("Bijlage", f"Openen mislukt:\n{e}", parent=box)
+
+    def add_files():
+        paths = filedialog.askopenfilenames(title="Bijlagen toevoegen", parent=box)
+        if not paths:
+            return
+        categorie = simpledialog.askstring("Bijlagen", f"Soort ({', '.join(ATTACH_CATEGORIES)}):",
+                                           initialvalue="Ander", parent=box) or "Ander"
+        try:
+            for path in paths:
+                add_attachment(project_id, path, categorie.strip(), current_user)
+        except (OSError, sqlite3.Error) as e:
+            messagebox.showerror("Bijlage", f"Toevoegen mislukt:\n{e}", parent=box)
+        load()
+
+    def remove_selected():
+        r = rows.get(tree.focus())
+        if not r or not messagebox.askyesno("Bijlage", f"'{r['bestandsnaam']}' verwijderen?", parent=box):
+            return
+        try:
+            remove_attachment(r["id"])
+        except (OSError, sqlite3.Error) as e:
+            messagebox.showerror("Bijlage", f"Verwijderen mislukt:\n{e}", parent=box)
+        load()
+
+    btns = tk.Frame(box)
+    btns.pack(side="right", fill="y")
+    tk.Button(btns, text="Openen", width=10, command=open_selected).pack(pady=2)
+    if editable:
+        tk.Button(btns, text="Toevoegen…", width=10, command=add_files).pack(pady=2)
+        tk.Button(btns, text="Verwijderen", width=10, command=remove_selected).pack(pady=2)
+    tree.bind("<<TreeviewSelect>>", show_preview)
+    tree.bind("<Double-1>", open_selected)
+    load()
+    return box
+
+
 # ------------------ Hoofdstuk 11: Nieuw contact: keuze ------------------
 # Dialoogvenster waarin de gebruiker kiest: bedrijf of persoon
 
@@ -868,39 +1133,40 @@ def new_contact_choice():
 
 # ------------------ Hoofdstuk 12: Nieuw of bestaand bedrijf (formulier) ------------------
 
-# Fallback voor now_str als niet aanwezig
-try:
-    now_str
-except NameError:
-    from datetime import datetime
-    def now_str():
-        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
 def open_company_form(existing=None, after_save=None):
+    key = ("contact_form", existing["id"]) if existing and existing.get("id") else None
+    if key and focus_window(key):
+        return
+    form = take_pooled_form("company", _build_company_form)
+    form["load"](existing, after_save)
+    show_pooled_form(form, key)
+
+def _build_company_form():
+    """Bouw het bedrijfsformulier één keer; load() vult het voor een (nieuw) bedrijf."""
     win = tk.Toplevel(root)
-    win.title("Bedrijf" + (" bewerken" if existing else " toevoegen"))
+    win.withdraw()
     win.geometry("560x520")
     win.columnconfigure(1, weight=1)
+    state = {"existing": None, "after_save": None}
+    form = {"win": win}
 
     def row(lbl, widget, r):
         tk.Label(win, text=lbl, anchor="w").grid(row=r, column=0, sticky="w", padx=8, pady=6)
         widget.grid(row=r, column=1, sticky="ew", padx=8, pady=6)
 
-    bedrijf_var = tk.StringVar(value=(existing.get("bedrijf","") if existing else ""))
-    rechtsvorm_var = tk.StringVar(value=(existing.get("rechtsvorm","") if existing else "BV"))
-    email_var = tk.StringVar(value=(existing.get("email","") if existing else ""))
-    functie_var = tk.StringVar(value=(existing.get("functie","") if existing else ""))
-    gsm_cc_lbl = code_to_label(existing.get("gsm_cc", DEFAULT_CC) if existing else DEFAULT_CC)
-    tel_cc_lbl = code_to_label(existing.get("tel_cc", DEFAULT_CC) if existing else DEFAULT_CC)
-    gsm_cc_var = tk.StringVar(value=gsm_cc_lbl)
-    gsm_num_var = tk.StringVar(value=(existing.get("gsm_num","") if existing else ""))
-    tel_cc_var = tk.StringVar(value=tel_cc_lbl)
-    tel_num_var = tk.StringVar(value=(existing.get("tel_num","") if existing else ""))
-    straat_var = tk.StringVar(value=(existing.get("straat","") if existing else ""))
-    huisnr_var = tk.StringVar(value=(existing.get("huisnummer","") if existing else ""))
-    stad_var = tk.StringVar(value=(existing.get("stad","") if existing else ""))
-    postcode_var = tk.StringVar(value=(existing.get("postcode","") if existing else ""))
-    land_var = tk.StringVar(value=(existing.get("land","België") if existing else "België"))
+    bedrijf_var = tk.StringVar()
+    rechtsvorm_var = tk.StringVar()
+    email_var = tk.StringVar()
+    functie_var = tk.StringVar()
+    gsm_cc_var = tk.StringVar()
+    gsm_num_var = tk.StringVar()
+    tel_cc_var = tk.StringVar()
+    tel_num_var = tk.StringVar()
+    straat_var = tk.StringVar()
+    huisnr_var = tk.StringVar()
+    stad_var = tk.StringVar()
+    postcode_var = tk.StringVar()
+    land_var = tk.StringVar()
 
     bedrijf_entry = tk.Entry(win, textvariable=bedrijf_var)
     rechtsvorm_cb = ttk.Combobox(win, values=["BV","NV","VZW","CV","VOF","EP","ASBL","GmbH","SARL"], textvariable=rechtsvorm_var, state="readonly")
@@ -941,7 +1207,28 @@ def open_company_form(existing=None, after_save=None):
     row("Postcode", tk.Entry(win, textvariable=postcode_var), 9)
     row("Land", tk.Entry(win, textvariable=land_var), 10)
 
+    def load(existing, after_save):
+        """Zet alle velden terug (leeg of uit `existing`) zodat het formulier herbruikt kan worden."""
+        state["existing"], state["after_save"] = existing, after_save
+        win.title("Bedrijf" + (" bewerken" if existing else " toevoegen"))
+        e = existing or {}
+        bedrijf_var.set(e.get("bedrijf") or "")
+        rechtsvorm_var.set((e.get("rechtsvorm") or "") if existing else "BV")
+        email_var.set(e.get("email") or "")
+        functie_var.set(e.get("functie") or "")
+        gsm_cc_var.set(code_to_label(e.get("gsm_cc") or DEFAULT_CC))
+        gsm_num_var.set(e.get("gsm_num") or "")
+        tel_cc_var.set(code_to_label(e.get("tel_cc") or DEFAULT_CC))
+        tel_num_var.set(e.get("tel_num") or "")
+        straat_var.set(e.get("straat") or "")
+        huisnr_var.set(e.get("huisnummer") or "")
+        stad_var.set(e.get("stad") or "")
+        postcode_var.set(e.get("postcode") or "")
+        land_var.set((e.get("land") or "") if existing else "België")
+        bedrijf_entry.focus_set()
+
     def save_company():
+        existing, after_save = state["existing"], state["after_save"]
         stamp = now_str()
         rowdata = {
             "type": "bedrijf",
@@ -965,74 +1252,77 @@ def open_company_form(existing=None, after_save=None):
             "laatst_gewijzigd_door": globals().get("current_user") or "",
             "laatst_gewijzigd_op": stamp
         }
-        if existing:
-            db_update("contacts", rowdata, "type='bedrijf' AND bedrijf=?", (existing.get("bedrijf",""),))
-        else:
-            db_insert("contacts", rowdata)
+        # Schrijven op primaire sleutel: raakt exact deze ene rij
+        try:
+            rowdata["id"] = db_upsert("contacts", dict(rowdata, id=(existing or {}).get("id")))
+        except sqlite3.Error as e:
+            messagebox.showerror("Fout", f"Opslaan mislukt:\n{e}")
+            return
 
         messagebox.showinfo("Succes", "Bedrijf opgeslagen.")
-        win.destroy()
+        release_form(form)
         if after_save:
             after_save(rowdata)
         else:
             show_contact_page(rowdata)
 
     tk.Button(win, text="Opslaan", command=save_company).grid(row=99, column=1, sticky="e", padx=8, pady=12)
+    form["load"] = load
+    return form
 
 # ------------------ Hoofdstuk 13: Nieuw of bestaand persoon (formulier) ------------------
 
-# Fallbacks
-try:
-    SALUTATIONS
-except NameError:
-    SALUTATIONS = ["Dhr.", "Mevr.", "Dr.", "Ir."]
-
 def open_person_form(existing=None):
+    key = ("contact_form", existing["id"]) if existing and existing.get("id") else None
+    if key and focus_window(key):
+        return
+    form = take_pooled_form("person", _build_person_form)
+    form["load"](existing)
+    show_pooled_form(form, key)
+
+def _build_person_form():
+    """Bouw het persoonsformulier één keer; load() vult het voor een (nieuwe) persoon."""
     from difflib import get_close_matches
 
     win = tk.Toplevel(root)
-    win.title("Persoon" + (" bewerken" if existing else " toevoegen"))
+    win.withdraw()
     win.geometry("640x620")
     win.columnconfigure(1, weight=1)
+    state = {"existing": None}
+    form = {"win": win}
 
     def row(lbl, widget, r):
         tk.Label(win, text=lbl, anchor="w").grid(row=r, column=0, sticky="w", padx=8, pady=6)
         widget.grid(row=r, column=1, sticky="ew", padx=8, pady=6)
 
-    companies = [r["bedrijf"] for r in db_query("SELECT bedrijf FROM contacts WHERE type='bedrijf' AND bedrijf<>'' ORDER BY bedrijf", fetchall=True)]
-    bedrijf_var = tk.StringVar(value=(existing.get("bedrijf","") if existing else ""))
-    rechtsvorm_var = tk.StringVar(value=(existing.get("rechtsvorm","") if existing else "BV"))
-    aanhef_var = tk.StringVar(value=(existing.get("aanhef","") if existing else SALUTATIONS[0]))
-    voornaam_var = tk.StringVar(value=(existing.get("voornaam","") if existing else ""))
-    achternaam_var = tk.StringVar(value=(existing.get("achternaam","") if existing else ""))
-    email_var = tk.StringVar(value=(existing.get("email","") if existing else ""))
-    functie_var = tk.StringVar(value=(existing.get("functie","") if existing else ""))
-    gsm_cc_lbl = code_to_label(existing.get("gsm_cc", DEFAULT_CC) if existing else DEFAULT_CC)
-    tel_cc_lbl = code_to_label(existing.get("tel_cc", DEFAULT_CC) if existing else DEFAULT_CC)
-    gsm_cc_var = tk.StringVar(value=gsm_cc_lbl)
-    gsm_num_var = tk.StringVar(value=(existing.get("gsm_num","") if existing else ""))
-    tel_cc_var = tk.StringVar(value=tel_cc_lbl)
-    tel_num_var = tk.StringVar(value=(existing.get("tel_num","") if existing else ""))
-    rrn = existing.get("rijksregisternummer","") if existing else ""
+    bedrijf_var = tk.StringVar()
+    rechtsvorm_var = tk.StringVar()
+    aanhef_var = tk.StringVar()
+    voornaam_var = tk.StringVar()
+    achternaam_var = tk.StringVar()
+    email_var = tk.StringVar()
+    functie_var = tk.StringVar()
+    gsm_cc_var = tk.StringVar()
+    gsm_num_var = tk.StringVar()
+    tel_cc_var = tk.StringVar()
+    tel_num_var = tk.StringVar()
 
     def parse_rrn(rrn):
         digs = only_digits(rrn)
         a = digs[0:2]; b = digs[2:4]; c = digs[4:6]; d = digs[6:9]; e = digs[9:11]
         return a,b,c,d,e
-    rra, rrb, rrc, rrd, rre = parse_rrn(rrn)
 
-    straat_var = tk.StringVar(value=(existing.get("straat","") if existing else ""))
-    huisnr_var = tk.StringVar(value=(existing.get("huisnummer","") if existing else ""))
-    stad_var = tk.StringVar(value=(existing.get("stad","") if existing else ""))
-    postcode_var = tk.StringVar(value=(existing.get("postcode","") if existing else ""))
-    land_var = tk.StringVar(value=(existing.get("land","België") if existing else "België"))
+    straat_var = tk.StringVar()
+    huisnr_var = tk.StringVar()
+    stad_var = tk.StringVar()
+    postcode_var = tk.StringVar()
+    land_var = tk.StringVar()
 
-    bedrijf_cb = ttk.Combobox(win, values=companies, textvariable=bedrijf_var)
+    bedrijf_cb = ttk.Combobox(win, textvariable=bedrijf_var)
     rechtsvorm_cb = ttk.Combobox(win, values=["BV","NV","VZW","CV","VOF","EP","ASBL","GmbH","SARL"], textvariable=rechtsvorm_var, state="readonly")
 
     def add_company_then_set(rowdata):
-        companies_new = [r["bedrijf"] for r in db_query("SELECT bedrijf FROM contacts WHERE type='bedrijf'", fetchall=True)]
-        bedrijf_cb['values'] = companies_new
+        bedrijf_cb['values'] = company_names()
         bedrijf_var.set(rowdata.get("bedrijf",""))
         rechtsvorm_var.set(rowdata.get("rechtsvorm",""))
 
@@ -1041,7 +1331,8 @@ def open_person_form(existing=None):
     row("Rechtsvorm (indien bedrijf)", rechtsvorm_cb, 1)
     aanhef_cb = ttk.Combobox(win, values=SALUTATIONS, textvariable=aanhef_var, state="readonly")
     row("Aanhef", aanhef_cb, 2)
-    row("Voornaam", tk.Entry(win, textvariable=voornaam_var), 3)
+    voornaam_entry = tk.Entry(win, textvariable=voornaam_var)
+    row("Voornaam", voornaam_entry, 3)
     row("Achternaam", tk.Entry(win, textvariable=achternaam_var), 4)
 
     def make_phone_row(label, cc_var, num_var, r, mobile_hint=False):
@@ -1065,8 +1356,8 @@ def open_person_form(existing=None):
     row("Functie", tk.Entry(win, textvariable=functie_var), 8)
 
     tk.Label(win, text="Rijksregisternummer").grid(row=9, column=0, sticky="w", padx=8, pady=6)
-    rra_var = tk.StringVar(value=rra); rrb_var = tk.StringVar(value=rrb); rrc_var = tk.StringVar(value=rrc)
-    rrd_var = tk.StringVar(value=rrd); rre_var = tk.StringVar(value=rre)
+    rra_var = tk.StringVar(); rrb_var = tk.StringVar(); rrc_var = tk.StringVar()
+    rrd_var = tk.StringVar(); rre_var = tk.StringVar()
     rra_entry = tk.Entry(win, textvariable=rra_var, width=4)
     rrb_entry = tk.Entry(win, textvariable=rrb_var, width=4)
     rrc_entry = tk.Entry(win, textvariable=rrc_var, width=4)
@@ -1096,9 +1387,37 @@ def open_person_form(existing=None):
     row("Postcode", tk.Entry(win, textvariable=postcode_var), 13)
     row("Land", tk.Entry(win, textvariable=land_var), 14)
 
+    def load(existing):
+        """Zet alle velden terug (leeg of uit `existing`) zodat het formulier herbruikt kan worden."""
+        state["existing"] = existing
+        win.title("Persoon" + (" bewerken" if existing else " toevoegen"))
+        e = existing or {}
+        bedrijf_cb['values'] = company_names()  # gecachet per datageneratie
+        bedrijf_var.set(e.get("bedrijf") or "")
+        rechtsvorm_var.set((e.get("rechtsvorm") or "") if existing else "BV")
+        aanhef_var.set((e.get("aanhef") or "") if existing else SALUTATIONS[0])
+        voornaam_var.set(e.get("voornaam") or "")
+        achternaam_var.set(e.get("achternaam") or "")
+        email_var.set(e.get("email") or "")
+        functie_var.set(e.get("functie") or "")
+        gsm_cc_var.set(code_to_label(e.get("gsm_cc") or DEFAULT_CC))
+        gsm_num_var.set(e.get("gsm_num") or "")
+        tel_cc_var.set(code_to_label(e.get("tel_cc") or DEFAULT_CC))
+        tel_num_var.set(e.get("tel_num") or "")
+        for var, part in zip((rra_var, rrb_var, rrc_var, rrd_var, rre_var),
+                             parse_rrn(e.get("rijksregisternummer") or "")):
+            var.set(part)
+        straat_var.set(e.get("straat") or "")
+        huisnr_var.set(e.get("huisnummer") or "")
+        stad_var.set(e.get("stad") or "")
+        postcode_var.set(e.get("postcode") or "")
+        land_var.set((e.get("land") or "") if existing else "België")
+        voornaam_entry.focus_set()
+
     def save_person():
-        rows = db_query("SELECT voornaam, achternaam FROM contacts WHERE type='persoon'", fetchall=True)
-        existing_names = [f"{r['voornaam']} {r['achternaam']}".strip() for r in (rows or [])]
+        existing = state["existing"]
+        rows = db_query("SELECT display_name FROM contacts WHERE type='persoon'", fetchall=True)
+        existing_names = [r["display_name"] or "" for r in (rows or [])]
 
         fname = voornaam_var.get().strip()
         lname = achternaam_var.get().strip()
@@ -1109,7 +1428,6 @@ def open_person_form(existing=None):
 
         # Duplicate / fuzzy
         if not existing:
-            from difflib import get_close_matches
             if full_name in existing_names:
                 if not messagebox.askyesno("Opgelet", f"'{full_name}' bestaat al. Toch toevoegen?"):
                     return
@@ -1125,6 +1443,17 @@ def open_person_form(existing=None):
         d = only_digits(rrd_var.get())[:3]
         e = only_digits(rre_var.get())[:2]
         rrn = f"{a}.{b}.{c}-{d}.{e}" if any([a,b,c,d,e]) else ""
+        if rrn:
+            digits = a + b + c + d + e
+            probleem = rrn_problem(digits)
+            if probleem:
+                messagebox.showerror("Rijksregisternummer", f"Ongeldig rijksregisternummer: {probleem}.")
+                return
+            other = contact_by_rrn(digits)
+            if other and other["id"] != (existing or {}).get("id"):
+                messagebox.showerror("Rijksregisternummer",
+                                     f"Dit rijksregisternummer hoort al bij '{other['display_name']}'.")
+                return
 
         rowdata = {
             "type": "persoon",
@@ -1149,16 +1478,20 @@ def open_person_form(existing=None):
             "laatst_gewijzigd_op": now_str()
         }
 
-        if existing:
-            db_update("contacts", rowdata, "type='persoon' AND voornaam=? AND achternaam=?", (existing.get("voornaam",""), existing.get("achternaam","")))
-        else:
-            db_insert("contacts", rowdata)
+        # Schrijven op primaire sleutel: naamgenoten blijven ongemoeid
+        try:
+            rowdata["id"] = db_upsert("contacts", dict(rowdata, id=(existing or {}).get("id")))
+        except sqlite3.Error as e:
+            messagebox.showerror("Fout", f"Opslaan mislukt:\n{e}")
+            return
 
         messagebox.showinfo("Succes", "Persoon opgeslagen.")
-        win.destroy()
+        release_form(form)
         show_contact_page(rowdata)
 
     tk.Button(win, text="Opslaan", command=save_person).grid(row=99, column=1, sticky="e", padx=8, pady=12)
+    form["load"] = load
+    return form
 
 # ------------------ Hoofdstuk 14: Zoeken & bewerken contacten ------------------
 # SQLite-versie. Lijst + filteren + dubbelklik of knop om te bewerken.
@@ -1168,7 +1501,9 @@ def edit_contacts():
         messagebox.showwarning("Login vereist", "Gelieve eerst in te loggen via het startscherm.")
         return
 
-    win = tk.Toplevel(root)
+    if focus_window(("contact_edit",)):
+        return
+    win = register_window(tk.Toplevel(root), ("contact_edit",))
     win.title("Contacten bewerken")
     win.geometry("820x520")
 
@@ -1193,7 +1528,7 @@ def edit_contacts():
     mid.pack(fill="both", expand=True, padx=10, pady=(0,8))
 
     cols = ("type","naam","bedrijf","email","stad")
-    tree = ttk.Treeview(mid, columns=cols, show="headings", selectmode="browse")
+    tree = ttk.Treeview(mid, columns=cols, show="headings", selectmode="extended")
     headers = {"type":"Type","naam":"Naam","bedrijf":"Bedrijf","email":"E-mail","stad":"Stad"}
     widths  = {"type":120,"naam":180,"bedrijf":180,"email":220,"stad":120}
     for c in cols:
@@ -1203,7 +1538,13 @@ def edit_contacts():
 
     sb = ttk.Scrollbar(mid, orient="vertical", command=tree.yview)
     sb.pack(side="right", fill="y")
-    tree.configure(yscroll=sb.set)
+
+    sort_state = make_sortable(tree, headers, "contacts", "sort.edit_contacts",
+                               ("naam", False), lambda: do_search())
+    reload = keyset_grid(
+        tree, sb, "contacts", ("id", "type", "display_name", "bedrijf", "email", "stad"), sort_state,
+        lambda r: (str(r.id), ((r.type or "").capitalize(), r.display_name or "",
+                               r.bedrijf or "", r.email or "", r.stad or "")))
 
     # Onderaan: knoppen
     btns = tk.Frame(win)
@@ -1211,20 +1552,29 @@ def edit_contacts():
 
     edit_btn = tk.Button(btns, text="Bewerken", state="disabled")
     detail_btn = tk.Button(btns, text="Details", state="disabled")
+    bulk_btn = tk.Button(btns, text="Bulk bewerken…", state="disabled")
     close_btn = tk.Button(btns, text="Sluiten", command=win.destroy)
 
     edit_btn.pack(side="left")
     detail_btn.pack(side="left", padx=6)
+    bulk_btn.pack(side="left")
     close_btn.pack(side="right")
 
     def do_search(*_):
-        tree.delete(*tree.get_children())
         kw = kw_var.get().strip()
         like = f"%{kw}%"
         filters = []
         params = []
 
-        if kw:
+        digits = rrn_from_search(kw)
+        domain = email_domain_from_search(kw)
+        if digits:
+            filters.append("rrn = ?")
+            params.append(digits)
+        elif domain:
+            filters.append("email_domain = ?")
+            params.append(domain)
+        elif kw:
             filters.append("(bedrijf LIKE ? OR voornaam LIKE ? OR achternaam LIKE ? OR email LIKE ? OR stad LIKE ?)")
             params += [like, like, like, like, like]
 
@@ -1234,33 +1584,12 @@ def edit_contacts():
         elif t == "Persoon":
             filters.append("type='persoon'")
 
-        where = " WHERE " + " AND ".join(filters) if filters else ""
-        rows = db_query(
-            f"SELECT * FROM contacts{where} "
-            "ORDER BY CASE WHEN type='persoon' THEN achternaam ELSE bedrijf END COLLATE NOCASE",
-            tuple(params),
-            fetchall=True
-        )
-
-        for r in rows:
-            # id gebruiken als iid zodat we hem makkelijk kunnen terugvinden
-            iid = str(r["id"])
-            naam_vis = (f"{r['voornaam']} {r['achternaam']}".strip() if r["type"]=="persoon" else r["bedrijf"])
-            tree.insert(
-                "",
-                "end",
-                iid=iid,
-                values=(
-                    r["type"].capitalize(),
-                    f"{r['voornaam']} {r['achternaam']}".strip(),
-                    r["bedrijf"] or "",
-                    r["email"] or "",
-                    r["stad"] or ""
-                )
-            )
+        # id wordt als iid gebruikt zodat we hem makkelijk kunnen terugvinden
+        reload(filters, params)
 
         edit_btn.config(state="disabled")
         detail_btn.config(state="disabled")
+        bulk_btn.config(state="disabled")
 
     def current_selection_id():
         sel = tree.selection()
@@ -1269,18 +1598,23 @@ def edit_contacts():
         return int(sel[0])
 
     def on_select(event=None):
-        has = bool(tree.selection())
-        edit_btn.config(state="normal" if has else "disabled")
-        detail_btn.config(state="normal" if has else "disabled")
+        n = len(tree.selection())
+        edit_btn.config(state="normal" if n == 1 else "disabled")
+        detail_btn.config(state="normal" if n == 1 else "disabled")
+        bulk_btn.config(state="normal" if n else "disabled")
+
+    def do_bulk():
+        ids = [int(i) for i in tree.selection()]
+        if ids:
+            open_bulk_edit("contacts", ids, after_change=do_search)
 
     def do_edit():
         cid = current_selection_id()
         if not cid:
             return
-        r = db_query("SELECT * FROM contacts WHERE id=?", (cid,), fetchone=True)
-        if not r:
+        rec = cached_record("contacts", cid)
+        if not rec:
             return
-        rec = dict(r)
         if rec["type"] == "persoon":
             open_person_form(existing=rec)
         else:
@@ -1290,14 +1624,15 @@ def edit_contacts():
         cid = current_selection_id()
         if not cid:
             return
-        r = db_query("SELECT * FROM contacts WHERE id=?", (cid,), fetchone=True)
+        r = cached_record("contacts", cid, readonly=True)
         if not r:
             return
-        show_contact_page(dict(r))
+        show_contact_page(r)
 
     tree.bind("<<TreeviewSelect>>", on_select)
     tree.bind("<Double-1>", lambda e: do_edit())
     search_btn.config(command=do_search)
+    bulk_btn.config(command=do_bulk)
     type_cb.bind("<<ComboboxSelected>>", do_search)
 
     # Na terugkeer van een edit-venster automatisch refreshen
@@ -1305,22 +1640,138 @@ def edit_contacts():
 
     do_search()
 
+# ------------------ Hoofdstuk 14.B: Bulkbewerking ------------------
+# Eén veld wijzigen voor alle geselecteerde rijen (zie Hoofdstuk 2.F).
+# Eerst een preview, dan één transactie; ongedaan maken via de historiek.
+
+BULK_FIELD_LABELS = {
+    "bedrijf": "Bedrijf", "rechtsvorm": "Rechtsvorm", "functie": "Functie", "straat": "Straat",
+    "postcode": "Postcode", "stad": "Stad", "land": "Land", "status": "Status", "klant": "Klant",
+    "bureau": "Bureau", "type_project": "Type project", "gekoppeld_nummer": "Gekoppeld nummer",
+}
+
+def open_bulk_edit(table, ids, after_change=None):
+    if not ids:
+        messagebox.showinfo("Bulk bewerken", "Selecteer eerst één of meer rijen.")
+        return
+    win = tk.Toplevel(root)
+    win.title(f"Bulk bewerken – {len(ids)} rijen")
+    win.geometry("640x520")
+
+    top = tk.Frame(win)
+    top.pack(fill="x", padx=10, pady=8)
+    fields = BULK_FIELDS[table]
+    label_to_field = {BULK_FIELD_LABELS.get(f, f): f for f in fields}
+    tk.Label(top, text="Veld:").pack(side="left")
+    field_var = tk.StringVar(value=list(label_to_field)[0])
+    field_cb = ttk.Combobox(top, textvariable=field_var, values=list(label_to_field), state="readonly", width=18)
+    field_cb.pack(side="left", padx=6)
+    tk.Label(top, text="Nieuwe waarde:").pack(side="left", padx=(12, 0))
+    value_var = tk.StringVar()
+    tk.Entry(top, textvariable=value_var, width=28).pack(side="left", padx=6)
+
+    tree = ttk.Treeview(win, columns=("rij", "huidig", "nieuw"), show="headings")
+    for c, t, w in (("rij", "Rij", 260), ("huidig", "Huidige waarde", 160), ("nieuw", "Nieuwe waarde", 160)):
+        tree.heading(c, text=t)
+        tree.column(c, width=w, anchor="w")
+    tree.pack(fill="both", expand=True, padx=10)
+    info_var = tk.StringVar()
+    tk.Label(win, textvariable=info_var, anchor="w").pack(fill="x", padx=10, pady=(4, 0))
+
+    state = {"preview": []}
+
+    def refresh_preview(*_):
+        field = label_to_field[field_var.get()]
+        try:
+            state["preview"] = db_bulk_preview(table, field, ids)
+        except sqlite3.Error as e:
+            messagebox.showerror("Databasefout", f"Preview mislukt:\n{e}", parent=win)
+            return
+        new = value_var.get().strip()
+        tree.delete(*tree.get_children())
+        changed = 0
+        for rid, label, current in state["preview"]:
+            tree.insert("", "end", iid=str(rid), values=(label, current, new))
+            changed += (current != new)
+        info_var.set(f"{len(state['preview'])} rijen geselecteerd, {changed} worden gewijzigd.")
+
+    def apply():
+        field = label_to_field[field_var.get()]
+        new = value_var.get().strip()
+        if not messagebox.askyesno("Bulk bewerken",
+                                   f"'{BULK_FIELD_LABELS.get(field, field)}' op '{new}' zetten voor {len(ids)} rijen?",
+                                   parent=win):
+            return
+        try:
+            bulk_id = db_bulk_update(table, field, new, ids)
+        except (sqlite3.Error, ValueError) as e:
+            messagebox.showerror("Fout", f"Bulkwijziging mislukt:\n{e}", parent=win)
+            return
+        win.destroy()
+        if after_change:
+            after_change()
+        if messagebox.askyesno("Bulk bewerken", f"{len(ids)} rijen aangepast.\n\nWil je dit meteen ongedaan maken?"):
+            undo_bulk(bulk_id, after_change)
+
+    field_cb.bind("<<ComboboxSelected>>", refresh_preview)
+    value_var.trace_add("write", refresh_preview)
+    register_window(win, variables=(value_var,))
+
+    btns = tk.Frame(win)
+    btns.pack(fill="x", padx=10, pady=10)
+    tk.Button(btns, text="Toepassen", command=apply).pack(side="right")
+    tk.Button(btns, text="Annuleren", command=win.destroy).pack(side="right", padx=6)
+    refresh_preview()
+
+def undo_bulk(bulk_id, after_change=None):
+    try:
+        n = db_bulk_undo(bulk_id)
+    except (sqlite3.Error, ValueError) as e:
+        messagebox.showerror("Ongedaan maken", str(e))
+        return
+    if after_change:
+        after_change()
+    messagebox.showinfo("Ongedaan maken", f"{n} rijen teruggezet.")
+
+def show_bulk_history():
+    if focus_window(("bulk_history",)):
+        return
+    win = register_window(tk.Toplevel(root), ("bulk_history",))
+    win.title("Bulkwijzigingen")
+    win.geometry("760x380")
+    cols = ("op", "door", "tabel", "veld", "waarde", "aantal", "ongedaan")
+    tree = ttk.Treeview(win, columns=cols, show="headings", selectmode="browse")
+    for c, t, w in (("op", "Op", 140), ("door", "Door", 90), ("tabel", "Tabel", 80), ("veld", "Veld", 110),
+                    ("waarde", "Nieuwe waarde", 140), ("aantal", "Rijen", 60), ("ongedaan", "Ongedaan op", 140)):
+        tree.heading(c, text=t)
+        tree.column(c, width=w, anchor="w")
+    tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+    def load():
+        tree.delete(*tree.get_children())
+        for r in db_bulk_history():
+            tree.insert("", "end", iid=str(r["id"]), values=(
+                r["op"], r["door"] or "", r["tabel"], r["veld"], r["nieuwe_waarde"] or "",
+                r["aantal"], r["ongedaan_op"] or ""))
+
+    def do_undo():
+        sel = tree.selection()
+        if sel and messagebox.askyesno("Ongedaan maken", "Geselecteerde bulkwijziging ongedaan maken?", parent=win):
+            undo_bulk(int(sel[0]), load)
+
+    btns = tk.Frame(win)
+    btns.pack(fill="x", padx=10, pady=(0, 10))
+    tk.Button(btns, text="Ongedaan maken", command=do_undo).pack(side="left")
+    tk.Button(btns, text="Sluiten", command=win.destroy).pack(side="right")
+    load()
+
 # =========================
 # Hoofdstuk 15: Applicatie-start (snelheid verbeterd)
 # =========================
 
-import tkinter as tk
-from tkinter import simpledialog, messagebox
-import sqlite3
-import os
-from PIL import Image, ImageTk
-
-# --- Database instellingen ---
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "dela_database.db")
-
+# --- Database instellingen (pad uit dela_core) ---
 def get_connection():
-    return sqlite3.connect(DB_PATH)
+    return sqlite3.connect(dela_core.DB_PATH)
 
 def init_colleagues():
     """Zorg dat de tabel 'colleagues' bestaat en vul standaard namen in."""
@@ -1334,13 +1785,7 @@ def init_colleagues():
     """)
     conn.commit()
 
-    defaults = globals().get("DEFAULT_USERS") or [
-        "Felix", "Kris", "Michael", "Pascal",
-        "Heidi V.", "Heidi D.", "Marie-Roos", "Jelle",
-        "Quinten", "Rik", "Maaike"
-    ]
-
-    for d in defaults:
+    for d in DEFAULT_USERS:
         cur.execute("INSERT OR IGNORE INTO colleagues (name) VALUES (?)", (d,))
 
     conn.commit()
@@ -1353,34 +1798,44 @@ def _safe_open_image(path):
     except Exception:
         return None
 
-def _resize_keep_aspect(img, max_w, max_h):
-    if not img:
+# Logo's: bronbeelden één keer laden, geschaalde PhotoImages hergebruiken per
+# grootte (kleine cache) in plaats van bij elke <Configure> nieuwe te maken.
+LOGO_FILES = {"delafontaine": "Logo_Delafontaine.png", "vector": "Logo_Vector.png"}
+LOGO_CACHE_MAX = 4
+_logo_sources = {}   # naam -> PIL-beeld (of None als het bestand ontbreekt)
+_logo_photos = {}    # (naam, breedte, hoogte) -> PhotoImage
+_logo_frame = None
+
+def _logo_photo(name, max_w, max_h):
+    if name not in _logo_sources:
+        _logo_sources[name] = _safe_open_image(os.path.join(BASE_DIR, LOGO_FILES[name]))
+    src = _logo_sources[name]
+    if not src:
         return None
-    iw, ih = img.size
+    iw, ih = src.size
     scale = min(max_w / iw, max_h / ih)
-    new_size = (max(1, int(iw * scale)), max(1, int(ih * scale)))
-    return img.resize(new_size, Image.BILINEAR)
+    size = (max(1, int(iw * scale)), max(1, int(ih * scale)))
+    key = (name,) + size
+    photo = _logo_photos.get(key)
+    if photo is None:
+        if len(_logo_photos) >= LOGO_CACHE_MAX:
+            _logo_photos.pop(next(iter(_logo_photos)))  # oudste eruit
+        photo = _logo_photos[key] = ImageTk.PhotoImage(src.resize(size, Image.BILINEAR))
+    return photo
 
 def _render_logos(parent, max_frac_w=0.6, max_frac_h_each=0.25, smaller_second=True):
-    if getattr(root, "_logo_frame", None):
-        root._logo_frame.destroy()
+    global _logo_frame
+    if _logo_frame is not None and _logo_frame.winfo_exists():
+        _logo_frame.destroy()
     logo_frame = tk.Frame(parent)
     logo_frame.pack(expand=True)
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-
-    if not hasattr(root, "_pil_logo1"):
-        root._pil_logo1 = _safe_open_image(os.path.join(base_dir, "Logo_Delafontaine.png"))
-    if not hasattr(root, "_pil_logo2"):
-        root._pil_logo2 = _safe_open_image(os.path.join(base_dir, "Logo_Vector.png"))
 
     logo1_label = tk.Label(logo_frame)
     logo1_label.pack(pady=8)
     logo2_label = tk.Label(logo_frame)
     logo2_label.pack(pady=8)
-
-    root._logo_frame = logo_frame
-    root._logo1_label = logo1_label
-    root._logo2_label = logo2_label
+    _logo_frame = logo_frame
+    last_size = [None]
 
     def _update_logos(event=None):
         if not (logo1_label.winfo_exists() and logo2_label.winfo_exists()):
@@ -1388,25 +1843,24 @@ def _render_logos(parent, max_frac_w=0.6, max_frac_h_each=0.25, smaller_second=T
 
         W = max(root.winfo_width(), 400)
         H = max(root.winfo_height(), 400)
+        if last_size[0] == (W, H):
+            return
+        last_size[0] = (W, H)
         max_w = int(W * max_frac_w)
         max_h_each = int(H * max_frac_h_each)
 
-        img1r = _resize_keep_aspect(root._pil_logo1, max_w, max_h_each)
-        if img1r:
-            tkimg1 = ImageTk.PhotoImage(img1r)
-            logo1_label.config(image=tkimg1, text="")
-            logo1_label.image = tkimg1
+        img1 = _logo_photo("delafontaine", max_w, max_h_each)
+        if img1:
+            logo1_label.config(image=img1, text="")
 
         if smaller_second:
             max_w2, max_h2 = int(max_w * 0.8), int(max_h_each * 0.8)
         else:
             max_w2, max_h2 = max_w, max_h_each
 
-        img2r = _resize_keep_aspect(root._pil_logo2, max_w2, max_h2)
-        if img2r:
-            tkimg2 = ImageTk.PhotoImage(img2r)
-            logo2_label.config(image=tkimg2, text="")
-            logo2_label.image = tkimg2
+        img2 = _logo_photo("vector", max_w2, max_h2)
+        if img2:
+            logo2_label.config(image=img2, text="")
 
     logo_frame.bind("<Configure>", _update_logos)
     root.after(50, _update_logos)
@@ -1460,9 +1914,16 @@ def show_login_screen():
 
 def do_login(naam):
     global current_user
-    current_user = naam
+    current_user = dela_core.current_user = naam  # ook voor bulk/voorkeuren in dela_core
     show_main_menu()
 
+def logout():
+    global current_user
+    close_all_windows()
+    current_user = dela_core.current_user = None
+    root.config(menu="")
+    show_start_screen()
+
 def add_colleague():
     naam = simpledialog.askstring("Nieuwe collega", "Naam:")
     if naam:
@@ -1499,6 +1960,84 @@ def remove_colleague():
     elif naam:
         messagebox.showerror("Niet gevonden", f"Collega '{naam}' niet gevonden.")
 
+# --- Omnibox: één zoekvak voor projecten en contacten (Hoofdstuk 2.T) ---
+OMNI_KIND_LABEL = {"projects": "Project", "contacts": "Contact"}
+
+def build_omnibox(parent):
+    frame = tk.Frame(parent)
+    frame.pack(fill="x", padx=40, pady=(8, 0))
+    tk.Label(frame, text="Zoeken (project of contact):", anchor="w").pack(fill="x")
+    query_var = tk.StringVar()
+    entry = tk.Entry(frame, textvariable=query_var)
+    entry.pack(fill="x")
+    result_box = tk.Listbox(frame, height=0, activestyle="dotbox")
+    results = []
+    pending = [None]  # after-id van de uitgestelde zoekopdracht
+
+    def update_results(evt=None):
+        if evt is not None and evt.keysym in ("Return", "Down", "Up", "Escape"):
+            return
+        # Snel typen: enkel zoeken als er OMNI_DEBOUNCE_MS niets meer getypt is
+        if pending[0]:
+            root.after_cancel(pending[0])
+        pending[0] = root.after(OMNI_DEBOUNCE_MS, run_search)
+
+    def run_search():
+        pending[0] = None
+        if not entry.winfo_exists():  # venster intussen gesloten (bv. afmelden)
+            return
+        results[:] = omni_search(query_var.get(), readonly=True)  # raadplegen: alleen-lezen (Hoofdstuk 2.K)
+        result_box.delete(0, "end")
+        for tabel, _rid, titel, detail in results:
+            line = f"{OMNI_KIND_LABEL[tabel]}:  {titel}"
+            result_box.insert("end", f"{line}  —  {detail}" if detail else line)
+        if results:
+            result_box.config(height=len(results))
+            result_box.pack(fill="x", after=entry)
+        else:
+            result_box.pack_forget()
+
+    def open_result(index):
+        if pending[0]:  # Enter vlak na het typen: eerst de laatste invoer zoeken
+            root.after_cancel(pending[0])
+            run_search()
+        if not (0 <= index < len(results)):
+            return
+        tabel, rid, _titel, _detail = results[index]
+        if tabel == "projects":
+            show_project_detail(rid)
+            return
+        r = cached_record("contacts", rid, readonly=True)
+        if r:
+            show_contact_page(r)
+
+    def open_selected(_evt=None):
+        sel = result_box.curselection()
+        open_result(sel[0] if sel else 0)
+
+    def move_into_list(_evt=None):
+        if results:
+            result_box.focus_set()
+            result_box.selection_clear(0, "end")
+            result_box.selection_set(0)
+            result_box.activate(0)
+
+    def back_to_entry(_evt=None):
+        if result_box.curselection() == (0,):
+            entry.focus_set()
+            return "break"
+
+    entry.bind("<KeyRelease>", update_results)
+    entry.bind("<Return>", lambda e: open_result(0))
+    entry.bind("<Down>", move_into_list)
+    entry.bind("<Escape>", lambda e: (query_var.set(""), result_box.pack_forget()))
+    result_box.bind("<Return>", open_selected)
+    result_box.bind("<Double-1>", open_selected)
+    result_box.bind("<Up>", back_to_entry)
+    result_box.bind("<Escape>", lambda e: (entry.focus_set(), result_box.pack_forget()))
+    entry.focus_set()
+    return frame
+
 # --- Hoofdmenu ---
 def show_main_menu():
     for w in root.winfo_children():
@@ -1521,20 +2060,596 @@ def show_main_menu():
     contacten_menu.add_command(label="Contacten bewerken", command=edit_contacts)
     menubar.add_cascade(label="Contacten", menu=contacten_menu)
 
+    # --- Overzicht menu ---
+    overzicht_menu = tk.Menu(menubar, tearoff=0)
+    overzicht_menu.add_command(label="Dashboard", command=show_dashboard)
+    menubar.add_cascade(label="Overzicht", menu=overzicht_menu)
+
+    # --- Beheer menu ---
+    beheer_menu = tk.Menu(menubar, tearoff=0)
+    beheer_menu.add_command(label="Back-up maken", command=backup_now)
+    beheer_menu.add_command(label="Back-up terugzetten…", command=restore_backup_dialog)
+    beheer_menu.add_command(label="Bulkwijzigingen…", command=show_bulk_history)
+    beheer_menu.add_command(label="Postcodecentroïden importeren…", command=import_centroids_dialog)
+    beheer_menu.add_separator()
+    beheer_menu.add_command(label="Offline kopie maken…", command=sync_copy_dialog)
+    beheer_menu.add_command(label="Wijzigingen exporteren (sync)…", command=sync_export_dialog)
+    beheer_menu.add_command(label="Wijzigingen importeren (sync)…", command=sync_import_dialog)
+    beheer_menu.add_command(label="Sync-conflicten…", command=show_sync_conflicts)
+    beheer_menu.add_separator()
+    beheer_menu.add_command(label="Onderhoud uitvoeren", command=maintenance_now)
+    beheer_menu.add_command(label="Afgesloten projecten archiveren…", command=archive_now)
+    beheer_menu.add_command(label="Gezondheidsrapport", command=show_health_report)
+    beheer_menu.add_command(label="Reactiesnelheid interface", command=show_lag_report)
+    beheer_menu.add_command(label="Rijksregisternummers nakijken", command=show_rrn_issues)
+    beheer_menu.add_command(label="Bedrijfskoppelingen voorstellen…", command=show_company_link_proposals)
+    beheer_menu.add_command(label="Datakwaliteit controleren…", command=show_data_quality)
+    menubar.add_cascade(label="Beheer", menu=beheer_menu)
+
+    menubar.add_command(label="Afmelden", command=logout)
     menubar.add_command(label="Afsluiten", command=root.destroy)
     root.config(menu=menubar)
 
     if current_user:
         lbl_user = tk.Label(root, text=f"Ingelogd als: {current_user}", anchor="e")
         lbl_user.pack(fill="x", padx=8, pady=4)
+        build_omnibox(root)
 
     _render_logos(root)
 
+# --- Beheer: back-ups ---
+def backup_now():
+    """Maak een back-up in de achtergrond; meld het resultaat via de Tk-thread."""
+    def work():
+        try:
+            path = db_backup()
+            root.after(0, lambda: messagebox.showinfo("Back-up", f"Back-up gemaakt:\n{path}"))
+        except (sqlite3.Error, OSError, RuntimeError) as e:
+            root.after(0, lambda msg=str(e): messagebox.showerror("Back-up", f"Back-up mislukt:\n{msg}"))
+    threading.Thread(target=work, name="dela-backup-manual", daemon=True).start()
+
+def restore_backup_dialog():
+    path = filedialog.askopenfilename(
+        title="Back-up terugzetten", initialdir=BACKUP_DIR,
+        filetypes=[("SQLite back-up", "*.db")])
+    if not path:
+        return
+    if not messagebox.askyesno("Back-up terugzetten",
+                               f"De huidige gegevens worden vervangen door:\n{os.path.basename(path)}\n\n"
+                               "Er wordt eerst een veiligheidskopie gemaakt. Doorgaan?"):
+        return
+    try:
+        safety = db_restore(path)
+    except (sqlite3.Error, OSError, RuntimeError) as e:
+        messagebox.showerror("Back-up terugzetten", f"Terugzetten mislukt:\n{e}")
+        return
+    messagebox.showinfo("Back-up terugzetten",
+                        f"Back-up teruggezet.\nVeiligheidskopie: {os.path.basename(safety)}")
+
+# --- Beheer: onderhoud ---
+def maintenance_now():
+    """ANALYZE, bijlagen opruimen en VACUUM (geforceerd) in de achtergrond, daarna het rapport tonen."""
+    def work():
+        try:
+            db_analyze()
+            db_collect_blobs()
+            db_vacuum(force=True)
+            root.after(0, lambda: (replace_window(("health_report",)), show_health_report()))
+        except (sqlite3.Error, OSError, RuntimeError) as e:
+            root.after(0, lambda msg=str(e): messagebox.showerror("Onderhoud", f"Onderhoud mislukt:\n{msg}"))
+    threading.Thread(target=work, name="dela-maintenance-manual", daemon=True).start()
+
+def archive_now():
+    """Afgesloten projecten naar het archief verhuizen (batches, in de achtergrond)."""
+    try:
+        n = archive_candidates()
+    except sqlite3.Error as e:
+        messagebox.showerror("Archiveren", f"Telling mislukt:\n{e}"); return
+    if not n:
+        messagebox.showinfo("Archiveren", "Geen afgesloten projecten om te archiveren."); return
+    if not messagebox.askyesno("Archiveren",
+                               f"{n} afgesloten project(en) (status {', '.join(ARCHIVE_STATUSES)}, "
+                               f"{ARCHIVE_MIN_AGE_DAYS} dagen niet gewijzigd) naar het archief verhuizen?\n\n"
+                               "Ze blijven vindbaar met 'Archief meezoeken'."):
+        return
+    def work():
+        try:
+            moved = archive_projects()
+            root.after(0, lambda: messagebox.showinfo("Archiveren", f"{moved} project(en) gearchiveerd."))
+        except (sqlite3.Error, OSError) as e:
+            root.after(0, lambda msg=str(e): messagebox.showerror("Archiveren", f"Archiveren mislukt:\n{msg}"))
+    threading.Thread(target=work, name="dela-archive", daemon=True).start()
+
+def show_health_report():
+    if focus_window(("health_report",)):
+        return
+    win = register_window(tk.Toplevel(root), ("health_report",))
+    win.title("Gezondheidsrapport database")
+    win.geometry("760x520")
+    txt = tk.Text(win, font=("Courier", 9), wrap="none")
+    txt.pack(fill="both", expand=True, padx=10, pady=10)
+    try:
+        txt.insert("end", "\n".join(db_health_report()))
+    except sqlite3.Error as e:
+        txt.insert("end", f"Rapport mislukt: {e}")
+    txt.config(state="disabled")
+    tk.Button(win, text="Sluiten", command=win.destroy).pack(pady=(0, 8))
+
+# --- Beheer: reactiesnelheid van de interface (Hoofdstuk 2.U) ---
+def start_lag_watchdog():
+    """Hartslag via root.after; de sample-thread van dela_core doet de rest."""
+    monitor = start_lag_monitor()
+    if not monitor:
+        return
+
+    def tick():
+        monitor.beat(LAG_TICK_MS)
+        root.after(LAG_TICK_MS, tick)
+
+    tick()
+
+def show_lag_report():
+    if focus_window(("lag_report",)):
+        return
+    monitor = lag_monitor()
+    if not monitor:
+        messagebox.showinfo("Reactiesnelheid", "De lag-watchdog staat uit (LAG_MONITOR_ENABLED).")
+        return
+    win = register_window(tk.Toplevel(root), ("lag_report",))
+    win.title("Reactiesnelheid van de interface")
+    win.geometry("820x560")
+    tk.Label(win, anchor="w", justify="left",
+             text=f"Blokkeringen van de interface vanaf {LAG_THRESHOLD_MS} ms, per handler (traagste totaal eerst). "
+                  "Selecteer een handler voor de stack van de ergste blokkering.").pack(fill="x", padx=10, pady=(10, 0))
+
+    cols = ("handler", "aantal", "totaal", "max", "gem")
+    tree = ttk.Treeview(win, columns=cols, show="headings", height=10)
+    for c, label, w, anchor in (("handler", "Handler", 360, "w"), ("aantal", "Aantal", 70, "e"),
+                                ("totaal", "Totaal (ms)", 100, "e"), ("max", "Max (ms)", 90, "e"),
+                                ("gem", "Gemiddeld (ms)", 110, "e")):
+        tree.heading(c, text=label)
+        tree.column(c, width=w, anchor=anchor)
+    tree.pack(fill="x", padx=10, pady=10)
+
+    txt = tk.Text(win, font=("Courier", 9), wrap="none", height=14)
+    txt.pack(fill="both", expand=True, padx=10)
+
+    def show_text(lines):
+        txt.config(state="normal")
+        txt.delete("1.0", "end")
+        txt.insert("end", "\n".join(lines))
+        txt.config(state="disabled")
+
+    def recent_lines():
+        lines = ["Laatste blokkeringen:"]
+        for st in monitor.recent()[:30]:
+            hot = f"{st['hotspot'][0]}:{st['hotspot'][1]}" if st["hotspot"] else "-"
+            lines.append(f"{st['tijd']}  {st['ms']:>6} ms  {st['handler']}  ({hot}, {st['samples']} samples)")
+        return lines
+
+    def load():
+        tree.delete(*tree.get_children())
+        for handler, n, total, mx, avg in monitor.report():
+            tree.insert("", "end", iid=handler, values=(handler, n, total, mx, avg))
+        show_text(recent_lines())
+
+    def on_select(_evt=None):
+        sel = tree.selection()
+        if sel:
+            show_text([f"Ergste blokkering van {sel[0]} (binnenste regel onderaan):", ""]
+                      + format_lag_stack(monitor.worst_stack(sel[0])))
+
+    def clear():
+        monitor.clear()
+        load()
+
+    tree.bind("<<TreeviewSelect>>", on_select)
+    btns = tk.Frame(win)
+    btns.pack(fill="x", padx=10, pady=10)
+    tk.Button(btns, text="Vernieuwen", command=load).pack(side="left")
+    tk.Button(btns, text="Wissen", command=clear).pack(side="left", padx=6)
+    tk.Button(btns, text="Sluiten", command=win.destroy).pack(side="right")
+    load()
+
+def show_rrn_issues():
+    if focus_window(("rrn_issues",)):
+        return
+    win = register_window(tk.Toplevel(root), ("rrn_issues",))
+    win.title("Rijksregisternummers nakijken")
+    win.geometry("720x420")
+    cols = ("naam", "waarde", "probleem")
+    tree = ttk.Treeview(win, columns=cols, show="headings")
+    for c, label, w in (("naam", "Contact", 240), ("waarde", "Opgeslagen waarde", 180), ("probleem", "Probleem", 260)):
+        tree.heading(c, text=label)
+        tree.column(c, width=w, anchor="w")
+    tree.pack(fill="both", expand=True, padx=10, pady=10)
+    try:
+        for r in rrn_open_issues():
+            tree.insert("", "end", iid=str(r["contact_id"]),
+                        values=(r["display_name"] or "", r["rijksregisternummer"] or "", r["probleem"] or ""))
+    except sqlite3.Error as e:
+        messagebox.showerror("Rijksregisternummers", f"Ophalen mislukt:\n{e}", parent=win)
+
+    def open_contact(_evt=None):
+        sel = tree.selection()
+        if not sel:
+            return
+        r = cached_record("contacts", int(sel[0]))
+        if r:
+            open_person_form(existing=r)
+
+    tree.bind("<Double-1>", open_contact)
+    tk.Button(win, text="Sluiten", command=win.destroy).pack(pady=(0, 8))
+
+def show_company_link_proposals():
+    if focus_window(("company_links",)):
+        return
+    win = register_window(tk.Toplevel(root), ("company_links",))
+    win.title("Bedrijfskoppelingen via e-maildomein")
+    win.geometry("860x480")
+    tk.Label(win, text="Selecteer de voorstellen die u wilt toepassen (Ctrl/Shift voor meerdere).",
+             anchor="w").pack(fill="x", padx=10, pady=(10, 0))
+    cols = ("persoon", "huidig", "voorstel", "domein")
+    tree = ttk.Treeview(win, columns=cols, show="headings", selectmode="extended")
+    for c, label, w in (("persoon", "Persoon", 220), ("huidig", "Huidig bedrijf", 200),
+                        ("voorstel", "Voorgesteld bedrijf", 220), ("domein", "Domein", 160)):
+        tree.heading(c, text=label)
+        tree.column(c, width=w, anchor="w")
+    tree.pack(fill="both", expand=True, padx=10, pady=10)
+    proposals = {}
+
+    def load():
+        tree.delete(*tree.get_children())
+        proposals.clear()
+        try:
+            for p in propose_company_links():
+                proposals[str(p[0])] = p
+                tree.insert("", "end", iid=str(p[0]), values=(p[1], p[2] or "—", p[3], "@" + p[4]))
+        except sqlite3.Error as e:
+            messagebox.showerror("Bedrijfskoppelingen", f"Voorstellen mislukt:\n{e}", parent=win)
+
+    def apply_selected():
+        chosen = [proposals[i] for i in tree.selection()]
+        if not chosen:
+            return
+        if not messagebox.askyesno("Bedrijfskoppelingen",
+                                   f"{len(chosen)} personen koppelen? (ongedaan te maken via Bulkwijzigingen)",
+                                   parent=win):
+            return
+        try:
+            apply_company_links(chosen, current_user)
+        except sqlite3.Error as e:
+            messagebox.showerror("Bedrijfskoppelingen", f"Koppelen mislukt:\n{e}", parent=win)
+        load()
+
+    btns = tk.Frame(win)
+    btns.pack(pady=(0, 8))
+    tk.Button(btns, text="Alles selecteren", command=lambda: tree.selection_set(tree.get_children())).pack(side="left", padx=4)
+    tk.Button(btns, text="Geselecteerde koppelen", command=apply_selected).pack(side="left", padx=4)
+    tk.Button(btns, text="Sluiten", command=win.destroy).pack(side="left", padx=4)
+    load()
+
+# --- Beheer: datakwaliteit (Hoofdstuk 2.V) ---
+DQ_EXAMPLES = 500  # voorbeelden per groep in de onderste lijst
+
+def show_data_quality():
+    if focus_window(("data_quality",)):
+        return
+    win = register_window(tk.Toplevel(root), ("data_quality",))
+    win.title("Datakwaliteit")
+    win.geometry("900x600")
+    status_var = tk.StringVar(value="Nog niet gecontroleerd.")
+    tk.Label(win, textvariable=status_var, anchor="w").pack(fill="x", padx=10, pady=(10, 0))
+
+    cols = ("tabel", "veld", "probleem", "aantal", "fix")
+    groups = ttk.Treeview(win, columns=cols, show="headings", height=9, selectmode="extended")
+    for c, label, w, anchor in (("tabel", "Tabel", 90, "w"), ("veld", "Veld", 140, "w"), ("probleem", "Probleem", 330, "w"),
+                                ("aantal", "Aantal", 80, "e"), ("fix", "Te verbeteren", 100, "e")):
+        groups.heading(c, text=label)
+        groups.column(c, width=w, anchor=anchor)
+    groups.pack(fill="x", padx=10, pady=10)
+
+    ex_cols = ("id", "waarde", "voorstel")
+    examples = ttk.Treeview(win, columns=ex_cols, show="headings")
+    for c, label, w in (("id", "Id", 70), ("waarde", "Huidige waarde", 360), ("voorstel", "Voorstel", 360)):
+        examples.heading(c, text=label)
+        examples.column(c, width=w, anchor="w")
+    examples.pack(fill="both", expand=True, padx=10)
+
+    findings = []
+    by_group = {}
+
+    def fill(result):
+        findings[:] = result
+        by_group.clear()
+        for f in findings:
+            by_group.setdefault((f[0], f[2], f[3]), []).append(f)
+        groups.delete(*groups.get_children())
+        examples.delete(*examples.get_children())
+        for tabel, veld, probleem, n, fix in dq_summary(findings):
+            groups.insert("", "end", iid=f"{tabel}|{veld}|{probleem}", values=(tabel, veld, probleem, n, fix))
+        status_var.set(f"{len(findings)} bevinding(en) in {len(by_group)} groep(en).")
+
+    def on_group(_evt=None):
+        examples.delete(*examples.get_children())
+        sel = groups.selection()
+        if len(sel) != 1:
+            return
+        rows = by_group.get(tuple(sel[0].split("|", 2)), [])
+        for j, (tabel, rid, _veld, _probleem, waarde, voorstel) in enumerate(rows[:DQ_EXAMPLES]):
+            examples.insert("", "end", iid=f"{tabel}|{rid}|{j}", values=(rid, waarde or "", voorstel or "—"))
+
+    def on_example(_evt=None):
+        sel = examples.focus()
+        if not sel:
+            return
+        tabel, rid, _ = sel.split("|")
+        if tabel == "projects":
+            show_project_detail(int(rid))
+            return
+        r = cached_record("contacts", int(rid), readonly=True)
+        if r:
+            show_contact_page(r)
+
+    def run_scan():
+        status_var.set("Bezig met controleren…")
+        scan_btn.config(state="disabled")
+
+        def progress(done, total):
+            root.after(0, lambda: status_var.set(f"Bezig met controleren… {done}/{total} rijen"))
+
+        def work():
+            try:
+                result = dq_scan(progress=progress)
+                root.after(0, lambda: fill(result))
+            except (sqlite3.Error, OSError, RuntimeError) as e:
+                root.after(0, lambda msg=str(e): messagebox.showerror("Datakwaliteit", f"Controle mislukt:\n{msg}",
+                                                                     parent=win))
+            finally:
+                root.after(0, lambda: scan_btn.winfo_exists() and scan_btn.config(state="normal"))
+
+        threading.Thread(target=work, name="dela-data-quality", daemon=True).start()
+
+    def apply_selected():
+        chosen = [f for iid in groups.selection() for f in by_group.get(tuple(iid.split("|", 2)), [])
+                  if f[5] is not None]
+        if not chosen:
+            messagebox.showinfo("Datakwaliteit", "Geen voorstellen in de geselecteerde groep(en).", parent=win)
+            return
+        if not messagebox.askyesno("Datakwaliteit",
+                                   f"{len(chosen)} voorstel(len) toepassen in één transactie?\n"
+                                   "(ongedaan te maken via Bulkwijzigingen)", parent=win):
+            return
+        try:
+            done = set(dq_apply(chosen, current_user))
+        except sqlite3.Error as e:
+            messagebox.showerror("Datakwaliteit", f"Verbeteren mislukt:\n{e}", parent=win)
+            return
+        # Enkel wat echt aangepast is verdwijnt; sinds de controle gewijzigde rijen blijven staan
+        fill([f for f in findings if (f[0], int(f[1]), f[2]) not in done])
+        skipped = len({(f[0], int(f[1]), f[2]) for f in chosen} - done)
+        messagebox.showinfo("Datakwaliteit", f"{len(done)} rij(en) verbeterd."
+                            + (f"\n{skipped} overgeslagen: gewijzigd sinds de controle." if skipped else ""),
+                            parent=win)
+
+    def export_csv():
+        path = filedialog.asksaveasfilename(parent=win, title="Bevindingen exporteren", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv")])
+        if not path:
+            return
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(DQ_REPORT_COLUMNS)
+            writer.writerows(findings)
+
+    groups.bind("<<TreeviewSelect>>", on_group)
+    examples.bind("<Double-1>", on_example)
+    btns = tk.Frame(win)
+    btns.pack(fill="x", padx=10, pady=10)
+    scan_btn = tk.Button(btns, text="Controleren", command=run_scan)
+    scan_btn.pack(side="left")
+    tk.Button(btns, text="Geselecteerde groepen verbeteren", command=apply_selected).pack(side="left", padx=6)
+    tk.Button(btns, text="Exporteren (CSV)…", command=export_csv).pack(side="left")
+    tk.Button(btns, text="Sluiten", command=win.destroy).pack(side="right")
+    run_scan()
+
+# --- Beheer: geografie ---
+def import_centroids_dialog():
+    path = filedialog.askopenfilename(
+        title="Postcodecentroïden importeren", initialdir=BASE_DIR,
+        filetypes=[("CSV", "*.csv")])
+    if not path:
+        return
+    try:
+        n = import_postcode_centroids(path)
+    except (OSError, csv.Error, sqlite3.Error) as e:
+        messagebox.showerror("Importeren", f"Importeren mislukt:\n{e}")
+        return
+    messagebox.showinfo("Importeren", f"{n} postcodes ingelezen; projecten en contacten opnieuw gegeocodeerd.")
+
+# --- Beheer: synchronisatie met een offline kopie (Hoofdstuk 2.R) ---
+SYNC_FILETYPES = [("DELA sync-pakket", "*.dsync")]
+
+def sync_copy_dialog():
+    path = filedialog.asksaveasfilename(
+        title="Offline kopie maken", initialfile="dela_database_offline.db",
+        defaultextension=".db", filetypes=[("SQLite database", "*.db")])
+    if not path:
+        return
+    try:
+        if os.path.exists(path):
+            os.remove(path)  # de dialoog heeft al om bevestiging gevraagd
+        sync_make_copy(path)
+    except (sqlite3.Error, OSError) as e:
+        messagebox.showerror("Offline kopie", f"Kopie maken mislukt:\n{e}")
+        return
+    messagebox.showinfo("Offline kopie", f"Kopie gemaakt: {os.path.basename(path)}\n\n"
+                        "Open ze op de laptop en breng achteraf een sync-pakket mee terug.")
+
+def sync_export_dialog():
+    path = filedialog.asksaveasfilename(
+        title="Wijzigingen exporteren", initialfile=f"dela_{now_str()[:10]}.dsync",
+        defaultextension=".dsync", filetypes=SYNC_FILETYPES)
+    if not path:
+        return
+    try:
+        n = sync_export(path)
+    except (sqlite3.Error, OSError) as e:
+        messagebox.showerror("Synchronisatie", f"Exporteren mislukt:\n{e}")
+        return
+    messagebox.showinfo("Synchronisatie", f"{n} gewijzigde rij(en) in {os.path.basename(path)} "
+                        f"({os.path.getsize(path) // 1024 + 1} KB).")
+
+def sync_import_dialog():
+    path = filedialog.askopenfilename(title="Wijzigingen importeren", filetypes=SYNC_FILETYPES)
+    if not path:
+        return
+    try:
+        report = sync_import(path)
+    except (sqlite3.Error, OSError, ValueError, KeyError) as e:
+        messagebox.showerror("Synchronisatie", f"Importeren mislukt:\n{e}")
+        return
+    lines = [f"Toegepast: {report['toegepast']}",
+             f"Lokaal nieuwer (overgeslagen): {report['ouder']}"]
+    if report["conflicten"]:
+        lines.append(f"Conflicten: {len(report['conflicten'])}")
+        lines += [f"  {tabel} {uid[:8]}: {reden}" for tabel, uid, reden in report["conflicten"][:10]]
+        lines.append("Ze blijven bewaard onder Beheer → Sync-conflicten.")
+    messagebox.showinfo("Synchronisatie", "\n".join(lines))
+
+def show_sync_conflicts():
+    """Rijen uit sync-pakketten die niet toegepast konden worden: opnieuw proberen of negeren."""
+    if focus_window(("sync_conflicts",)):
+        return
+    win = register_window(tk.Toplevel(root), ("sync_conflicts",))
+    win.title("Sync-conflicten")
+    win.geometry("820x400")
+    tk.Label(win, anchor="w", justify="left",
+             text="Los de oorzaak eerst op (bv. dubbel rijksregisternummer, project in het archief) "
+                  "en probeer dan opnieuw. Negeren houdt de lokale versie.").pack(fill="x", padx=10, pady=(10, 0))
+
+    cols = ("tabel", "rij", "reden", "ontvangen")
+    tree = ttk.Treeview(win, columns=cols, show="headings")
+    for c, label, w in (("tabel", "Tabel", 80), ("rij", "Rij", 260), ("reden", "Reden", 300),
+                        ("ontvangen", "Ontvangen", 140)):
+        tree.heading(c, text=label)
+        tree.column(c, width=w, anchor="w")
+    tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+    def describe(tabel, op, rij):
+        if op == "delete" or not rij:
+            return "(verwijderd)"
+        if tabel == "projects":
+            return f"{rij.get('projectnummer') or ''} {rij.get('projectnaam') or ''}".strip()
+        naam = f"{rij.get('voornaam') or ''} {rij.get('achternaam') or ''}".strip()
+        return naam or rij.get("bedrijf") or ""
+
+    def load():
+        tree.delete(*tree.get_children())
+        for tabel, uid, op, _stamp, rij, reden, ontvangen in sync_conflicts():
+            tree.insert("", "end", iid=f"{tabel}|{uid}", values=(tabel, describe(tabel, op, rij), reden, ontvangen))
+
+    def retry():
+        try:
+            report = sync_retry_conflicts()
+        except sqlite3.Error as e:
+            messagebox.showerror("Sync-conflicten", f"Opnieuw proberen mislukt:\n{e}", parent=win)
+            return
+        load()
+        messagebox.showinfo("Sync-conflicten", f"Toegepast: {report['toegepast']}\n"
+                            f"Nog open: {len(report['conflicten'])}", parent=win)
+
+    def discard():
+        sel = tree.selection()
+        if not sel or not messagebox.askyesno("Sync-conflicten", f"{len(sel)} conflict(en) negeren? "
+                                              "De lokale versie blijft behouden.", parent=win):
+            return
+        for iid in sel:
+            sync_discard_conflict(*iid.split("|", 1))
+        load()
+
+    btns = tk.Frame(win)
+    btns.pack(pady=(0, 8))
+    tk.Button(btns, text="Opnieuw proberen", command=retry).pack(side="left", padx=4)
+    tk.Button(btns, text="Geselecteerde negeren", command=discard).pack(side="left", padx=4)
+    tk.Button(btns, text="Sluiten", command=win.destroy).pack(side="left", padx=4)
+    load()
+
+# --- Dashboard ---
+DASHBOARD_SECTIONS = [
+    ("projecten_bureau", "Projecten per bureau"),
+    ("projecten_status", "Projecten per status"),
+    ("projecten_jaar", "Projecten per jaar"),
+    ("nieuwe_bedrijven", "Nieuwe bedrijven per maand"),
+    ("nieuwe_personen", "Nieuwe personen per maand"),
+    ("wijzigingen", "Wijzigingen per collega"),
+]
+
+def show_dashboard():
+    if focus_window(("dashboard",)):
+        return
+    win = register_window(tk.Toplevel(root), ("dashboard",))
+    win.title("Dashboard")
+    win.geometry("900x620")
+    grid = tk.Frame(win)
+    grid.pack(fill="both", expand=True, padx=10, pady=10)
+    trees = {}
+    for i, (key, title) in enumerate(DASHBOARD_SECTIONS):
+        box = tk.LabelFrame(grid, text=title)
+        box.grid(row=i // 3, column=i % 3, sticky="nsew", padx=4, pady=4)
+        grid.grid_columnconfigure(i % 3, weight=1)
+        grid.grid_rowconfigure(i // 3, weight=1)
+        tree = ttk.Treeview(box, columns=("aantal", "balk"), show="tree headings", height=10)
+        tree.heading("#0", text="")
+        tree.heading("aantal", text="Aantal")
+        tree.heading("balk", text="")
+        tree.column("#0", width=110)
+        tree.column("aantal", width=55, anchor="e")
+        tree.column("balk", width=100)
+        tree.pack(fill="both", expand=True)
+        trees[key] = tree
+
+    def load():
+        try:
+            data = dashboard_data()
+        except sqlite3.OperationalError as e:
+            messagebox.showerror("Dashboard", f"Statistieken niet beschikbaar:\n{e}", parent=win)
+            return
+        for key, tree in trees.items():
+            tree.delete(*tree.get_children())
+            rows = data.get(key, [])
+            top = max((n for _, n in rows), default=0) or 1
+            for bucket, n in rows:
+                tree.insert("", "end", text=bucket or "(leeg)", values=(n, "█" * max(1, round(12 * n / top))))
+
+    def rebuild():
+        try:
+            rebuild_statistics()
+        except sqlite3.Error as e:
+            messagebox.showerror("Dashboard", f"Herberekenen mislukt:\n{e}", parent=win)
+            return
+        load()
+
+    btns = tk.Frame(win)
+    btns.pack(fill="x", padx=10, pady=(0, 10))
+    tk.Button(btns, text="Vernieuwen", command=load).pack(side="left")
+    tk.Button(btns, text="Herberekenen", command=rebuild).pack(side="left", padx=6)
+    tk.Button(btns, text="Sluiten", command=win.destroy).pack(side="right")
+    load()
+
 # --- Main ---
 def main():
+    setup_logging()
+    db_init()
+    db_migrate()
     init_colleagues()
+    start_backup_scheduler()
+    start_maintenance_scheduler()
+    start_snapshot_refresher()
+    start_lag_watchdog()
     show_start_screen()
     root.mainloop()
+    stop_thumbnail_pool()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,291 @@
+"""
+DELA database – command line, zonder GUI.
+
+Gebruikt enkel dela_core (geen tkinter, geen PIL), dus bruikbaar in scripts,
+geplande taken en op een server zonder scherm. Voorbeelden:
+
+    python dela_cli.py contacts "@aannemer.be" --format csv
+    python dela_cli.py projects Gent --status lopend --format json
+    python dela_cli.py search "peeters gent"
+    python dela_cli.py export contacts -o contacten.csv
+    python dela_cli.py import projects nieuwe_projecten.csv --user Felix
+    python dela_cli.py next-number Vector --reserve
+    python dela_cli.py backup
+    python dela_cli.py maintenance --vacuum
+    python dela_cli.py archive --dry-run
+    python dela_cli.py dq --progress > bevindingen.csv
+    python dela_cli.py sync-copy laptop.db
+    python dela_cli.py --db laptop.db sync-export werf.dsync
+    python dela_cli.py sync-import werf.dsync
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+import dela_core as core
+
+CONTACT_SEARCH_COLUMNS = ["id", "type", "display_name", "bedrijf", "email", "gsm_cc", "gsm_num",
+                          "tel_cc", "tel_num", "postcode", "stad", "laatst_gewijzigd_op"]
+PROJECT_SEARCH_COLUMNS = ["id", "bureau", "projectnummer", "gekoppeld_nummer", "klant", "projectnaam",
+                          "adres", "postcode", "stad", "status", "laatst_gewijzigd_op"]
+SEARCH_COLUMNS = ["tabel", "id", "titel", "detail"]
+
+
+# ------------------ Uitvoer (streamend) ------------------
+
+def write_rows(rows, columns, fmt, out):
+    """Schrijf rijen weg zodra ze uit de cursor komen; geeft het aantal terug."""
+    n = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            n += 1
+        return n
+    # JSON-array, element per element (geen volledige lijst in het geheugen)
+    out.write("[")
+    for row in rows:
+        out.write(",\n " if n else "\n ")
+        out.write(json.dumps(row, ensure_ascii=False))
+        n += 1
+    out.write("\n]\n" if n else "]\n")
+    return n
+
+def _open_out(path):
+    return open(path, "w", encoding="utf-8", newline="") if path and path != "-" else sys.stdout
+
+
+# ------------------ Commando's ------------------
+
+def cmd_contacts(args):
+    where, params = core.contact_search_where(args.term)
+    if args.type:
+        where.append("type = ?")
+        params.append(args.type)
+    rows = core.iter_rows("contacts", where, params, CONTACT_SEARCH_COLUMNS, args.limit)
+    n = write_rows(rows, CONTACT_SEARCH_COLUMNS, args.format, sys.stdout)
+    _did_you_mean(n, args.term, "contacts")
+
+def cmd_projects(args):
+    where, params = core.project_search_where(args.term)
+    for col in ("status", "bureau"):
+        value = getattr(args, col)
+        if value:
+            where.append(f"{col} = ?")
+            params.append(value)
+    rows = core.iter_rows("projects", where, params, PROJECT_SEARCH_COLUMNS, args.limit, archive=args.archive)
+    n = write_rows(rows, PROJECT_SEARCH_COLUMNS, args.format, sys.stdout)
+    _did_you_mean(n, args.term, "projects")
+
+def _did_you_mean(n, term, tabel):
+    """Bij weinig treffers: spellingsvoorstellen op stderr (stdout blijft zuiver CSV/JSON)."""
+    if n < core.FUZZY_FEW_HITS and term:
+        suggestions = core.fuzzy_suggest(term, tabel, readonly=True)
+        if suggestions:
+            print("Bedoelde je: " + ", ".join(t for t, _ in suggestions), file=sys.stderr)
+
+def cmd_search(args):
+    rows = (dict(zip(SEARCH_COLUMNS, r)) for r in core.omni_search(args.term, limit=args.limit, readonly=True))
+    write_rows(rows, SEARCH_COLUMNS, args.format, sys.stdout)
+
+def cmd_export(args):
+    columns = core.EXPORT_COLUMNS[args.table]
+    out = _open_out(args.output)
+    try:
+        n = write_rows(core.iter_rows(args.table, archive=args.archive), columns, args.format, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{n} rijen geëxporteerd", file=sys.stderr)
+
+def cmd_import(args):
+    with open(args.file, "r", encoding="utf-8-sig", newline="") as f:
+        if args.file.lower().endswith(".json"):
+            rows = json.load(f)
+        else:
+            rows = csv.DictReader(f, delimiter=args.delimiter)
+        n = core.import_rows(args.table, rows, args.user)
+    print(f"{n} rijen geïmporteerd in {args.table}", file=sys.stderr)
+
+def cmd_next_number(args):
+    if args.reserve:
+        print(core.reserve_project_number(args.bureau, args.user))
+    else:
+        print(core.next_project_number(args.bureau))
+
+def cmd_backup(args):
+    print(core.db_backup(args.dir) if args.dir else core.db_backup())
+
+def cmd_maintenance(args):
+    core.db_analyze()
+    core.db_collect_blobs()
+    if args.vacuum:
+        core.db_vacuum(force=True)
+    print("\n".join(core.db_health_report()))
+
+def cmd_archive(args):
+    if args.restore:
+        print(f"{core.restore_projects(args.restore)} projecten teruggezet", file=sys.stderr)
+    elif args.dry_run:
+        print(core.archive_candidates(min_age_days=args.min_age))
+    else:
+        n = core.archive_projects(min_age_days=args.min_age)
+        print(f"{n} projecten gearchiveerd in {core.ARCHIVE_PATH}", file=sys.stderr)
+
+def cmd_sync_copy(args):
+    print(f"kopie {args.dest} met toestel-id {core.sync_make_copy(args.dest)}", file=sys.stderr)
+
+def cmd_sync_export(args):
+    n = core.sync_export(args.file, peer=args.peer)
+    print(f"{n} gewijzigde rijen naar {args.file}", file=sys.stderr)
+
+def cmd_sync_import(args):
+    report = core.sync_import(args.file)
+    print(f"toegepast {report['toegepast']}, lokaal nieuwer {report['ouder']}, "
+          f"conflicten {len(report['conflicten'])}", file=sys.stderr)
+    for tabel, uid, reden in report["conflicten"]:
+        print(f"{tabel}\t{uid}\t{reden}")
+
+def cmd_sync_conflicts(args):
+    if args.discard:
+        core.sync_discard_conflict(*args.discard)
+    if args.retry:
+        report = core.sync_retry_conflicts()
+        print(f"toegepast {report['toegepast']}, nog open {len(report['conflicten'])}", file=sys.stderr)
+    for tabel, uid, op, stamp, _rij, reden, ontvangen in core.sync_conflicts():
+        print(f"{tabel}\t{uid}\t{op}\t{stamp}\t{reden}\t{ontvangen}")
+
+def cmd_sync_status(args):
+    device, vector, peers = core.sync_status()
+    print(json.dumps({"device": device, "vector": vector, "peers": peers}, indent=1))
+
+def cmd_dq(args):
+    progress = (lambda done, total: print(f"\r{done}/{total} rijen", end="", file=sys.stderr)) if args.progress else None
+    findings = core.dq_scan(tables=args.tables or ("contacts", "projects"), workers=args.workers, progress=progress)
+    if args.progress:
+        print(file=sys.stderr)
+    for tabel, veld, probleem, n, fix in core.dq_summary(findings):
+        print(f"{tabel}.{veld}\t{probleem}\t{n} ({fix} te verbeteren)", file=sys.stderr)
+    if args.fix:
+        print(f"{len(core.dq_apply(findings, args.user))} rijen verbeterd (ongedaan te maken via bulkwijzigingen)",
+              file=sys.stderr)
+    else:
+        rows = (dict(zip(core.DQ_REPORT_COLUMNS, f)) for f in findings)
+        write_rows(rows, core.DQ_REPORT_COLUMNS, args.format, sys.stdout)
+
+def cmd_health(args):
+    print("\n".join(core.db_health_report()))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="dela_cli", description="DELA database zonder GUI")
+    parser.add_argument("--db", help="pad naar de database (standaard dela_database.db naast dit script)")
+    parser.add_argument("--user", help="naam voor laatst_gewijzigd_door (standaard: 'cli')", default="cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("contacts", help="contacten zoeken (naam, bedrijf, e-mail, '@domein' of rijksregisternummer)")
+    p.add_argument("term", nargs="?", default="")
+    p.add_argument("--type", choices=["persoon", "bedrijf"])
+    p.add_argument("--limit", type=int, default=100)
+    p.add_argument("--format", choices=["json", "csv"], default="json")
+    p.set_defaults(func=cmd_contacts)
+
+    p = sub.add_parser("projects", help="projecten zoeken (nummer, klant, naam, adres)")
+    p.add_argument("term", nargs="?", default="")
+    p.add_argument("--status")
+    p.add_argument("--bureau", choices=["Delafontaine", "Vector"])
+    p.add_argument("--archive", action="store_true", help="ook gearchiveerde projecten")
+    p.add_argument("--limit", type=int, default=100)
+    p.add_argument("--format", choices=["json", "csv"], default="json")
+    p.set_defaults(func=cmd_projects)
+
+    p = sub.add_parser("search", help="projecten en contacten tegelijk zoeken (zoals het zoekvak in het hoofdmenu)")
+    p.add_argument("term")
+    p.add_argument("--limit", type=int, default=core.OMNI_LIMIT)
+    p.add_argument("--format", choices=["json", "csv"], default="json")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("export", help="volledige tabel exporteren")
+    p.add_argument("table", choices=sorted(core.EXPORT_COLUMNS))
+    p.add_argument("--format", choices=["json", "csv"], default="csv")
+    p.add_argument("-o", "--output", help="bestand (standaard: stdout)")
+    p.add_argument("--archive", action="store_true", help="projecten: ook het archief")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import", help="rijen toevoegen uit CSV (of JSON-lijst)")
+    p.add_argument("table", choices=sorted(core.EXPORT_COLUMNS))
+    p.add_argument("file")
+    p.add_argument("--delimiter", default=",")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("next-number", help="volgend projectnummer tonen of reserveren")
+    p.add_argument("bureau", choices=["Delafontaine", "Vector"])
+    p.add_argument("--reserve", action="store_true", help="meteen vastleggen met een lege projectrij")
+    p.set_defaults(func=cmd_next_number)
+
+    p = sub.add_parser("backup", help="online back-up maken (met rotatie)")
+    p.add_argument("--dir", help=f"doelmap (standaard {core.BACKUP_DIR})")
+    p.set_defaults(func=cmd_backup)
+
+    p = sub.add_parser("maintenance", help="ANALYZE, bijlagen opruimen (en eventueel VACUUM) + gezondheidsrapport")
+    p.add_argument("--vacuum", action="store_true")
+    p.set_defaults(func=cmd_maintenance)
+
+    p = sub.add_parser("archive", help="afgesloten projecten naar het archief verhuizen")
+    p.add_argument("--min-age", type=int, help=f"dagen sinds laatste wijziging (standaard {core.ARCHIVE_MIN_AGE_DAYS})")
+    p.add_argument("--dry-run", action="store_true", help="enkel het aantal kandidaten tonen")
+    p.add_argument("--restore", type=int, nargs="+", metavar="ID", help="deze projecten terugzetten")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("sync-copy", help="offline kopie maken (eigen toestel-id)")
+    p.add_argument("dest")
+    p.set_defaults(func=cmd_sync_copy)
+
+    p = sub.add_parser("sync-export", help="wijzigingen die het andere toestel nog niet heeft wegschrijven")
+    p.add_argument("file")
+    p.add_argument("--peer", help="toestel-id van de ontvanger (standaard: het enige gekende)")
+    p.set_defaults(func=cmd_sync_export)
+
+    p = sub.add_parser("sync-import", help="sync-pakket van een ander toestel toepassen")
+    p.add_argument("file")
+    p.set_defaults(func=cmd_sync_import)
+
+    p = sub.add_parser("sync-conflicts", help="bewaarde sync-conflicten tonen, opnieuw proberen of negeren")
+    p.add_argument("--retry", action="store_true", help="alle conflicten opnieuw proberen")
+    p.add_argument("--discard", nargs=2, metavar=("TABEL", "UID"), help="dit conflict negeren (lokale versie blijft)")
+    p.set_defaults(func=cmd_sync_conflicts)
+
+    p = sub.add_parser("sync-status", help="toestel-id en gekende volgnummers tonen")
+    p.set_defaults(func=cmd_sync_status)
+
+    p = sub.add_parser("dq", help="datakwaliteit controleren (e-mail, telefoon, postcode, rijksregisternummer, dubbels)")
+    p.add_argument("--tables", nargs="+", choices=["contacts", "projects"])
+    p.add_argument("--workers", type=int, help=f"werkprocessen (standaard {core.DQ_WORKERS})")
+    p.add_argument("--fix", action="store_true", help="alle voorstellen meteen toepassen (één transactie)")
+    p.add_argument("--progress", action="store_true")
+    p.add_argument("--format", choices=["json", "csv"], default="csv")
+    p.set_defaults(func=cmd_dq)
+
+    p = sub.add_parser("health", help="gezondheidsrapport tonen")
+    p.set_defaults(func=cmd_health)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        core.DB_PATH = args.db
+    core.current_user = args.user
+    try:
+        core.db_init()
+        core.db_migrate()
+        args.func(args)
+    except (core.sqlite3.Error, OSError, ValueError, RuntimeError) as e:
+        print(f"Fout: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
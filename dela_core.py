@@ -0,0 +1,3839 @@
+"""
+DELA database – kern zonder GUI.
+
+Configuratie, SQLite-helpers, migraties, back-ups, onderhoud en de
+zoek-/indexfuncties. Importeert geen tkinter of PIL, zodat zowel de
+Tkinter-applicatie (DELA_DATABASE.py) als de command line (dela_cli.py)
+deze module gebruiken.
+"""
+
+# ------------------ Hoofdstuk 1: Imports & Basisvariabelen ------------------
+import os
+import csv
+import sqlite3
+import json
+import logging
+from logging.handlers import RotatingFileHandler
+from datetime import datetime
+
+# Basismap
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Logboek voor achtergrondtaken en diagnostiek. De GUI draait vaak zonder
+# console (pythonw), dus setup_logging schrijft naar een bestand; het
+# gezondheidsrapport toont de laatste regels.
+LOG_PATH = os.path.join(BASE_DIR, "dela.log")
+LOG_MAX_BYTES = 1024 * 1024
+logger = logging.getLogger("dela")
+_logged_once = set()
+
+def setup_logging():
+    """Schrijf het logboek (roterend) naar LOG_PATH; eenmalig bij het opstarten van de GUI."""
+    if any(isinstance(h, RotatingFileHandler) for h in logger.handlers):
+        return
+    try:
+        handler = RotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=2, encoding="utf-8")
+    except OSError:
+        return  # bv. alleen-lezen map: dan enkel de standaardafhandeling (stderr)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s", "%Y-%m-%d %H:%M:%S"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+def log_once(key, msg, *args):
+    """Waarschuwing die per sessie maar één keer gelogd wordt (bv. per toetsaanslag herhaald)."""
+    if key not in _logged_once:
+        _logged_once.add(key)
+        logger.warning(msg, *args)
+
+def recent_log_lines(n=20):
+    """De laatste n regels uit LOG_PATH (leeg als er geen logboek is)."""
+    try:
+        with open(LOG_PATH, encoding="utf-8", errors="replace") as f:
+            return [line.rstrip("\n") for line in f.readlines()[-n:]]
+    except OSError:
+        return []
+
+# CSV bestanden (voor fallback of eerste inlees)
+CONTACTS_CSV = os.path.join(BASE_DIR, "contacts.csv")
+PROJECTS_CSV = os.path.join(BASE_DIR, "projects.csv")
+FLEMISH_CITIES_CSV = os.path.join(BASE_DIR, "flemish_cities.csv")
+
+# Huidige gebruiker (wordt ingesteld na login, of via --user op de command line)
+current_user = None
+
+def now_str():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+# Aanhef-keuzes
+SALUTATIONS = ["Dhr.", "Mevr.", "Familie", "Firma"]
+
+# ------------------ Hoofdstuk 2: Bestands- en Database Config ------------------
+
+# Pad naar SQLite database (wordt aangemaakt indien niet aanwezig)
+DB_PATH = os.path.join(BASE_DIR, "dela_database.db")
+
+# Headerdefinities bestaan enkel nog ter referentie,
+# want SQLite gebruikt geen CSV headers. Deze blijven handig
+# als standaard veldenlijst bij inserts/updates.
+CONTACT_HEADERS = [
+    "type", "bedrijf", "rechtsvorm", "aanhef", "voornaam", "achternaam",
+    "gsm_cc", "gsm_num", "tel_cc", "tel_num", "email", "functie",
+    "rijksregisternummer", "straat", "huisnummer", "postcode", "stad",
+    "land", "laatst_gewijzigd_door", "laatst_gewijzigd_op"
+]
+
+PROJECT_HEADERS = [
+    "bureau", "projectnummer", "gekoppeld_nummer", "klant",
+    "projectnaam", "adres", "postcode", "stad", "groep", "type_project", "status",
+    "laatst_gewijzigd_door", "laatst_gewijzigd_op"
+]
+
+# standaard collega's 
+DEFAULT_USERS = [
+    "Felix",
+    "Kris",
+    "Michael",
+    "Pascal",
+    "Heidi V.",
+    "Heidi D.",
+    "Marie-Roos",
+    "Jelle",
+    "Quinten",
+    "Rik"
+]
+
+# ------------------ Hoofdstuk 2.B: SQLite Database helpers ------------------
+# Dit stuk vervangt de CSV-opslag door SQLite.
+# Het definieert connectie, initialisatie en hulpfuncties om queries uit te voeren.
+
+from pathlib import Path
+
+def readonly_uri(path):
+    """
+    SQLite-URI om `path` alleen-lezen te openen. Via Path.as_uri, zodat
+    '#', '?' of '%' in een map- of bestandsnaam correct ge-escaped worden
+    (anders knipt SQLite het pad daar af en maakt het een leeg bestand aan).
+    """
+    return Path(path).resolve().as_uri() + "?mode=ro"
+
+def db_connect(readonly=False, archive=False):
+    """
+    Open een SQLite connectie (autocommit uit, moet afgesloten worden).
+    readonly=True → URI mode=ro, eventueel op de lokale momentopname (Hoofdstuk 2.K).
+    archive=True → archiefbestand gekoppeld als schema 'archief' (Hoofdstuk 2.Q).
+    """
+    if readonly:
+        conn = sqlite3.connect(readonly_uri(readonly_db_path()), uri=True)
+    else:
+        conn = sqlite3.connect(DB_PATH)
+    if archive:
+        attach_archive(conn, readonly=readonly)
+    return conn
+
+def db_init():
+    """Maak tabellen aan indien ze nog niet bestaan en voeg default users toe."""
+    conn = db_connect()
+    cur = conn.cursor()
+
+    # Tabel voor contacten
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS contacts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        type TEXT,               -- 'persoon' of 'bedrijf'
+        bedrijf TEXT,
+        rechtsvorm TEXT,
+        aanhef TEXT,
+        voornaam TEXT,
+        achternaam TEXT,
+        gsm_cc TEXT,
+        gsm_num TEXT,
+        tel_cc TEXT,
+        tel_num TEXT,
+        email TEXT,
+        functie TEXT,
+        rijksregisternummer TEXT,
+        straat TEXT,
+        huisnummer TEXT,
+        postcode TEXT,
+        stad TEXT,
+        land TEXT,
+        laatst_gewijzigd_door TEXT,
+        laatst_gewijzigd_op TEXT
+    );
+    """)
+
+    # Tabel voor projecten
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS projects (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bureau TEXT,
+        projectnummer TEXT,
+        gekoppeld_nummer TEXT,
+        klant TEXT,
+        projectnaam TEXT,
+        adres TEXT,
+        type_project TEXT,
+        status TEXT,
+        laatst_gewijzigd_door TEXT,
+        laatst_gewijzigd_op TEXT
+    );
+    """)
+
+    # Tabel voor users (collega’s)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        naam TEXT UNIQUE
+    );
+    """)
+
+    # ✅ Voeg de standaard collega’s toe als ze nog niet bestaan
+    for user in DEFAULT_USERS:
+        cur.execute("INSERT OR IGNORE INTO users (naam) VALUES (?)", (user,))
+
+    conn.commit()
+    db_close(conn)
+
+def db_query(query, params=(), fetchone=False, fetchall=False, commit=False, readonly=False, archive=False,
+             record=None):
+    """
+    Algemene hulpfunctie om queries uit te voeren.
+    - fetchone=True → geeft 1 rij terug
+    - fetchall=True → geeft lijst van rijen terug
+    - commit=True → voert commit uit (INSERT/UPDATE/DELETE)
+    - readonly=True → alleen-lezen connectie (raadplegen, neemt nooit schrijflocks)
+    - archive=True → archief.projects is beschikbaar in de query (zie project_union)
+    - record=namedtuple-klasse → rijen als lichte tuples (zie record_type) i.p.v. sqlite3.Row
+    """
+    conn = db_connect(readonly=readonly, archive=archive)
+    # sqlite3.Row maakt dict-achtige toegang mogelijk; zonder row_factory levert
+    # sqlite gewone tuples die record._make zonder omweg overneemt
+    conn.row_factory = None if record else sqlite3.Row
+    cur = conn.cursor()
+    cur.execute(query, params)
+
+    result = None
+    if fetchone:
+        result = cur.fetchone()
+        if record and result is not None:
+            result = record._make(result)
+    elif fetchall:
+        result = cur.fetchall()
+        if record:
+            result = list(map(record._make, result))
+
+    if commit:
+        conn.commit()
+
+    if readonly:
+        conn.close()  # geen PRAGMA optimize: dat zou willen schrijven
+    else:
+        db_close(conn)
+    return result
+
+def db_close(conn):
+    """
+    Sluit een connectie af. Heeft ze geschreven, dan eerst PRAGMA optimize
+    (houdt statistieken bij); leesconnecties sluiten meteen, zodat een
+    zoekopdracht per toetsaanslag daar niets voor betaalt.
+    """
+    if conn.total_changes:
+        # eigen schrijfactie: recordcache en contactindex eerst opnieuw controleren (Hoofdstuk 2.W, 2.L)
+        record_cache_touch()
+        contact_index_touch()
+        try:
+            conn.execute("PRAGMA analysis_limit=400")
+            conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass  # bv. vergrendeld: optimaliseren is nooit verplicht
+    conn.close()
+
+def db_insert(table, data: dict):
+    """Insert een dict in de gegeven tabel en geef het nieuwe id terug."""
+    keys = ", ".join(data.keys())
+    placeholders = ", ".join(["?"] * len(data))
+    values = list(data.values())
+    query = f"INSERT INTO {table} ({keys}) VALUES ({placeholders})"
+    conn = db_connect()
+    try:
+        cur = conn.execute(query, values)
+        conn.commit()
+        return cur.lastrowid
+    finally:
+        db_close(conn)
+
+def db_update(table, data: dict, where_clause: str, where_params=()):
+    """Update records in een tabel met dict data + WHERE clause."""
+    sets = ", ".join([f"{k}=?" for k in data.keys()])
+    values = list(data.values()) + list(where_params)
+    query = f"UPDATE {table} SET {sets} WHERE {where_clause}"
+    db_query(query, values, commit=True)
+
+def db_update_by_id(table, row_id, data: dict):
+    """Update precies één rij via de primaire sleutel (één index-seek)."""
+    data = {k: v for k, v in data.items() if k != "id"}
+    db_update(table, data, "id=?", (int(row_id),))
+
+def db_upsert(table, data: dict, key=("id",)):
+    """
+    INSERT ... ON CONFLICT(key) DO UPDATE voor aanmaken-of-bijwerken.
+    Zonder (of met lege) id wordt gewoon een nieuwe rij aangemaakt.
+    Geeft het id van de geschreven rij terug.
+    """
+    data = {k: v for k, v in data.items() if not (k == "id" and not v)}
+    cols = list(data.keys())
+    keys = ", ".join(cols)
+    placeholders = ", ".join(["?"] * len(cols))
+    updates = ", ".join(f"{c}=excluded.{c}" for c in cols if c not in key)
+    query = (f"INSERT INTO {table} ({keys}) VALUES ({placeholders}) "
+             f"ON CONFLICT({', '.join(key)}) DO UPDATE SET {updates} RETURNING id")
+    row = db_query(query, list(data.values()), fetchone=True, commit=True)
+    return row["id"] if row else None
+
+# ------------------ Hoofdstuk 2.C: Schema-migraties & indexen ------------------
+# Elke migratie heeft een volgnummer; het hoogste toegepaste nummer staat in
+# PRAGMA user_version. Nieuwe migraties worden enkel achteraan toegevoegd.
+
+# Weergavenaam en sorteersleutel van een contact, als SQL op rij-alias {t}.
+# Personen sorteren op achternaam, voornaam; bedrijven op bedrijfsnaam.
+CONTACT_DISPLAY_NAME_SQL = (
+    "CASE WHEN {t}.type='persoon' "
+    "THEN TRIM(IFNULL({t}.voornaam,'') || ' ' || IFNULL({t}.achternaam,'')) "
+    "ELSE IFNULL({t}.bedrijf,'') END"
+)
+CONTACT_SORT_KEY_SQL = (
+    "LOWER(CASE WHEN {t}.type='persoon' "
+    "THEN TRIM(IFNULL({t}.achternaam,'') || ' ' || IFNULL({t}.voornaam,'')) "
+    "ELSE IFNULL({t}.bedrijf,'') END)"
+)
+
+# Facetten van projecten: (kolom, expressie). Niet wijzigen na migratie 7;
+# een extra facet krijgt een eigen migratie.
+PROJECT_FACET_EXPRESSIONS = [
+    ("status", "IFNULL({t}status,'')"),
+    ("bureau", "IFNULL({t}bureau,'')"),
+    ("type_project", "IFNULL({t}type_project,'')"),
+    ("jaar", "IFNULL({t}jaar,'')"),
+]
+
+def _facet_trigger_steps():
+    """Triggers die project_facets (aantal per facetwaarde) incrementeel bijhouden."""
+    inc = ("INSERT INTO project_facets (facet, waarde, aantal) VALUES ('{f}', {e}, 1) "
+           "ON CONFLICT(facet, waarde) DO UPDATE SET aantal = aantal + 1;")
+    dec = "UPDATE project_facets SET aantal = aantal - 1 WHERE facet='{f}' AND waarde={e};"
+    new = [inc.format(f=f, e=e.format(t="NEW.")) for f, e in PROJECT_FACET_EXPRESSIONS]
+    old = [dec.format(f=f, e=e.format(t="OLD.")) for f, e in PROJECT_FACET_EXPRESSIONS]
+    steps = [
+        "CREATE TRIGGER IF NOT EXISTS trg_projects_facets_ins AFTER INSERT ON projects BEGIN "
+        + " ".join(new) + " END",
+        "CREATE TRIGGER IF NOT EXISTS trg_projects_facets_del AFTER DELETE ON projects BEGIN "
+        + " ".join(old) + " DELETE FROM project_facets WHERE aantal <= 0; END",
+    ]
+    for f, e in PROJECT_FACET_EXPRESSIONS:
+        steps.append(
+            f"CREATE TRIGGER IF NOT EXISTS trg_projects_facets_upd_{f} AFTER UPDATE OF {f} ON projects "
+            f"WHEN {e.format(t='OLD.')} IS NOT {e.format(t='NEW.')} BEGIN "
+            + dec.format(f=f, e=e.format(t="OLD.")) + " "
+            + inc.format(f=f, e=e.format(t="NEW.")) + " "
+            + "DELETE FROM project_facets WHERE aantal <= 0; END")
+    return steps
+
+def _generation_trigger_steps(tabel):
+    """Triggers die data_generation ophogen bij elke wijziging in `tabel`."""
+    bump = f"UPDATE data_generation SET gen = gen + 1 WHERE tabel='{tabel}';"
+    return [f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_gen_{op.lower()} AFTER {op} ON {tabel} BEGIN {bump} END"
+            for op in ("INSERT", "UPDATE", "DELETE")] + [
+        f"INSERT OR IGNORE INTO data_generation (tabel, gen) VALUES ('{tabel}', 0)"]
+
+def _row_change_trigger_steps(tabel, changes):
+    """
+    Zoals _generation_trigger_steps, maar onthoudt ook per rij bij welke
+    generatie ze laatst wijzigde (tabel `changes`: id -> gen).
+    """
+    bump = f"UPDATE data_generation SET gen = gen + 1 WHERE tabel='{tabel}';"
+    mark = (f"INSERT INTO {changes} (id, gen) SELECT {{r}}.id, gen FROM data_generation WHERE tabel='{tabel}' "
+            f"ON CONFLICT(id) DO UPDATE SET gen = excluded.gen;")
+    return [f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_gen_{op.lower()} AFTER {op} ON {tabel} BEGIN "
+            f"{bump} {mark.format(r=r)} END"
+            for op, r in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD"))] + [
+        f"INSERT OR IGNORE INTO data_generation (tabel, gen) VALUES ('{tabel}', 0)"]
+
+# Statistieken (Hoofdstuk 2.I): reeks -> (bron-tabel, SQL voor de bucket op rij-alias {t})
+STATS_SERIES_SQL = {
+    "nieuwe_bedrijven": "SUBSTR(IFNULL({t}.laatst_gewijzigd_op,''), 1, 7)",
+    "nieuwe_personen": "SUBSTR(IFNULL({t}.laatst_gewijzigd_op,''), 1, 7)",
+    "wijzigingen": "IFNULL({t}.laatst_gewijzigd_door,'')",
+}
+
+def _stats_trigger_steps():
+    """Triggers die stats_buckets bijhouden; historische reeksen dalen nooit."""
+    inc = ("INSERT INTO stats_buckets (reeks, bucket, aantal) VALUES ('{r}', {b}, 1) "
+           "ON CONFLICT(reeks, bucket) DO UPDATE SET aantal = aantal + 1;")
+    month = STATS_SERIES_SQL["nieuwe_bedrijven"].format(t="NEW")
+    who = STATS_SERIES_SQL["wijzigingen"].format(t="NEW")
+    steps = [
+        "CREATE TRIGGER IF NOT EXISTS trg_contacts_stats_ins AFTER INSERT ON contacts BEGIN "
+        + "INSERT INTO stats_buckets (reeks, bucket, aantal) "
+          f"SELECT CASE WHEN NEW.type='persoon' THEN 'nieuwe_personen' ELSE 'nieuwe_bedrijven' END, {month}, 1 "
+          "WHERE true ON CONFLICT(reeks, bucket) DO UPDATE SET aantal = aantal + 1; "
+        + inc.format(r="wijzigingen", b=who) + " END",
+    ]
+    # Enkel echte bewerkingen zetten laatst_gewijzigd_op; afgeleide kolommen tellen niet mee
+    steps.append("CREATE TRIGGER IF NOT EXISTS trg_contacts_stats_upd AFTER UPDATE OF laatst_gewijzigd_op ON contacts "
+                 "BEGIN " + inc.format(r="wijzigingen", b=who) + " END")
+    for op in ("INSERT", "UPDATE OF laatst_gewijzigd_op"):
+        name = "ins" if op == "INSERT" else "upd"
+        steps.append(f"CREATE TRIGGER IF NOT EXISTS trg_projects_stats_{name} AFTER {op} ON projects "
+                     "BEGIN " + inc.format(r="wijzigingen", b=who) + " END")
+    return steps
+
+# Geografie (Hoofdstuk 2.J): postcode van een rij → centroïde, met de stad als
+# terugval. Wordt zowel door de triggers als door geo_rebuild gebruikt.
+GEO_POSTCODE_SQL = (
+    "IFNULL(NULLIF(TRIM(IFNULL({t}.postcode,'')), ''), "
+    "(SELECT c2.postcode FROM postcode_centroids c2 WHERE c2.gemeente = TRIM(IFNULL({t}.stad,'')) COLLATE NOCASE LIMIT 1))"
+)
+
+def _geo_trigger_steps(tabel, geo):
+    """Triggers die de R*Tree `geo` gelijk houden met postcode/stad van `tabel`."""
+    fill = (f"INSERT OR REPLACE INTO {geo} (id, min_lat, max_lat, min_lon, max_lon) "
+            f"SELECT NEW.id, c.lat, c.lat, c.lon, c.lon FROM postcode_centroids c "
+            f"WHERE c.postcode = {GEO_POSTCODE_SQL.format(t='NEW')};")
+    clear = f"DELETE FROM {geo} WHERE id = OLD.id;"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_geo_ins AFTER INSERT ON {tabel} BEGIN {fill} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_geo_upd AFTER UPDATE OF postcode, stad ON {tabel} "
+        f"BEGIN {clear} {fill} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_geo_del AFTER DELETE ON {tabel} BEGIN {clear} END",
+    ]
+
+def _backfill_project_postcodes(conn):
+    """Oudere projecten hebben enkel een vrij adres: haal er een postcode uit."""
+    rows = conn.execute("SELECT id, adres FROM projects WHERE IFNULL(postcode,'') = ''").fetchall()
+    updates = []
+    for pid, adres in rows:
+        m = re.search(r"\b(\d{4})\b", adres or "")
+        if m:
+            updates.append((m.group(1), pid))
+    conn.executemany("UPDATE projects SET postcode=? WHERE id=?", updates)
+
+# Rijksregisternummer (Hoofdstuk 2.M): de 11 cijfers als ze het modulo-97-controlegetal
+# halen (geboren vóór of vanaf 2000), anders NULL. Zelfde regel als rrn_problem().
+RRN_SQL = (
+    "(SELECT CASE WHEN length(d) = 11 AND d NOT GLOB '*[^0-9]*' "
+    "AND CAST(substr(d, 10, 2) AS INTEGER) IN (97 - CAST(substr(d, 1, 9) AS INTEGER) % 97, "
+    "97 - CAST('2' || substr(d, 1, 9) AS INTEGER) % 97) THEN d END "
+    "FROM (SELECT REPLACE(REPLACE(REPLACE(REPLACE(IFNULL({t}.rijksregisternummer,''), "
+    "'.', ''), '-', ''), ' ', ''), '/', '') AS d))"
+)
+
+# E-maildomein (Hoofdstuk 2.N): alles na de '@', in kleine letters; NULL zonder '@'
+EMAIL_DOMAIN_SQL = (
+    "CASE WHEN INSTR(IFNULL({t}.email,''), '@') > 0 "
+    "THEN NULLIF(LOWER(TRIM(SUBSTR({t}.email, INSTR({t}.email, '@') + 1))), '') END"
+)
+
+# Synchronisatie (Hoofdstuk 2.R): kolommen die meereizen; afgeleide kolommen
+# (sort_key, rrn, …) worden aan de ontvangende kant door de triggers berekend.
+SYNC_COLUMNS = {
+    "contacts": CONTACT_HEADERS,
+    "projects": PROJECT_HEADERS + ["jaar"],
+}
+
+def _sync_trigger_steps(tabel, skip_archived=False):
+    """
+    Triggers die elke lokale wijziging in sync_log zetten met het volgende
+    volgnummer van dit toestel. Tijdens het toepassen van een pakket
+    (sync_meta 'applying') loggen ze niets; dat doet sync_import zelf.
+    """
+    device = "(SELECT waarde FROM sync_meta WHERE sleutel='device')"
+    local = "(SELECT waarde FROM sync_meta WHERE sleutel='applying') IS NULL"
+    archived = " AND NOT EXISTS (SELECT 1 FROM project_archive WHERE id = {r}.id)" if skip_archived else ""
+    log = (f"UPDATE sync_vector SET seq = seq + 1 WHERE device = {device}; "
+           f"INSERT INTO sync_log (tabel, uid, device, dev_seq, op, gewijzigd_op) "
+           f"SELECT '{tabel}', {{r}}.uid, device, seq, '{{op}}', {{stamp}} FROM sync_vector WHERE device = {device} "
+           f"ON CONFLICT(tabel, uid) DO UPDATE SET device = excluded.device, dev_seq = excluded.dev_seq, "
+           f"op = excluded.op, gewijzigd_op = excluded.gewijzigd_op;")
+    upsert = log.format(r="NEW", op="upsert", stamp="NEW.laatst_gewijzigd_op")
+    delete = log.format(r="OLD", op="delete", stamp="strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime')")
+    cols = ", ".join(SYNC_COLUMNS[tabel] + ["uid"])
+    return [
+        # Nieuwe rijen krijgen een uid; die UPDATE wordt dan door trg_*_sync_upd gelogd
+        f"""CREATE TRIGGER IF NOT EXISTS trg_{tabel}_uid AFTER INSERT ON {tabel} WHEN NEW.uid IS NULL
+        BEGIN
+            UPDATE {tabel} SET uid = lower(hex(randomblob(16))) WHERE id = NEW.id;
+        END""",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_sync_ins AFTER INSERT ON {tabel} "
+        f"WHEN NEW.uid IS NOT NULL AND {local}{archived.format(r='NEW')} BEGIN {upsert} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_sync_upd AFTER UPDATE OF {cols} ON {tabel} "
+        f"WHEN NEW.uid IS NOT NULL AND {local} BEGIN {upsert} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_sync_del AFTER DELETE ON {tabel} "
+        f"WHEN OLD.uid IS NOT NULL AND {local}{archived.format(r='OLD')} BEGIN {delete} END",
+    ]
+
+# Fuzzy zoeken (Hoofdstuk 2.S): accenten weg vóór de trigrammen, in SQL
+# (triggers) en in Python (zoekvraag) met dezelfde tabel. Enkel de gangbare
+# accenten: elke letter is een geneste REPLACE en de SQL-parser heeft een
+# beperkte diepte. Hoofdletters vouwt de trigram-tokenizer zelf.
+FUZZY_ACCENTS = ("éèêëàâäáïîíôöóüûúçÉ", "eeeeaaaaiiiooouuucE")
+FUZZY_FOLD_TABLE = str.maketrans(*FUZZY_ACCENTS)
+
+def _fuzzy_fold_sql(expr):
+    """SQL-expressie: `expr` zonder accenten (geneste REPLACE)."""
+    for a, b in zip(*FUZZY_ACCENTS):
+        expr = f"REPLACE({expr}, '{a}', '{b}')"
+    return expr
+
+# Velden waarvan de woorden in de woordenlijst komen, en de tekens die als
+# woordscheiding gelden (ook alles wat een JSON-string zou breken).
+FUZZY_WORD_FIELDS = {
+    "contacts": ("voornaam", "achternaam", "bedrijf"),
+    "projects": ("klant", "projectnaam"),
+}
+FUZZY_SEPARATORS = ['"', "\\", ",", ";", "-", ".", "/", "(", ")", "&", "char(9)", "char(10)", "char(13)"]
+FUZZY_MIN_WORD = 3
+
+def _fuzzy_words_sql(tabel, t):
+    """FROM-deel dat de (unieke) woorden van rij `t` oplevert als kolom value."""
+    text = " || ' ' || ".join(f"IFNULL({t}.{c},'')" for c in FUZZY_WORD_FIELDS[tabel])
+    for sep in FUZZY_SEPARATORS:
+        sep_sql = sep if sep.startswith("char(") else f"'{sep}'"
+        text = f"REPLACE({text}, {sep_sql}, ' ')"
+    array = f"""('["' || REPLACE({text}, ' ', '","') || '"]')"""
+    # json_each splitst de woorden (een CTE mag niet in een trigger)
+    return (f"json_each(CASE WHEN json_valid({array}) THEN {array} ELSE '[]' END) "
+            f"WHERE length(value) >= {FUZZY_MIN_WORD}")
+
+def _fuzzy_trigger_steps(tabel):
+    """Triggers die fuzzy_vocab (woord → aantal rijen) bijhouden voor `tabel`."""
+    inc = (f"INSERT INTO fuzzy_vocab (tabel, woord, vorm, sleutel, n) "
+           f"SELECT '{tabel}', woord, vorm, '  ' || {_fuzzy_fold_sql('woord')} || ' ', 1 FROM ("
+           f"SELECT lower(value) AS woord, MIN(value) AS vorm FROM {_fuzzy_words_sql(tabel, 'NEW')} GROUP BY 1) "
+           f"WHERE true ON CONFLICT(tabel, woord) DO UPDATE SET n = n + 1;")
+    words_old = f"(SELECT lower(value) FROM {_fuzzy_words_sql(tabel, 'OLD')})"
+    dec = (f"UPDATE fuzzy_vocab SET n = n - 1 WHERE tabel='{tabel}' AND woord IN {words_old}; "
+           f"DELETE FROM fuzzy_vocab WHERE tabel='{tabel}' AND n <= 0 AND woord IN {words_old};")
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_fuzzy_ins AFTER INSERT ON {tabel} BEGIN {inc} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_fuzzy_upd AFTER UPDATE OF {', '.join(FUZZY_WORD_FIELDS[tabel])} "
+        f"ON {tabel} BEGIN {dec} {inc} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_fuzzy_del AFTER DELETE ON {tabel} BEGIN {dec} END",
+    ]
+
+def _fuzzy_setup(conn):
+    """
+    Woordenlijst per tabel met een FTS5-trigramindex erover. Zonder
+    FTS5-trigram (SQLite < 3.34) blijft fuzzy zoeken gewoon uit.
+    """
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS fuzzy_words USING fts5("
+                     "sleutel, content='fuzzy_vocab', content_rowid='id', tokenize='trigram')")
+    except sqlite3.OperationalError as e:
+        logger.warning("migratie: fuzzy zoeken niet beschikbaar: %s", e)
+        return
+    conn.execute("""CREATE TABLE IF NOT EXISTS fuzzy_vocab (
+        id INTEGER PRIMARY KEY,
+        tabel TEXT NOT NULL,
+        woord TEXT NOT NULL,     -- kleine letters, sleutel voor de tellingen
+        vorm TEXT NOT NULL,      -- schrijfwijze om te tonen
+        sleutel TEXT NOT NULL,   -- zonder accenten en met opvulling ('  woord '), voor de trigrammen
+        n INTEGER NOT NULL,      -- aantal rijen met dit woord
+        UNIQUE (tabel, woord)
+    )""")
+    for tabel in FUZZY_WORD_FIELDS:
+        conn.execute(f"INSERT INTO fuzzy_vocab (tabel, woord, vorm, sleutel, n) "
+                     f"SELECT '{tabel}', woord, vorm, '  ' || {_fuzzy_fold_sql('woord')} || ' ', n FROM ("
+                     f"SELECT lower(value) AS woord, MIN(value) AS vorm, COUNT(DISTINCT t.id) AS n "
+                     f"FROM {tabel} t, {_fuzzy_words_sql(tabel, 't')} GROUP BY 1)")
+    conn.execute("INSERT INTO fuzzy_words (fuzzy_words) VALUES ('rebuild')")
+    for step in [
+        "CREATE TRIGGER IF NOT EXISTS trg_fuzzy_vocab_ins AFTER INSERT ON fuzzy_vocab BEGIN "
+        "INSERT INTO fuzzy_words (rowid, sleutel) VALUES (NEW.id, NEW.sleutel); END",
+        "CREATE TRIGGER IF NOT EXISTS trg_fuzzy_vocab_del AFTER DELETE ON fuzzy_vocab BEGIN "
+        "INSERT INTO fuzzy_words (fuzzy_words, rowid, sleutel) VALUES ('delete', OLD.id, OLD.sleutel); END",
+        *_fuzzy_trigger_steps("contacts"),
+        *_fuzzy_trigger_steps("projects"),
+    ]:
+        conn.execute(step)
+
+# Omnibox (Hoofdstuk 2.T): één FTS5-index over projecten én contacten. De
+# index is contentless (content=''): de teksten staan al in de tabellen,
+# de index bewaart enkel de woorden. rowid = id*2 voor contacten en
+# id*2+1 voor projecten. Een contentless index kan enkel rijen verwijderen
+# met exact dezelfde waarden als bij het toevoegen, daarom komen beide uit
+# dezelfde expressies hieronder (op rij-alias {r}).
+OMNI_COLUMNS = ("nummer", "naam", "adres", "contact")
+OMNI_ROWID_SQL = {"contacts": "{r}.id * 2", "projects": "{r}.id * 2 + 1"}
+
+def _omni_phone_sql(col):
+    """Telefoonnummer als één term: enkel cijfers, zonder voorloopnullen."""
+    expr = f"IFNULL({col},'')"
+    for sep in (" ", ".", "/", "-"):
+        expr = f"REPLACE({expr}, '{sep}', '')"
+    return f"LTRIM({expr}, '0')"
+
+def _omni_join_sql(*cols):
+    return " || ' ' || ".join(f"IFNULL({c},'')" for c in cols)
+
+OMNI_VALUES_SQL = {
+    "contacts": (
+        "''",
+        _omni_join_sql("{r}.voornaam", "{r}.achternaam", "{r}.bedrijf"),
+        _omni_join_sql("{r}.straat", "{r}.huisnummer", "{r}.postcode", "{r}.stad"),
+        "IFNULL({r}.email,'') || ' ' || " + _omni_phone_sql("{r}.gsm_num") + " || ' ' || "
+        + _omni_phone_sql("{r}.tel_num"),
+    ),
+    "projects": (
+        _omni_join_sql("{r}.projectnummer", "{r}.gekoppeld_nummer"),
+        _omni_join_sql("{r}.klant", "{r}.projectnaam"),
+        _omni_join_sql("{r}.adres", "{r}.postcode", "{r}.stad"),
+        "''",
+    ),
+}
+OMNI_TRIGGER_COLUMNS = {
+    "contacts": ("voornaam", "achternaam", "bedrijf", "straat", "huisnummer", "postcode", "stad",
+                 "email", "gsm_num", "tel_num"),
+    "projects": ("projectnummer", "gekoppeld_nummer", "klant", "projectnaam", "adres", "postcode", "stad"),
+}
+
+def _omni_select_sql(tabel, r):
+    """rowid + de vier indexkolommen van rij-alias `r`."""
+    values = [OMNI_ROWID_SQL[tabel]] + list(OMNI_VALUES_SQL[tabel])
+    return ", ".join(v.format(r=r) for v in values)
+
+def _omni_trigger_steps(tabel):
+    """Triggers die omni_index (Hoofdstuk 2.T) gelijk houden met `tabel`."""
+    cols = ", ".join(OMNI_COLUMNS)
+    add = f"INSERT INTO omni_index (rowid, {cols}) SELECT {_omni_select_sql(tabel, 'NEW')};"
+    drop = (f"INSERT INTO omni_index (omni_index, rowid, {cols}) "
+            f"SELECT 'delete', {_omni_select_sql(tabel, 'OLD')};")
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_omni_ins AFTER INSERT ON {tabel} BEGIN {add} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_omni_upd AFTER UPDATE OF "
+        f"{', '.join(OMNI_TRIGGER_COLUMNS[tabel])} ON {tabel} BEGIN {drop} {add} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{tabel}_omni_del AFTER DELETE ON {tabel} BEGIN {drop} END",
+    ]
+
+def omni_rebuild(conn):
+    """omni_index leegmaken en opnieuw vullen uit contacts en projects."""
+    cols = ", ".join(OMNI_COLUMNS)
+    conn.execute("INSERT INTO omni_index (omni_index) VALUES ('delete-all')")
+    for tabel in ("contacts", "projects"):
+        conn.execute(f"INSERT INTO omni_index (rowid, {cols}) SELECT {_omni_select_sql(tabel, 't')} FROM {tabel} t")
+
+def _omni_setup(conn):
+    """
+    omni_index met zijn triggers. Zonder FTS5 blijft de omnibox leeg
+    (omni_search vangt de ontbrekende index op) in plaats van dat de
+    migratie en dus het opstarten faalt.
+    """
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS omni_index USING fts5("
+                     "nummer, naam, adres, contact, content='', "
+                     "tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+    except sqlite3.OperationalError as e:
+        logger.warning("migratie: omnibox niet beschikbaar: %s", e)
+        return
+    omni_rebuild(conn)
+    for step in [*_omni_trigger_steps("contacts"), *_omni_trigger_steps("projects")]:
+        conn.execute(step)
+
+def _normalize_existing_rrn(conn):
+    """Zet geldige nummers om naar de 11 cijfers (en de vaste notatie); noteer de rest in rrn_issues."""
+    rows = conn.execute("SELECT id, rijksregisternummer FROM contacts "
+                        "WHERE TRIM(IFNULL(rijksregisternummer,'')) <> '' ORDER BY id").fetchall()
+    seen, updates, issues = {}, [], []
+    for cid, waarde in rows:
+        digits = only_digits(waarde)
+        probleem = rrn_problem(digits)
+        if not probleem and digits in seen:
+            probleem = f"zelfde nummer als contact {seen[digits]}"
+        if probleem:
+            issues.append((cid, waarde, probleem))
+            continue
+        seen[digits] = cid
+        updates.append((digits, rrn_format(digits), cid))
+    conn.executemany("UPDATE contacts SET rrn=?, rijksregisternummer=? WHERE id=?", updates)
+    conn.executemany("INSERT OR REPLACE INTO rrn_issues (contact_id, waarde, probleem) VALUES (?,?,?)", issues)
+    if issues:
+        logger.warning("migratie: %d rijksregisternummer(s) niet omgezet; zie Beheer → Rijksregisternummers nakijken",
+                       len(issues))
+
+SCHEMA_MIGRATIONS = [
+    # 1: indexen voor gerelateerde records (bedrijf ↔ personen ↔ projecten)
+    (1, [
+        "CREATE INDEX IF NOT EXISTS idx_contacts_type_bedrijf ON contacts(type, bedrijf)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_klant ON projects(klant)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_projectnummer ON projects(projectnummer)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_gekoppeld ON projects(gekoppeld_nummer)",
+    ]),
+    # 2: logboek voor onderhoudstaken en groei van tabellen (Hoofdstuk 2.E)
+    (2, [
+        """CREATE TABLE IF NOT EXISTS maintenance_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            taak TEXT NOT NULL,
+            uitgevoerd_op TEXT NOT NULL,
+            duur_ms INTEGER,
+            details TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_maintenance_log_taak ON maintenance_log(taak, uitgevoerd_op)",
+        """CREATE TABLE IF NOT EXISTS table_growth (
+            gemeten_op TEXT NOT NULL,
+            tabel TEXT NOT NULL,
+            rijen INTEGER NOT NULL,
+            PRIMARY KEY (tabel, gemeten_op)
+        )""",
+    ]),
+    # 3: momentopnames van bulkwijzigingen, voor ongedaan maken (Hoofdstuk 2.F)
+    (3, [
+        """CREATE TABLE IF NOT EXISTS bulk_edits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabel TEXT NOT NULL,
+            veld TEXT NOT NULL,
+            nieuwe_waarde TEXT,
+            aantal INTEGER NOT NULL,
+            door TEXT,
+            op TEXT NOT NULL,
+            ongedaan_op TEXT
+        )""",
+        """CREATE TABLE IF NOT EXISTS bulk_edit_rows (
+            bulk_id INTEGER NOT NULL REFERENCES bulk_edits(id),
+            rij_id INTEGER NOT NULL,
+            oude_waarde TEXT,
+            PRIMARY KEY (bulk_id, rij_id)
+        ) WITHOUT ROWID""",
+    ]),
+    # 4: kolommen die de wizard 'Nieuw project' al invult maar nog niet bestonden
+    (4, [
+        "ALTER TABLE projects ADD COLUMN postcode TEXT",
+        "ALTER TABLE projects ADD COLUMN stad TEXT",
+        "ALTER TABLE projects ADD COLUMN groep TEXT",
+    ]),
+    # 5: één index per sorteerbare kolom (zie SORT_EXPRESSIONS) + UI-voorkeuren
+    (5, [
+        "CREATE INDEX IF NOT EXISTS idx_projects_sort_bureau ON projects(IFNULL(bureau,'') COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_sort_projectnummer ON projects(IFNULL(projectnummer,'') COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_sort_klant ON projects(IFNULL(klant,'') COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_sort_projectnaam ON projects(IFNULL(projectnaam,'') COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_sort_adres ON projects(IFNULL(adres,'') COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_sort_status ON projects(IFNULL(status,'') COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_sort_door ON projects(IFNULL(laatst_gewijzigd_door,'') COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_sort_op ON projects(IFNULL(laatst_gewijzigd_op,''))",
+        "CREATE INDEX IF NOT EXISTS idx_contacts_sort_type ON contacts(IFNULL(type,'') COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_contacts_sort_naam ON contacts(IFNULL(CASE WHEN type='persoon' THEN achternaam ELSE bedrijf END,'') COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_contacts_sort_bedrijf ON contacts(IFNULL(bedrijf,'') COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_contacts_sort_email ON contacts(IFNULL(email,'') COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_contacts_sort_stad ON contacts(IFNULL(stad,'') COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS idx_contacts_sort_op ON contacts(IFNULL(laatst_gewijzigd_op,''))",
+        """CREATE TABLE IF NOT EXISTS ui_settings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            gebruiker TEXT NOT NULL,
+            sleutel TEXT NOT NULL,
+            waarde TEXT,
+            UNIQUE (gebruiker, sleutel)
+        )""",
+    ]),
+    # 6: gedenormaliseerde display_name/sort_key op contacts, bijgehouden door triggers
+    (6, [
+        "ALTER TABLE contacts ADD COLUMN display_name TEXT",
+        "ALTER TABLE contacts ADD COLUMN sort_key TEXT",
+        f"UPDATE contacts SET display_name = {CONTACT_DISPLAY_NAME_SQL.format(t='contacts')}, "
+        f"sort_key = {CONTACT_SORT_KEY_SQL.format(t='contacts')}",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_contacts_names_ins AFTER INSERT ON contacts
+        BEGIN
+            UPDATE contacts SET display_name = {CONTACT_DISPLAY_NAME_SQL.format(t='NEW')},
+                                sort_key = {CONTACT_SORT_KEY_SQL.format(t='NEW')}
+            WHERE id = NEW.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_contacts_names_upd
+        AFTER UPDATE OF type, bedrijf, voornaam, achternaam ON contacts
+        BEGIN
+            UPDATE contacts SET display_name = {CONTACT_DISPLAY_NAME_SQL.format(t='NEW')},
+                                sort_key = {CONTACT_SORT_KEY_SQL.format(t='NEW')}
+            WHERE id = NEW.id;
+        END""",
+        "CREATE INDEX IF NOT EXISTS idx_contacts_sort_key ON contacts(sort_key)",
+        "DROP INDEX IF EXISTS idx_contacts_sort_naam",
+    ]),
+    # 7: facetten voor projecten (jaar, indexen, gecachte aantallen) + datageneratie
+    (7, [
+        "ALTER TABLE projects ADD COLUMN jaar TEXT",
+        "UPDATE projects SET jaar = SUBSTR(laatst_gewijzigd_op, 1, 4) WHERE IFNULL(laatst_gewijzigd_op,'') <> ''",
+        *[f"CREATE INDEX IF NOT EXISTS idx_projects_facet_{f} ON projects({e.format(t='')})"
+          for f, e in PROJECT_FACET_EXPRESSIONS],
+        """CREATE TABLE IF NOT EXISTS project_facets (
+            facet TEXT NOT NULL,
+            waarde TEXT NOT NULL,
+            aantal INTEGER NOT NULL,
+            PRIMARY KEY (facet, waarde)
+        ) WITHOUT ROWID""",
+        *[f"INSERT INTO project_facets (facet, waarde, aantal) "
+          f"SELECT '{f}', {e.format(t='')}, COUNT(*) FROM projects GROUP BY 2"
+          for f, e in PROJECT_FACET_EXPRESSIONS],
+        *_facet_trigger_steps(),
+        """CREATE TABLE IF NOT EXISTS data_generation (
+            tabel TEXT PRIMARY KEY,
+            gen INTEGER NOT NULL
+        )""",
+        *_generation_trigger_steps("projects"),
+    ]),
+    # 8: samenvattingstabel voor het dashboard (Hoofdstuk 2.I)
+    (8, [
+        """CREATE TABLE IF NOT EXISTS stats_buckets (
+            reeks TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            aantal INTEGER NOT NULL,
+            PRIMARY KEY (reeks, bucket)
+        ) WITHOUT ROWID""",
+        *_stats_trigger_steps(),
+        lambda conn: rebuild_statistics(conn),
+    ]),
+    # 9: offline geocodering via postcodecentroïden + R*Tree-index (Hoofdstuk 2.J)
+    (9, [
+        """CREATE TABLE IF NOT EXISTS postcode_centroids (
+            postcode TEXT PRIMARY KEY,
+            gemeente TEXT,
+            lat REAL NOT NULL,
+            lon REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_postcode_centroids_gemeente ON postcode_centroids(gemeente COLLATE NOCASE)",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS project_geo USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS contact_geo USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+        lambda conn: conn.executemany("INSERT OR IGNORE INTO postcode_centroids (postcode, gemeente, lat, lon) "
+                                      "VALUES (?,?,?,?)", DEFAULT_POSTCODE_CENTROIDS),
+        _backfill_project_postcodes,
+        *_geo_trigger_steps("projects", "project_geo"),
+        *_geo_trigger_steps("contacts", "contact_geo"),
+        lambda conn: geo_rebuild(conn),
+    ]),
+    # 10: generatieteller + gewijzigde rijen voor contacten (contactindex, Hoofdstuk 2.L)
+    (10, [
+        """CREATE TABLE IF NOT EXISTS contact_changes (
+            id INTEGER PRIMARY KEY,
+            gen INTEGER NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_contact_changes_gen ON contact_changes(gen)",
+        *_row_change_trigger_steps("contacts", "contact_changes"),
+    ]),
+    # 11: genormaliseerd rijksregisternummer met unieke index (Hoofdstuk 2.M)
+    (11, [
+        "ALTER TABLE contacts ADD COLUMN rrn TEXT",
+        """CREATE TABLE IF NOT EXISTS rrn_issues (
+            contact_id INTEGER PRIMARY KEY,
+            waarde TEXT,
+            probleem TEXT
+        )""",
+        _normalize_existing_rrn,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_contacts_rrn ON contacts(rrn)",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_contacts_rrn_ins AFTER INSERT ON contacts
+        WHEN NEW.rijksregisternummer IS NOT NULL
+        BEGIN
+            UPDATE contacts SET rrn = {RRN_SQL.format(t='NEW')} WHERE id = NEW.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_contacts_rrn_upd AFTER UPDATE OF rijksregisternummer ON contacts
+        BEGIN
+            UPDATE contacts SET rrn = {RRN_SQL.format(t='NEW')} WHERE id = NEW.id;
+        END""",
+    ]),
+    # 12: opgeslagen e-maildomein voor zoeken per domein en bedrijfskoppeling (Hoofdstuk 2.N)
+    (12, [
+        "ALTER TABLE contacts ADD COLUMN email_domain TEXT",
+        f"UPDATE contacts SET email_domain = {EMAIL_DOMAIN_SQL.format(t='contacts')}",
+        "CREATE INDEX IF NOT EXISTS idx_contacts_email_domain ON contacts(email_domain, type)",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_contacts_domain_ins AFTER INSERT ON contacts
+        WHEN NEW.email IS NOT NULL
+        BEGIN
+            UPDATE contacts SET email_domain = {EMAIL_DOMAIN_SQL.format(t='NEW')} WHERE id = NEW.id;
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_contacts_domain_upd AFTER UPDATE OF email ON contacts
+        BEGIN
+            UPDATE contacts SET email_domain = {EMAIL_DOMAIN_SQL.format(t='NEW')} WHERE id = NEW.id;
+        END""",
+    ]),
+    # 13: bijlagen per project; de bestanden zelf staan in de blob-store op schijf (Hoofdstuk 2.P)
+    (13, [
+        """CREATE TABLE IF NOT EXISTS project_attachments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            bestandsnaam TEXT NOT NULL,
+            categorie TEXT,
+            grootte INTEGER NOT NULL,
+            toegevoegd_door TEXT,
+            toegevoegd_op TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_attachments_project ON project_attachments(project_id)",
+        "CREATE INDEX IF NOT EXISTS idx_attachments_sha ON project_attachments(sha256)",
+        """CREATE TRIGGER IF NOT EXISTS trg_projects_attachments_del AFTER DELETE ON projects
+        BEGIN
+            DELETE FROM project_attachments WHERE project_id = OLD.id;
+        END""",
+    ]),
+    # 14: archief voor afgesloten projecten (Hoofdstuk 2.Q). project_archive houdt in de
+    # hoofddatabase bij welke ids verhuisd zijn; bijlagen en coördinaten blijven dan staan.
+    (14, [
+        """CREATE TABLE IF NOT EXISTS project_archive (
+            id INTEGER PRIMARY KEY,
+            projectnummer TEXT,
+            postcode TEXT,
+            stad TEXT,
+            gearchiveerd_op TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_project_archive_nummer ON project_archive(projectnummer)",
+        "DROP TRIGGER IF EXISTS trg_projects_attachments_del",
+        """CREATE TRIGGER IF NOT EXISTS trg_projects_attachments_del AFTER DELETE ON projects
+        WHEN NOT EXISTS (SELECT 1 FROM project_archive WHERE id = OLD.id)
+        BEGIN
+            DELETE FROM project_attachments WHERE project_id = OLD.id;
+        END""",
+        "DROP TRIGGER IF EXISTS trg_projects_geo_del",
+        """CREATE TRIGGER IF NOT EXISTS trg_projects_geo_del AFTER DELETE ON projects
+        WHEN NOT EXISTS (SELECT 1 FROM project_archive WHERE id = OLD.id)
+        BEGIN
+            DELETE FROM project_geo WHERE id = OLD.id;
+        END""",
+    ]),
+    # 15: synchronisatie tussen databasekopieën (Hoofdstuk 2.R): uid per rij,
+    # logboek per rij met (toestel, volgnummer) en de kennis per toestel
+    (15, [
+        *[step for tabel in ("contacts", "projects") for step in (
+            f"ALTER TABLE {tabel} ADD COLUMN uid TEXT",
+            f"UPDATE {tabel} SET uid = lower(hex(randomblob(16)))",
+            f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{tabel}_uid ON {tabel}(uid)",
+        )],
+        "ALTER TABLE project_archive ADD COLUMN uid TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_project_archive_uid ON project_archive(uid)",
+        """CREATE TABLE IF NOT EXISTS sync_meta (
+            sleutel TEXT PRIMARY KEY,
+            waarde TEXT
+        )""",
+        """CREATE TABLE IF NOT EXISTS sync_vector (
+            device TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS sync_log (
+            tabel TEXT NOT NULL,
+            uid TEXT NOT NULL,
+            device TEXT NOT NULL,
+            dev_seq INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            gewijzigd_op TEXT,
+            PRIMARY KEY (tabel, uid)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_sync_log_device ON sync_log(device, dev_seq)",
+        """CREATE TABLE IF NOT EXISTS sync_peers (
+            peer TEXT NOT NULL,
+            device TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            PRIMARY KEY (peer, device)
+        ) WITHOUT ROWID""",
+        lambda conn: _sync_device(conn, commit=False),
+        *_sync_trigger_steps("contacts"),
+        *_sync_trigger_steps("projects", skip_archived=True),
+    ]),
+    # 16: trigramindex voor "bedoelde je …?" (Hoofdstuk 2.S)
+    (16, [
+        _fuzzy_setup,
+    ]),
+    # 17: omnibox, één woordindex over projecten en contacten (Hoofdstuk 2.T)
+    (17, [
+        _omni_setup,
+    ]),
+    # 18: gewijzigde rijen ook voor projecten, zodat de recordcache (Hoofdstuk 2.W)
+    # enkel die rijen vergeet; de generatietriggers van migratie 7 worden vervangen
+    (18, [
+        """CREATE TABLE IF NOT EXISTS project_changes (
+            id INTEGER PRIMARY KEY,
+            gen INTEGER NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_project_changes_gen ON project_changes(gen)",
+        *[f"DROP TRIGGER IF EXISTS trg_projects_gen_{op}" for op in ("insert", "update", "delete")],
+        *_row_change_trigger_steps("projects", "project_changes"),
+    ]),
+    # 19: sync-rijen die niet toegepast konden worden (Hoofdstuk 2.R); het
+    # volgnummer is wel al ontvangen, dus ze worden hier bewaard tot iemand ze oplost
+    (19, [
+        """CREATE TABLE IF NOT EXISTS sync_conflicts (
+            tabel TEXT NOT NULL,
+            uid TEXT NOT NULL,
+            device TEXT NOT NULL,
+            dev_seq INTEGER NOT NULL,
+            op TEXT NOT NULL,
+            gewijzigd_op TEXT,
+            rij TEXT,
+            reden TEXT,
+            ontvangen_op TEXT,
+            PRIMARY KEY (tabel, uid)
+        ) WITHOUT ROWID""",
+    ]),
+    # 20: gearchiveerde projecten tellen mee in het dashboard (Hoofdstuk 2.I);
+    # wat al in het archief staat, wordt één keer uit het archiefbestand geteld
+    (20, [
+        lambda conn: _archive_stats_rebuild(conn),
+    ]),
+]
+
+def db_migrate():
+    """Voer alle migraties uit die nog niet op deze database toegepast zijn."""
+    conn = db_connect()
+    try:
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, steps in SCHEMA_MIGRATIONS:
+            if version <= current:
+                continue
+            # Expliciete transactie: ook CREATE/ALTER moeten samen slagen of falen
+            conn.execute("BEGIN")
+            try:
+                for step in steps:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        _sync_device(conn)  # een gekopieerd bestand krijgt een eigen toestel-id
+    finally:
+        db_close(conn)
+
+# ------------------ Hoofdstuk 2.D: Online back-ups ------------------
+# Back-ups via de sqlite3 backup-API: de database wordt in stukjes van
+# BACKUP_PAGES_PER_STEP pagina's gekopieerd, zodat schrijvers tussendoor
+# gewoon verder kunnen. Elke kopie wordt gecontroleerd met integrity_check
+# en pas daarna onder haar definitieve naam gezet.
+
+import threading
+import time
+import glob
+import shutil
+
+BACKUP_DIR = os.path.join(BASE_DIR, "backups")
+BACKUP_KEEP = 14                 # aantal snapshots dat bewaard blijft
+BACKUP_PAGES_PER_STEP = 256      # pagina's per stap (± 1 MB bij 4 KB pagina's)
+BACKUP_STEP_SLEEP = 0.05         # pauze tussen stappen (seconden)
+BACKUP_INTERVAL_MIN = 60         # interval van de automatische back-up
+
+_backup_lock = threading.Lock()
+_backup_thread = None
+_backup_stop = threading.Event()
+
+def _backup_name(stamp=None):
+    stamp = stamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"dela_database_{stamp}.db"
+
+def db_integrity_ok(path):
+    """Geeft True als PRAGMA integrity_check op dit bestand 'ok' oplevert."""
+    try:
+        conn = sqlite3.connect(readonly_uri(path), uri=True)
+        try:
+            return conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+
+def list_backups(backup_dir=None):
+    """Alle snapshots, nieuwste eerst."""
+    backup_dir = backup_dir or BACKUP_DIR
+    return sorted(glob.glob(os.path.join(backup_dir, "dela_database_*.db")), reverse=True)
+
+def rotate_backups(keep=None, backup_dir=None):
+    """Verwijder de oudste snapshots zodat er maximaal `keep` overblijven."""
+    keep = BACKUP_KEEP if keep is None else keep
+    for old in list_backups(backup_dir)[keep:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+def db_backup(backup_dir=None, pages=None, progress=None, rotate=True):
+    """
+    Maak een gecontroleerde snapshot van DB_PATH en geef het pad terug.
+    - pages: aantal pagina's per stap (standaard BACKUP_PAGES_PER_STEP)
+    - progress: optionele callback(status, remaining, total) van sqlite3
+    - rotate=False: oude snapshots niet opruimen
+    Gooit RuntimeError als de kopie de integriteitscontrole niet doorstaat.
+    """
+    backup_dir = backup_dir or BACKUP_DIR
+    os.makedirs(backup_dir, exist_ok=True)
+    final_path = os.path.join(backup_dir, _backup_name())
+    n = 1
+    while os.path.exists(final_path):
+        final_path = os.path.join(backup_dir, _backup_name(datetime.now().strftime("%Y%m%d_%H%M%S") + f"_{n}"))
+        n += 1
+    tmp_path = final_path + ".part"
+
+    with _backup_lock:
+        src = sqlite3.connect(DB_PATH)
+        dst = sqlite3.connect(tmp_path)
+        try:
+            src.backup(dst, pages=pages or BACKUP_PAGES_PER_STEP,
+                       progress=progress, sleep=BACKUP_STEP_SLEEP)
+        finally:
+            dst.close()
+            src.close()
+
+        if not db_integrity_ok(tmp_path):
+            os.remove(tmp_path)
+            raise RuntimeError("Back-up mislukt: integrity_check niet in orde.")
+        os.replace(tmp_path, final_path)
+        if rotate:
+            rotate_backups(backup_dir=backup_dir)
+    return final_path
+
+def db_restore(backup_path, pages=None):
+    """
+    Zet een snapshot terug in DB_PATH via dezelfde backup-API (in stappen),
+    nadat eerst een veiligheidskopie van de huidige toestand gemaakt is.
+    Geeft het pad van die veiligheidskopie terug.
+    """
+    if not db_integrity_ok(backup_path):
+        raise RuntimeError(f"Snapshot is beschadigd: {backup_path}")
+    src = sqlite3.connect(readonly_uri(backup_path), uri=True)
+    try:
+        version = src.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        src.close()
+    if version > SCHEMA_MIGRATIONS[-1][0]:
+        raise RuntimeError(f"Snapshot komt van een nieuwere versie van het programma "
+                           f"(schema {version}, dit programma kent tot {SCHEMA_MIGRATIONS[-1][0]}): {backup_path}")
+    # Niet roteren: de snapshot die we terugzetten mag niet opgeruimd worden
+    safety = db_backup(rotate=False)
+    with _backup_lock:
+        src = sqlite3.connect(readonly_uri(backup_path), uri=True)
+        dst = sqlite3.connect(DB_PATH)
+        try:
+            src.backup(dst, pages=pages or BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP)
+        finally:
+            dst.close()
+            src.close()
+    # Een oudere snapshot meteen bijwerken: het draaiende programma rekent op het huidige schema
+    db_migrate()
+    record_cache_clear()
+    contact_index_reset()
+    # De volgnummers van de back-up liggen achter op wat andere toestellen al
+    # kennen: verder onder een nieuw toestel-id (Hoofdstuk 2.R)
+    conn = db_connect()
+    try:
+        conn.execute("DELETE FROM sync_meta WHERE sleutel='device'")
+        _sync_device(conn)
+    finally:
+        db_close(conn)
+    return safety
+
+def start_backup_scheduler(interval_min=None):
+    """Start (eenmalig) een achtergrondthread die periodiek db_backup uitvoert."""
+    global _backup_thread
+    if _backup_thread and _backup_thread.is_alive():
+        return _backup_thread
+    interval = max(1, interval_min or BACKUP_INTERVAL_MIN) * 60
+    _backup_stop.clear()
+
+    def loop():
+        while not _backup_stop.wait(interval):
+            try:
+                db_backup()
+            except (sqlite3.Error, OSError, RuntimeError) as e:
+                logger.error("back-up mislukt: %s", e)
+
+    _backup_thread = threading.Thread(target=loop, name="dela-backup", daemon=True)
+    _backup_thread.start()
+    return _backup_thread
+
+def stop_backup_scheduler():
+    _backup_stop.set()
+
+# ------------------ Hoofdstuk 2.E: Automatisch onderhoud ------------------
+# - PRAGMA optimize bij het sluiten van een connectie die schreef (zie Hoofdstuk 2.B)
+# - periodiek ANALYZE, met meting van het aantal rijen per tabel
+# - VACUUM ter plaatse in de daluren (atomair, onder een exclusieve lock)
+# - bijlagen waarnaar geen rij meer verwijst uit de blob-store halen (Hoofdstuk 2.P)
+# - gezondheidsrapport: pagina's, freelist, indexgebruik en groei
+
+MAINT_ANALYZE_HOURS = 24          # ANALYZE minstens zo vaak
+MAINT_VACUUM_DAYS = 7             # VACUUM hoogstens zo vaak
+MAINT_VACUUM_FREELIST_PCT = 10    # ... en enkel als er genoeg lege pagina's zijn
+MAINT_IDLE_HOURS = (22, 23, 0, 1, 2, 3, 4, 5, 6)
+MAINT_CHECK_MIN = 15              # hoe vaak de onderhoudsthread kijkt
+MAINT_BLOB_HOURS = 24             # verweesde bijlagen (bv. van verwijderde projecten) opruimen
+
+# Tabellen waarvan de groei opgevolgd wordt
+GROWTH_TABLES = ("contacts", "projects")
+
+# Vaste zoekopdrachten van de applicatie; het rapport toont welk plan SQLite kiest
+HEALTH_QUERIES = [
+    ("Personen van bedrijf", "SELECT id FROM contacts WHERE type='persoon' AND bedrijf=?", ("x",)),
+    ("Projecten van klant", "SELECT id FROM projects WHERE klant=?", ("x",)),
+    ("Project op nummer", "SELECT id FROM projects WHERE projectnummer=?", ("x",)),
+    ("Gekoppelde projecten", "SELECT id FROM projects WHERE projectnummer=? OR gekoppeld_nummer=?", ("x", "x")),
+]
+
+_maint_thread = None
+_maint_stop = threading.Event()
+
+def _log_maintenance(conn, taak, started, details=""):
+    duur = int((time.perf_counter() - started) * 1000)
+    conn.execute("INSERT INTO maintenance_log (taak, uitgevoerd_op, duur_ms, details) VALUES (?,?,?,?)",
+                 (taak, now_str(), duur, details))
+    conn.commit()
+
+def last_maintenance(taak):
+    """Tijdstip (datetime) van de laatste uitvoering van een taak, of None."""
+    row = db_query("SELECT MAX(uitgevoerd_op) AS t FROM maintenance_log WHERE taak=?", (taak,), fetchone=True)
+    if not row or not row["t"]:
+        return None
+    return datetime.strptime(row["t"], "%Y-%m-%d %H:%M:%S")
+
+def db_analyze():
+    """Vernieuw de planner-statistieken en noteer het aantal rijen per tabel."""
+    conn = db_connect()
+    try:
+        started = time.perf_counter()
+        conn.execute("ANALYZE")
+        stamp = now_str()
+        for tabel in GROWTH_TABLES:
+            n = conn.execute(f"SELECT COUNT(*) FROM {tabel}").fetchone()[0]
+            conn.execute("INSERT OR REPLACE INTO table_growth (gemeten_op, tabel, rijen) VALUES (?,?,?)",
+                         (stamp, tabel, n))
+        _log_maintenance(conn, "analyze", started)
+    finally:
+        db_close(conn)
+
+def db_page_stats(conn):
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count, freelist, page_size
+
+def db_vacuum(force=False):
+    """
+    Compacteer de database met een gewone VACUUM, ter plaatse. SQLite doet
+    dat onder een exclusieve lock en via het journaal, dus atomair: een
+    commit van iemand anders gaat nooit verloren, hij wacht of de VACUUM
+    faalt met "database is locked" en wordt later opnieuw geprobeerd.
+    Geeft False terug als compacteren niet nodig was.
+    """
+    conn = db_connect()
+    try:
+        page_count, freelist, _ = db_page_stats(conn)
+        if not force and (not page_count or freelist * 100 < page_count * MAINT_VACUUM_FREELIST_PCT):
+            return False
+        started = time.perf_counter()
+        with _backup_lock:  # niet tegelijk met een back-up die dezelfde pagina's leest
+            conn.execute("VACUUM")
+        new_count, new_free, _ = db_page_stats(conn)
+        _log_maintenance(conn, "vacuum", started,
+                         f"{page_count} → {new_count} pagina's, freelist {freelist} → {new_free}")
+        return True
+    finally:
+        db_close(conn)
+
+def db_collect_blobs():
+    """Ruim de hele blob-store op (blob_collect) en noteer het in het onderhoudslog."""
+    started = time.perf_counter()
+    removed = blob_collect()
+    conn = db_connect()
+    try:
+        _log_maintenance(conn, "bijlagen", started, f"{removed} verweesde bestanden verwijderd")
+    finally:
+        db_close(conn)
+    return removed
+
+def run_due_maintenance(now=None):
+    """Voer uit wat aan de beurt is: ANALYZE volgens interval, VACUUM enkel in daluren."""
+    now = now or datetime.now()
+    done = []
+    last = last_maintenance("analyze")
+    if not last or (now - last).total_seconds() >= MAINT_ANALYZE_HOURS * 3600:
+        db_analyze()
+        done.append("analyze")
+    last = last_maintenance("bijlagen")
+    if not last or (now - last).total_seconds() >= MAINT_BLOB_HOURS * 3600:
+        db_collect_blobs()
+        done.append("bijlagen")
+    if now.hour in MAINT_IDLE_HOURS:
+        last = last_maintenance("vacuum")
+        if not last or (now - last).days >= MAINT_VACUUM_DAYS:
+            if db_vacuum():
+                done.append("vacuum")
+    return done
+
+def start_maintenance_scheduler():
+    """Start (eenmalig) een achtergrondthread die run_due_maintenance oproept."""
+    global _maint_thread
+    if _maint_thread and _maint_thread.is_alive():
+        return _maint_thread
+    _maint_stop.clear()
+
+    def loop():
+        while not _maint_stop.wait(MAINT_CHECK_MIN * 60):
+            try:
+                run_due_maintenance()
+            except (sqlite3.Error, OSError, RuntimeError) as e:
+                logger.error("onderhoud mislukt: %s", e)
+
+    _maint_thread = threading.Thread(target=loop, name="dela-maintenance", daemon=True)
+    _maint_thread.start()
+    return _maint_thread
+
+def db_health_report():
+    """Gezondheidsrapport als lijst tekstregels."""
+    conn = db_connect()
+    conn.row_factory = sqlite3.Row
+    lines = []
+    try:
+        page_count, freelist, page_size = db_page_stats(conn)
+        pct = (freelist * 100.0 / page_count) if page_count else 0.0
+        lines.append("== Bestand ==")
+        lines.append(f"Pagina's: {page_count} × {page_size} B = {page_count * page_size / 1024:.0f} KB")
+        lines.append(f"Freelist: {freelist} pagina's ({pct:.1f}%)")
+
+        lines.append("")
+        lines.append("== Ruimte per tabel/index ==")
+        try:
+            for r in conn.execute("SELECT name, COUNT(*) AS n, SUM(pgsize) AS b FROM dbstat GROUP BY name ORDER BY b DESC"):
+                lines.append(f"{r['name']:<36} {r['n']:>7} pag. {r['b'] / 1024:>9.0f} KB")
+        except sqlite3.OperationalError:
+            lines.append("(dbstat niet beschikbaar in deze SQLite-versie)")
+
+        lines.append("")
+        lines.append("== Indexgebruik ==")
+        for label, sql, params in HEALTH_QUERIES:
+            plan = " | ".join(r["detail"] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+            lines.append(f"{label}: {plan}")
+        try:
+            for r in conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1 WHERE idx IS NOT NULL ORDER BY tbl, idx"):
+                lines.append(f"  stat1 {r['tbl']}.{r['idx']}: {r['stat']}")
+        except sqlite3.OperationalError:
+            lines.append("  (nog geen ANALYZE uitgevoerd)")
+
+        lines.append("")
+        lines.append("== Groei ==")
+        for tabel in GROWTH_TABLES:
+            hist = conn.execute("SELECT gemeten_op, rijen FROM table_growth WHERE tabel=? "
+                                "ORDER BY gemeten_op DESC LIMIT 2", (tabel,)).fetchall()
+            now_n = conn.execute(f"SELECT COUNT(*) FROM {tabel}").fetchone()[0]
+            if hist:
+                delta = now_n - hist[0]["rijen"]
+                lines.append(f"{tabel}: {now_n} rijen ({delta:+d} sinds {hist[0]['gemeten_op']})")
+            else:
+                lines.append(f"{tabel}: {now_n} rijen")
+
+        lines.append("")
+        lines.append("== Laatste onderhoud ==")
+        for r in conn.execute("SELECT taak, MAX(uitgevoerd_op) AS t, duur_ms FROM maintenance_log GROUP BY taak"):
+            lines.append(f"{r['taak']}: {r['t']} ({r['duur_ms']} ms)")
+
+        lines.append("")
+        lines.append(f"== Recente meldingen ({os.path.basename(LOG_PATH)}) ==")
+        lines += recent_log_lines() or ["(geen)"]
+    finally:
+        db_close(conn)
+    return lines
+
+# ------------------ Hoofdstuk 2.F: Bulkwijzigingen ------------------
+# Eén veld aanpassen voor veel rijen tegelijk: één transactie, één executemany.
+# De oude waarden worden eerst bewaard in bulk_edit_rows zodat de hele
+# wijziging later in één keer ongedaan gemaakt kan worden.
+
+# Enkel deze velden mogen in bulk aangepast worden (kolomnamen komen in SQL)
+BULK_FIELDS = {
+    "contacts": ["bedrijf", "rechtsvorm", "functie", "straat", "postcode", "stad", "land"],
+    "projects": ["status", "klant", "bureau", "type_project", "gekoppeld_nummer"],
+}
+
+# Velden die de datakwaliteitscontrole (Hoofdstuk 2.V) per rij verbetert; die
+# verbeteringen worden als bulkwijziging bewaard en zijn dus ook ongedaan te maken
+DQ_FIX_FIELDS = {
+    "contacts": ["email", "gsm_num", "tel_num", "rijksregisternummer", "postcode", "stad"],
+    "projects": ["postcode", "stad"],
+}
+
+# Leesbare omschrijving per rij in de preview
+BULK_LABEL_SQL = {
+    "contacts": "display_name",
+    "projects": "COALESCE(projectnummer,'') || ' – ' || COALESCE(projectnaam,'')",
+}
+
+BULK_CHUNK = 500  # ruim onder de limiet voor SQL-parameters
+
+def _chunks(seq, size=BULK_CHUNK):
+    seq = list(seq)
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+def _check_bulk_field(table, field, undo=False):
+    allowed = BULK_FIELDS.get(table, []) + (DQ_FIX_FIELDS.get(table, []) if undo else [])
+    if field not in allowed:
+        raise ValueError(f"Veld '{field}' kan niet in bulk gewijzigd worden in '{table}'.")
+
+def db_bulk_preview(table, field, ids):
+    """Geef (id, omschrijving, huidige waarde) voor alle geselecteerde rijen."""
+    _check_bulk_field(table, field)
+    out = []
+    for part in _chunks(ids):
+        marks = ", ".join("?" * len(part))
+        rows = db_query(f"SELECT id, {BULK_LABEL_SQL[table]} AS label, {field} AS waarde "
+                        f"FROM {table} WHERE id IN ({marks}) ORDER BY id", tuple(part), fetchall=True)
+        out.extend((r["id"], r["label"] or "", r["waarde"] or "") for r in rows)
+    return out
+
+def db_bulk_update(table, field, value, ids, user=None):
+    """
+    Zet `field` op `value` voor alle ids in één transactie.
+    Geeft het id van de bulkwijziging terug (voor db_bulk_undo).
+    """
+    _check_bulk_field(table, field)
+    ids = [int(i) for i in ids]
+    stamp = now_str()
+    user = user or globals().get("current_user") or ""
+    conn = db_connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute("INSERT INTO bulk_edits (tabel, veld, nieuwe_waarde, aantal, door, op) "
+                           "VALUES (?,?,?,?,?,?)", (table, field, value, len(ids), user, stamp))
+        bulk_id = cur.lastrowid
+        for part in _chunks(ids):
+            marks = ", ".join("?" * len(part))
+            conn.execute(f"INSERT INTO bulk_edit_rows (bulk_id, rij_id, oude_waarde) "
+                         f"SELECT ?, id, {field} FROM {table} WHERE id IN ({marks})", (bulk_id, *part))
+        conn.executemany(f"UPDATE {table} SET {field}=?, laatst_gewijzigd_door=?, laatst_gewijzigd_op=? WHERE id=?",
+                         [(value, user, stamp, i) for i in ids])
+        conn.commit()
+        return bulk_id
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        db_close(conn)
+
+def db_bulk_undo(bulk_id, user=None):
+    """Zet de bewaarde oude waarden van een bulkwijziging terug (één transactie)."""
+    stamp = now_str()
+    user = user or globals().get("current_user") or ""
+    conn = db_connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        head = conn.execute("SELECT tabel, veld, ongedaan_op FROM bulk_edits WHERE id=?", (bulk_id,)).fetchone()
+        if not head:
+            raise ValueError(f"Bulkwijziging {bulk_id} bestaat niet.")
+        table, field, undone = head
+        if undone:
+            raise ValueError(f"Bulkwijziging {bulk_id} werd al ongedaan gemaakt op {undone}.")
+        _check_bulk_field(table, field, undo=True)
+        rows = conn.execute("SELECT oude_waarde, rij_id FROM bulk_edit_rows WHERE bulk_id=?", (bulk_id,)).fetchall()
+        conn.executemany(f"UPDATE {table} SET {field}=?, laatst_gewijzigd_door=?, laatst_gewijzigd_op=? WHERE id=?",
+                         [(old, user, stamp, rid) for old, rid in rows])
+        conn.execute("UPDATE bulk_edits SET ongedaan_op=? WHERE id=?", (stamp, bulk_id))
+        conn.commit()
+        return len(rows)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        db_close(conn)
+
+def db_bulk_history(limit=30):
+    return db_query("SELECT * FROM bulk_edits ORDER BY id DESC LIMIT ?", (limit,), fetchall=True)
+
+# ------------------ Hoofdstuk 2.G: Sorteren & keyset-paginering ------------------
+# Elke sorteerbare kolom heeft een expressie die exact overeenkomt met een
+# index uit migratie 5. Pagina's worden opgehaald vanaf de laatste
+# (sorteerwaarde, id) in plaats van met OFFSET, zodat pagina 50 even snel
+# is als pagina 1 en omgekeerd sorteren gewoon de index achterstevoren leest.
+# Lijsten vragen enkel de getoonde kolommen op en krijgen die terug als
+# namedtuple (record_type); het volledige record komt pas bij openen, via de
+# recordcache (Hoofdstuk 2.W).
+
+from collections import namedtuple
+
+PAGE_SIZE = 200
+
+SORT_EXPRESSIONS = {
+    "projects": {
+        "bureau": "IFNULL(bureau,'') COLLATE NOCASE",
+        "projectnummer": "IFNULL(projectnummer,'') COLLATE NOCASE",
+        "klant": "IFNULL(klant,'') COLLATE NOCASE",
+        "projectnaam": "IFNULL(projectnaam,'') COLLATE NOCASE",
+        "adres": "IFNULL(adres,'') COLLATE NOCASE",
+        "status": "IFNULL(status,'') COLLATE NOCASE",
+        "laatst_gewijzigd_door": "IFNULL(laatst_gewijzigd_door,'') COLLATE NOCASE",
+        "laatst_gewijzigd_op": "IFNULL(laatst_gewijzigd_op,'')",
+    },
+    "contacts": {
+        "type": "IFNULL(type,'') COLLATE NOCASE",
+        "naam": "sort_key",  # kolom bijgehouden door triggers (migratie 6)
+        "bedrijf": "IFNULL(bedrijf,'') COLLATE NOCASE",
+        "email": "IFNULL(email,'') COLLATE NOCASE",
+        "stad": "IFNULL(stad,'') COLLATE NOCASE",
+        "laatst_gewijzigd_op": "IFNULL(laatst_gewijzigd_op,'')",
+    },
+}
+
+_record_types = {}
+
+def record_type(table, cols):
+    """
+    Lichte recordklasse (namedtuple) voor een lijst kolommen van `table`,
+    plus het veld `sortwaarde` dat keyset_page meelevert. Eén klasse per
+    combinatie, zodat pagina's na elkaar geen nieuwe klassen aanmaken.
+    """
+    key = (table, tuple(cols))
+    if key not in _record_types:
+        _record_types[key] = namedtuple(f"{table}_rij", key[1] + ("sortwaarde",))
+    return _record_types[key]
+
+def keyset_page(table, select_cols, sort_col, desc=False, where=None, params=(), after=None, limit=None,
+                readonly=False, archive=False):
+    """
+    Haal één pagina op, gesorteerd op sort_col (met id als tiebreaker).
+    - select_cols: de kolomnamen die getoond worden (moet "id" bevatten);
+      rijen komen terug als record_type(table, select_cols)
+    - where: lijst SQL-voorwaarden (worden met AND gecombineerd)
+    - after: (sorteerwaarde, id) van de laatste rij van de vorige pagina
+    - readonly: via de alleen-lezen connectie (zie db_connect)
+    - archive: projecten ook uit het archief (UNION ALL, elk deel via zijn eigen index)
+    Geeft (rijen, volgende_after) terug; volgende_after is None op de laatste pagina.
+    """
+    limit = limit or PAGE_SIZE
+    expr = SORT_EXPRESSIONS[table][sort_col]
+    cmp = "<" if desc else ">"
+    direction = "DESC" if desc else "ASC"
+    conds = list(where or [])
+    params = list(params)
+    if after is not None:
+        # "expr >= ?" geeft SQLite een bereik op de index; de rest is de tiebreak
+        conds.append(f"{expr} {cmp}= ? AND ({expr} {cmp} ? OR id {cmp} ?)")
+        params += [after[0], after[0], after[1]]
+    where_sql = (" WHERE " + " AND ".join(f"({c})" for c in conds)) if conds else ""
+    record = record_type(table, select_cols)
+    cols_sql = ", ".join(select_cols)
+    if archive and table == "projects" and archive_available():
+        # Beide delen leveren al gesorteerd aan; SQLite voegt ze samen tot LIMIT
+        query, params = project_union(f"SELECT {cols_sql}, {expr} AS _sort FROM {{src}}{where_sql}", params,
+                                      archive=True)
+        rows = db_query(f"{query} ORDER BY _sort {direction}, id {direction} LIMIT ?",
+                        params + (limit,), fetchall=True, readonly=readonly, archive=True, record=record)
+    else:
+        rows = db_query(
+            f"SELECT {cols_sql}, {expr} AS _sort FROM {table}{where_sql} "
+            f"ORDER BY {expr} {direction}, id {direction} LIMIT ?",
+            tuple(params) + (limit,), fetchall=True, readonly=readonly, record=record)
+    nxt = (rows[-1].sortwaarde, rows[-1].id) if len(rows) == limit else None
+    return rows, nxt
+
+def ui_pref_get(key, default=None):
+    """Bewaarde voorkeur van de ingelogde gebruiker (bv. laatste sortering)."""
+    try:
+        row = db_query("SELECT waarde FROM ui_settings WHERE gebruiker=? AND sleutel=?",
+                       (globals().get("current_user") or "", key), fetchone=True)
+    except sqlite3.OperationalError:
+        return default
+    return row["waarde"] if row else default
+
+def ui_pref_set(key, value):
+    try:
+        db_upsert("ui_settings", {"gebruiker": globals().get("current_user") or "", "sleutel": key, "waarde": value},
+                  key=("gebruiker", "sleutel"))
+    except sqlite3.OperationalError:
+        pass  # voorkeuren zijn nooit kritisch
+
+# ------------------ Hoofdstuk 2.H: Facetten voor projecten ------------------
+# Aantallen per status, bureau, type en jaar. Zonder selectie komen ze uit
+# project_facets (door triggers bijgehouden, dus O(aantal waarden)); met een
+# selectie is het één GROUP BY per facet over een geïndexeerde expressie.
+# Resultaten worden gecachet zolang data_generation('projects') niet wijzigt.
+
+PROJECT_FACETS = [("status", "Status"), ("bureau", "Bureau"), ("type_project", "Type"), ("jaar", "Jaar")]
+PROJECT_FACET_SQL = {f: e.format(t="") for f, e in PROJECT_FACET_EXPRESSIONS}
+
+_facet_cache = {}
+_FACET_CACHE_MAX = 64
+
+def data_generation(tabel, readonly=False):
+    """Teller die door triggers verhoogd wordt bij elke wijziging in `tabel`."""
+    try:
+        row = db_query("SELECT gen FROM data_generation WHERE tabel=?", (tabel,), fetchone=True, readonly=readonly)
+    except sqlite3.OperationalError:
+        return 0
+    return row["gen"] if row else 0
+
+def project_facet_where(selected, exclude=None):
+    """(voorwaarden, parameters) voor de geselecteerde facetwaarden."""
+    conds, params = [], []
+    for facet, value in selected.items():
+        if facet != exclude and value is not None:
+            conds.append(f"{PROJECT_FACET_SQL[facet]} = ?")
+            params.append(value)
+    return conds, params
+
+def project_facet_counts(selected=None, readonly=False, archive=False):
+    """
+    {facet: [(waarde, aantal), ...]} voor de huidige selectie (nieuwste data).
+    archive=True telt het archief mee (GROUP BY per deel, daarna opgeteld).
+    """
+    selected = {k: v for k, v in (selected or {}).items() if v is not None}
+    archive = archive and archive_available()
+    gen = data_generation("projects", readonly=readonly)  # archiveren wijzigt ook projects
+    key = (archive,) + tuple(sorted(selected.items()))
+    hit = _facet_cache.get(key)
+    if hit and hit[0] == gen:
+        return hit[1]
+
+    result = {facet: [] for facet, _ in PROJECT_FACETS}
+    if archive:
+        for facet, _ in PROJECT_FACETS:
+            conds, params = project_facet_where(selected, exclude=facet)
+            where = (" WHERE " + " AND ".join(conds)) if conds else ""
+            query, params = project_union(
+                f"SELECT {PROJECT_FACET_SQL[facet]} AS waarde, COUNT(*) AS n FROM {{src}}{where} GROUP BY 1",
+                params, archive=True)
+            rows = db_query(f"SELECT waarde, SUM(n) AS n FROM ({query}) GROUP BY 1 ORDER BY n DESC, waarde",
+                            params, fetchall=True, readonly=readonly, archive=True)
+            result[facet] = [(r["waarde"], r["n"]) for r in rows]
+    elif not selected:
+        for r in db_query("SELECT facet, waarde, aantal FROM project_facets WHERE aantal > 0 "
+                          "ORDER BY facet, aantal DESC, waarde", fetchall=True, readonly=readonly):
+            if r["facet"] in result:
+                result[r["facet"]].append((r["waarde"], r["aantal"]))
+    else:
+        for facet, _ in PROJECT_FACETS:
+            # Elk facet telt zonder zijn eigen selectie, zodat alternatieven zichtbaar blijven
+            conds, params = project_facet_where(selected, exclude=facet)
+            where = (" WHERE " + " AND ".join(conds)) if conds else ""
+            rows = db_query(f"SELECT {PROJECT_FACET_SQL[facet]} AS waarde, COUNT(*) AS n FROM projects{where} "
+                            f"GROUP BY 1 ORDER BY n DESC, waarde", tuple(params), fetchall=True, readonly=readonly)
+            result[facet] = [(r["waarde"], r["n"]) for r in rows]
+
+    if len(_facet_cache) >= _FACET_CACHE_MAX:
+        _facet_cache.clear()
+    _facet_cache[key] = (gen, result)
+    return result
+
+# ------------------ Hoofdstuk 2.I: Statistieken (dashboard) ------------------
+# Het dashboard leest enkel samenvattingstabellen die door triggers
+# bijgehouden worden: project_facets (projecten per bureau/status/jaar) en
+# stats_buckets (nieuwe contacten per maand, wijzigingen per collega).
+# Openen kost dus O(aantal buckets), ongeacht de grootte van de tabellen.
+# project_facets telt enkel actieve projecten (zo blijven de zoekfacetten
+# kloppen); gearchiveerde projecten staan in de reeksen archief_<facet> van
+# stats_buckets, die archive_projects en restore_projects in dezelfde
+# transactie bijwerken. Het dashboard telt beide op.
+
+ARCHIVE_STATS_FACETS = ("bureau", "status", "jaar")
+ARCHIVE_STATS_SERIES = {f"archief_{f}": f for f in ARCHIVE_STATS_FACETS}
+
+def _archive_stats_update(conn, src, where, params, sign):
+    """archief_<facet>-reeksen bijwerken met `sign` per project uit `src` dat aan `where` voldoet."""
+    expressions = dict(PROJECT_FACET_EXPRESSIONS)
+    for f in ARCHIVE_STATS_FACETS:
+        conn.execute(f"INSERT INTO main.stats_buckets (reeks, bucket, aantal) "
+                     f"SELECT 'archief_{f}', {expressions[f].format(t='')}, {int(sign)} * COUNT(*) "
+                     f"FROM {src} WHERE {where} GROUP BY 2 "
+                     f"ON CONFLICT(reeks, bucket) DO UPDATE SET aantal = aantal + excluded.aantal", params)
+    marks = ", ".join("?" * len(ARCHIVE_STATS_SERIES))
+    conn.execute(f"DELETE FROM main.stats_buckets WHERE reeks IN ({marks}) AND aantal <= 0",
+                 tuple(ARCHIVE_STATS_SERIES))
+
+def _archive_counts(expressions):
+    """
+    {naam: [(waarde, aantal), ...]} per expressie over de projecten in het
+    archiefbestand. Via een eigen alleen-lezen connectie, zodat dit ook
+    binnen een lopende transactie (migratie) kan, waar ATTACH niet mag.
+    """
+    if not archive_available():
+        return {}
+    conn = sqlite3.connect(readonly_uri(ARCHIVE_PATH), uri=True)
+    try:
+        return {name: conn.execute(f"SELECT {e}, COUNT(*) FROM projects GROUP BY 1").fetchall()
+                for name, e in expressions.items()}
+    except sqlite3.OperationalError:
+        return {}  # archief zonder (volledige) projecttabel
+    finally:
+        conn.close()
+
+def _archive_stats_rebuild(conn):
+    """archief_<facet>-reeksen opnieuw tellen uit het archiefbestand."""
+    marks = ", ".join("?" * len(ARCHIVE_STATS_SERIES))
+    conn.execute(f"DELETE FROM stats_buckets WHERE reeks IN ({marks})", tuple(ARCHIVE_STATS_SERIES))
+    expressions = dict(PROJECT_FACET_EXPRESSIONS)
+    counts = _archive_counts({f"archief_{f}": expressions[f].format(t="") for f in ARCHIVE_STATS_FACETS})
+    conn.executemany("INSERT INTO stats_buckets (reeks, bucket, aantal) VALUES (?, ?, ?)",
+                     [(reeks, bucket, n) for reeks, rows in counts.items() for bucket, n in rows])
+
+def rebuild_statistics(conn=None):
+    """
+    Herbereken alle samenvattingen vanaf de brontabellen (eenmalig of na import).
+    Zonder aanmaakdatum wordt laatst_gewijzigd_op als benadering gebruikt, en
+    'wijzigingen' telt na een herberekening enkel de laatste wijziging per rij.
+    """
+    own = conn is None
+    conn = conn or db_connect()
+    try:
+        if own:
+            conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM project_facets")
+        for f, e in PROJECT_FACET_EXPRESSIONS:
+            conn.execute(f"INSERT INTO project_facets (facet, waarde, aantal) "
+                         f"SELECT '{f}', {e.format(t='')}, COUNT(*) FROM projects GROUP BY 2")
+        conn.execute("DELETE FROM stats_buckets")
+        month = STATS_SERIES_SQL["nieuwe_bedrijven"].format(t="contacts")
+        conn.execute(f"INSERT INTO stats_buckets (reeks, bucket, aantal) "
+                     f"SELECT CASE WHEN type='persoon' THEN 'nieuwe_personen' ELSE 'nieuwe_bedrijven' END, {month}, COUNT(*) "
+                     f"FROM contacts GROUP BY 1, 2")
+        conn.execute("INSERT INTO stats_buckets (reeks, bucket, aantal) "
+                     "SELECT 'wijzigingen', wie, SUM(n) FROM ("
+                     " SELECT IFNULL(laatst_gewijzigd_door,'') AS wie, COUNT(*) AS n FROM contacts GROUP BY 1"
+                     " UNION ALL"
+                     " SELECT IFNULL(laatst_gewijzigd_door,''), COUNT(*) FROM projects GROUP BY 1"
+                     ") GROUP BY wie")
+        _archive_stats_rebuild(conn)
+        archived = _archive_counts({"wijzigingen": "IFNULL(laatst_gewijzigd_door,'')"}).get("wijzigingen", [])
+        conn.executemany("INSERT INTO stats_buckets (reeks, bucket, aantal) VALUES ('wijzigingen', ?, ?) "
+                         "ON CONFLICT(reeks, bucket) DO UPDATE SET aantal = aantal + excluded.aantal", archived)
+        if own:
+            conn.commit()
+    except Exception:
+        if own:
+            conn.rollback()
+        raise
+    finally:
+        if own:
+            db_close(conn)
+
+def dashboard_data():
+    """{sectie: [(bucket, aantal), ...]} uit de samenvattingstabellen (projecten: actief + archief)."""
+    projects = {}
+    for r in db_query("SELECT facet, waarde, aantal FROM project_facets WHERE facet IN ('bureau','status','jaar') "
+                      "AND aantal > 0", fetchall=True):
+        key = (r["facet"], r["waarde"])
+        projects[key] = projects.get(key, 0) + r["aantal"]
+    data = {}
+    for r in db_query("SELECT reeks, bucket, aantal FROM stats_buckets WHERE aantal > 0", fetchall=True):
+        if r["reeks"] in ARCHIVE_STATS_SERIES:
+            key = (ARCHIVE_STATS_SERIES[r["reeks"]], r["bucket"])
+            projects[key] = projects.get(key, 0) + r["aantal"]
+        else:
+            data.setdefault(r["reeks"], []).append((r["bucket"], r["aantal"]))
+    for (facet, waarde), n in projects.items():
+        data.setdefault(f"projecten_{facet}", []).append((waarde, n))
+    for key, rows in data.items():
+        # Tijdreeksen chronologisch, de rest van groot naar klein
+        if key in ("projecten_jaar", "nieuwe_bedrijven", "nieuwe_personen"):
+            rows.sort()
+        else:
+            rows.sort(key=lambda x: (-x[1], x[0]))
+    return data
+
+# ------------------ Hoofdstuk 2.J: Geografie (nabijheid via R*Tree) ------------------
+# Projecten en contacten krijgen coördinaten uit een lokale tabel met
+# postcodecentroïden (geen netwerk nodig). Triggers houden de R*Tree-tabellen
+# project_geo en contact_geo bij; een straalzoekopdracht vraagt eerst de
+# omhullende rechthoek aan de R*Tree en filtert dan exact op afstand.
+# Een volledige lijst kan ingelezen worden uit postcode_centroids.csv
+# (kolommen: postcode, gemeente, lat, lon).
+
+import re
+import math
+
+POSTCODE_CENTROIDS_CSV = os.path.join(BASE_DIR, "postcode_centroids.csv")
+
+# Kleine ingebouwde lijst — vervang door CSV om ALLES te hebben
+DEFAULT_POSTCODE_CENTROIDS = [
+    ("1000", "Brussel", 50.8467, 4.3525), ("2000", "Antwerpen", 51.2194, 4.4025),
+    ("2800", "Mechelen", 51.0259, 4.4776), ("3000", "Leuven", 50.8798, 4.7005),
+    ("3500", "Hasselt", 50.9307, 5.3325), ("8000", "Brugge", 51.2093, 3.2247),
+    ("8400", "Oostende", 51.2154, 2.9286), ("8500", "Kortrijk", 50.8279, 3.2649),
+    ("8800", "Roeselare", 50.9465, 3.1228), ("9000", "Gent", 51.0543, 3.7174),
+    ("9100", "Sint-Niklaas", 51.1650, 4.1437), ("9300", "Aalst", 50.9378, 4.0403),
+]
+
+GEO_TABLES = {"projects": "project_geo", "contacts": "contact_geo"}
+EARTH_RADIUS_KM = 6371.0
+
+def geo_rebuild(conn=None):
+    """Vul project_geo en contact_geo volledig opnieuw (na import van centroïden)."""
+    own = conn is None
+    conn = conn or db_connect()
+    try:
+        has_archive = conn.execute("SELECT 1 FROM sqlite_master WHERE name='project_archive'").fetchone()
+        for tabel, geo in GEO_TABLES.items():
+            src = tabel
+            if tabel == "projects" and has_archive:
+                # Gearchiveerde projecten blijven vindbaar via nabijheid (Hoofdstuk 2.Q)
+                src = "(SELECT id, postcode, stad FROM projects UNION ALL SELECT id, postcode, stad FROM project_archive)"
+            conn.execute(f"DELETE FROM {geo}")
+            conn.execute(f"INSERT INTO {geo} (id, min_lat, max_lat, min_lon, max_lon) "
+                         f"SELECT t.id, c.lat, c.lat, c.lon, c.lon FROM {src} t "
+                         f"JOIN postcode_centroids c ON c.postcode = {GEO_POSTCODE_SQL.format(t='t')}")
+        if own:
+            conn.commit()
+    finally:
+        if own:
+            db_close(conn)
+
+def import_postcode_centroids(path=None):
+    """Lees postcode_centroids.csv in (vervangt de tabel) en geocodeer alles opnieuw."""
+    path = path or POSTCODE_CENTROIDS_CSV
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(2048)
+        f.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        rows = []
+        for r in csv.DictReader(f, dialect=dialect):
+            try:
+                rows.append(((r.get("postcode") or "").strip(), (r.get("gemeente") or r.get("stad") or "").strip(),
+                             float(str(r["lat"]).replace(",", ".")), float(str(r["lon"]).replace(",", "."))))
+            except (KeyError, ValueError):
+                continue
+    conn = db_connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM postcode_centroids")
+        conn.executemany("INSERT OR REPLACE INTO postcode_centroids (postcode, gemeente, lat, lon) VALUES (?,?,?,?)",
+                         [r for r in rows if r[0]])
+        geo_rebuild(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        db_close(conn)
+    return len(rows)
+
+def geo_center(text):
+    """(lat, lon) voor een postcode of gemeentenaam, of None."""
+    text = (text or "").strip()
+    if not text:
+        return None
+    row = db_query("SELECT lat, lon FROM postcode_centroids WHERE postcode=? "
+                   "UNION ALL SELECT lat, lon FROM postcode_centroids WHERE gemeente=? COLLATE NOCASE LIMIT 1",
+                   (text, text), fetchone=True)
+    return (row["lat"], row["lon"]) if row else None
+
+def geo_distance_km(lat1, lon1, lat2, lon2):
+    """Afstand over het aardoppervlak (haversine)."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def geo_bbox(lat, lon, km):
+    """Omhullende rechthoek (min_lat, max_lat, min_lon, max_lon) rond een punt."""
+    dlat = km / 111.32
+    dlon = km / (111.32 * max(0.01, math.cos(math.radians(lat))))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+def geo_near(tabel, lat, lon, km):
+    """Lijst (id, afstand_km) binnen `km` van het punt, dichtste eerst."""
+    min_lat, max_lat, min_lon, max_lon = geo_bbox(lat, lon, km)
+    rows = db_query(f"SELECT id, min_lat, min_lon FROM {GEO_TABLES[tabel]} "
+                    "WHERE min_lat <= ? AND max_lat >= ? AND min_lon <= ? AND max_lon >= ?",
+                    (max_lat, min_lat, max_lon, min_lon), fetchall=True)
+    hits = [(r["id"], geo_distance_km(lat, lon, r["min_lat"], r["min_lon"])) for r in rows]
+    return sorted([h for h in hits if h[1] <= km], key=lambda h: h[1])
+
+def geo_near_condition(tabel, lat, lon, km):
+    """(voorwaarde, parameters) om een zoekopdracht te beperken tot een straal."""
+    ids = [rid for rid, _ in geo_near(tabel, lat, lon, km)]
+    return "id IN (SELECT value FROM json_each(?))", [json.dumps(ids)]
+
+# ------------------ Hoofdstuk 2.K: Alleen-lezen toegang & lokale momentopname ------------------
+# Raadpleegvensters (project zoeken/detail, contactpagina) lezen via een
+# URI-connectie met mode=ro: ze nemen nooit een schrijflock. Optioneel lezen
+# ze uit een lokale kopie die periodiek via de backup-API ververst wordt, zodat
+# ze ook niet wachten op een collega die net een grote wijziging opslaat.
+
+import tempfile
+
+READONLY_SNAPSHOT = False          # True → raadplegen via lokale momentopname
+SNAPSHOT_PATH = os.path.join(tempfile.gettempdir(), "dela_database_snapshot.db")
+SNAPSHOT_REFRESH_SEC = 120
+
+_snapshot_thread = None
+_snapshot_stop = threading.Event()
+_snapshot_taken_at = None
+
+def readonly_db_path():
+    """Pad voor alleen-lezen connecties: de momentopname indien actief en aanwezig."""
+    if READONLY_SNAPSHOT and _snapshot_taken_at and os.path.exists(SNAPSHOT_PATH):
+        return SNAPSHOT_PATH
+    return DB_PATH
+
+def snapshot_refresh():
+    """Ververs de lokale momentopname (lezers van de kopie zien ze in één keer wisselen)."""
+    global _snapshot_taken_at
+    src = sqlite3.connect(readonly_uri(DB_PATH), uri=True)
+    dst = sqlite3.connect(SNAPSHOT_PATH)
+    try:
+        src.backup(dst, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP)
+    finally:
+        dst.close()
+        src.close()
+    _snapshot_taken_at = datetime.now()
+    return _snapshot_taken_at
+
+def snapshot_label():
+    """Korte vermelding voor venstertitels, bv. ' (momentopname 10:42)'."""
+    if READONLY_SNAPSHOT and _snapshot_taken_at:
+        return f" (momentopname {_snapshot_taken_at:%H:%M})"
+    return ""
+
+def start_snapshot_refresher():
+    """Start (eenmalig) de achtergrondthread die de momentopname ververst."""
+    global _snapshot_thread
+    if not READONLY_SNAPSHOT or (_snapshot_thread and _snapshot_thread.is_alive()):
+        return _snapshot_thread
+    _snapshot_stop.clear()
+
+    def loop():
+        while True:
+            try:
+                snapshot_refresh()
+            except (sqlite3.Error, OSError) as e:
+                logger.error("momentopname mislukt: %s", e)
+            if _snapshot_stop.wait(SNAPSHOT_REFRESH_SEC):
+                break
+
+    _snapshot_thread = threading.Thread(target=loop, name="dela-snapshot", daemon=True)
+    _snapshot_thread.start()
+    return _snapshot_thread
+
+# ------------------ Hoofdstuk 2.L: Contactindex in het geheugen ------------------
+# Type-ahead zonder SQL per toetsaanslag. Bij de eerste zoekvraag worden alle
+# contacten één keer geladen als compacte records (__slots__), met een
+# gesorteerde lijst van zoektermen (woorden uit naam, bedrijf, e-mail, stad en
+# genormaliseerde telefoonnummers). Prefix-zoeken is dan een bisect.
+# Wijzigingen worden bijgewerkt via contact_changes: enkel rijen met een
+# hogere generatie dan de index worden opnieuw gelezen. De generatie zelf
+# wordt hoogstens om de CONTACT_INDEX_RECHECK_SEC seconden nagekeken (eigen
+# schrijfacties forceren een controle via db_close), zodat een toetsaanslag
+# normaal geen enkele query kost.
+
+import sys
+import bisect
+import unicodedata
+from array import array
+
+CONTACT_INDEX_ENABLED = True
+CONTACT_INDEX_SCAN_MAX = 2000   # max. kandidaten per zoekvraag (korte prefixen als "a")
+CONTACT_INDEX_RECHECK_SEC = 2.0 # wijzigingen van anderen verschijnen binnen deze tijd
+CONTACT_INDEX_SELECT = ("SELECT id, type, display_name, bedrijf, email, stad, "
+                        "gsm_cc, gsm_num, tel_cc, tel_num FROM contacts")
+
+class ContactEntry:
+    """Eén contact in de index; enkel wat de type-ahead toont of doorzoekt."""
+    __slots__ = ("id", "type", "naam", "bedrijf", "email", "stad", "telefoon")
+
+    def __init__(self, row):
+        self.id = row["id"]
+        self.type = sys.intern(row["type"] or "")
+        self.naam = row["display_name"] or ""
+        self.bedrijf = sys.intern(row["bedrijf"] or "")
+        self.email = (row["email"] or "").lower()
+        self.stad = sys.intern(row["stad"] or "")
+        # Genormaliseerd: enkel cijfers, zonder voorloopnullen (0470… en 470… vinden hetzelfde)
+        self.telefoon = (only_digits(row["gsm_num"] or "") or only_digits(row["tel_num"] or "")).lstrip("0")
+
+    def terms(self):
+        """Zoektermen: woorden uit naam, bedrijf en stad, plus e-mail en telefoon."""
+        words = {sys.intern(w) for text in (self.naam, self.bedrijf, self.stad) for w in _index_words(text)}
+        words.add(self.email)
+        words.add(self.telefoon)
+        words.discard("")
+        return words
+
+    def haystack(self):
+        """Alle termen in één string (" term term …"), voor snelle controle per kandidaat."""
+        text = _index_fold(f"{self.naam} {self.bedrijf} {self.stad}").translate(_INDEX_SEPARATORS)
+        return f" {' '.join(text.split())} {self.email} {self.telefoon}"
+
+_INDEX_SEPARATORS = str.maketrans(",;/()-", "      ")
+
+def _index_fold(text):
+    """Kleine letters zonder accenten (é → e), zoals de gebruiker typt."""
+    text = text or ""
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+
+def _index_words(text):
+    return _index_fold(text).translate(_INDEX_SEPARATORS).split()
+
+class ContactIndex:
+    """Gesorteerde termen (keys) met parallel het contact-id (ids)."""
+
+    def __init__(self):
+        self.entries = {}          # id -> ContactEntry
+        self.keys = []             # gesorteerde termen
+        self.ids = array("q")      # ids[i] hoort bij keys[i]
+        self.gen = None
+        self.checked = 0.0         # time.monotonic() van de laatste generatiecontrole
+
+    def load(self):
+        # Generatie en rijen uit dezelfde bron (live of momentopname) en in één
+        # leestransactie, zodat ze bij elkaar horen
+        conn = db_connect(readonly=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute("SELECT gen FROM data_generation WHERE tabel='contacts'").fetchone()
+            except sqlite3.OperationalError:
+                row = None
+            gen = row["gen"] if row else 0
+            rows = conn.execute(CONTACT_INDEX_SELECT).fetchall()
+        finally:
+            conn.close()
+        entries, keys, ids = {}, [], []
+        for r in rows:
+            e = ContactEntry(r)
+            entries[e.id] = e
+            for t in e.terms():
+                keys.append(t)
+                ids.append(e.id)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.entries = entries
+        self.keys = [keys[i] for i in order]
+        self.ids = array("q", [ids[i] for i in order])
+        self.gen = gen
+
+    def _remove(self, cid):
+        e = self.entries.pop(cid, None)
+        if not e:
+            return
+        for t in e.terms():
+            lo = bisect.bisect_left(self.keys, t)
+            hi = bisect.bisect_right(self.keys, t, lo)
+            for i in range(lo, hi):
+                if self.ids[i] == cid:
+                    del self.keys[i]
+                    del self.ids[i]
+                    break
+
+    def _add(self, row):
+        e = ContactEntry(row)
+        self.entries[e.id] = e
+        for t in e.terms():
+            i = bisect.bisect_right(self.keys, t)
+            self.keys.insert(i, t)
+            self.ids.insert(i, e.id)
+
+    def refresh(self):
+        """Laad bij eerste gebruik; daarna enkel de gewijzigde contacten bijwerken."""
+        now = time.monotonic()
+        if self.gen is None:
+            self.load()
+            self.checked = now
+            return
+        if now - self.checked < CONTACT_INDEX_RECHECK_SEC:
+            return
+        self.checked = now
+        gen = data_generation("contacts", readonly=True)
+        if gen == self.gen:
+            return
+        if gen < self.gen:
+            self.load()  # generatie teruggelopen (back-up teruggezet): alles opnieuw
+            return
+        changed = [r["id"] for r in db_query("SELECT id FROM contact_changes WHERE gen > ?",
+                                             (self.gen,), fetchall=True, readonly=True)]
+        if len(changed) > len(self.entries) // 4:
+            self.load()  # grote wijziging (import, bulk): opnieuw opbouwen is sneller
+            return
+        rows = db_query(CONTACT_INDEX_SELECT + " WHERE id IN (SELECT value FROM json_each(?))",
+                        (json.dumps(changed),), fetchall=True, readonly=True)
+        for cid in changed:
+            self._remove(cid)
+        for r in rows:
+            self._add(r)
+        self.gen = gen
+
+    def _range(self, word):
+        lo = bisect.bisect_left(self.keys, word)
+        return lo, bisect.bisect_left(self.keys, word + "\uffff", lo)
+
+    def search(self, text, limit=10):
+        """Contacten waarvan elk getypt woord het begin van een zoekterm is."""
+        words = {w.lstrip("0") if w.isdigit() else w for w in _index_words(text)}
+        words.discard("")
+        if not words:
+            return []
+        # Smalste bereik eerst (in volgorde van de gevonden term); de andere
+        # woorden filteren via hun id-verzameling of, bij een breed bereik, per kandidaat
+        ranges = sorted(((w,) + self._range(w) for w in words), key=lambda r: r[2] - r[1])
+        _, lo, hi = ranges[0]
+        id_sets, broad = [], []
+        for w, olo, ohi in ranges[1:]:
+            if ohi - olo <= CONTACT_INDEX_SCAN_MAX:
+                id_sets.append(set(self.ids[olo:ohi]))
+            else:
+                broad.append(" " + w)
+        found, seen = [], set()
+        for cid in self.ids[lo:min(hi, lo + CONTACT_INDEX_SCAN_MAX)]:
+            if cid in seen or not all(cid in ids for ids in id_sets):
+                continue
+            seen.add(cid)
+            e = self.entries[cid]
+            if broad:
+                hay = e.haystack()
+                if not all(w in hay for w in broad):
+                    continue
+            found.append(e)
+            if len(found) >= limit:
+                break
+        return sorted(found, key=lambda e: e.naam.lower())
+
+_contact_index = ContactIndex()
+
+def contact_index_touch():
+    """Volgende zoekvraag controleert de generatie meteen (na een eigen schrijfactie)."""
+    _contact_index.checked = 0.0
+
+def contact_index_reset():
+    """Index weggooien; de volgende zoekvraag laadt alles opnieuw (bv. na db_restore)."""
+    global _contact_index
+    _contact_index = ContactIndex()
+
+def contact_index_search(text, limit=10):
+    """Type-ahead over contacten; [] als de index uitgeschakeld is."""
+    if not CONTACT_INDEX_ENABLED:
+        return []
+    try:
+        _contact_index.refresh()
+    except sqlite3.Error as e:
+        log_once("contactindex", "contactindex niet beschikbaar: %s", e)
+        return []
+    return _contact_index.search(text, limit)
+
+# ------------------ Hoofdstuk 2.M: Rijksregisternummer ------------------
+# Het formulier toont aa.bb.cc-ddd.ee; contacts.rrn bevat de 11 cijfers en
+# wordt door triggers bijgehouden (NULL als het nummer ongeldig is). De unieke
+# index op rrn maakt opzoeken een puntquery, ook bij heel grote adresboeken.
+
+def rrn_problem(digits):
+    """None als de 11 cijfers een geldig rijksregisternummer vormen, anders de reden."""
+    if len(digits) != 11 or not digits.isdigit():
+        return "geen 11 cijfers"
+    controle = int(digits[9:])
+    basis = int(digits[:9])
+    # Geboren vanaf 2000: controlegetal over '2' + de eerste 9 cijfers
+    if controle not in (97 - basis % 97, 97 - (2_000_000_000 + basis) % 97):
+        return "controlegetal klopt niet"
+    return None
+
+def rrn_format(digits):
+    return f"{digits[0:2]}.{digits[2:4]}.{digits[4:6]}-{digits[6:9]}.{digits[9:11]}"
+
+def rrn_from_search(text):
+    """De 11 cijfers als de zoekterm een geldig rijksregisternummer is, anders None."""
+    text = (text or "").strip()
+    if not text or re.search(r"[^\d.\-\s/]", text):
+        return None
+    digits = only_digits(text)
+    return None if rrn_problem(digits) else digits
+
+def contact_by_rrn(digits):
+    """Het contact met dit rijksregisternummer (unieke index), of None."""
+    return db_query("SELECT id, display_name FROM contacts WHERE rrn=?", (digits,), fetchone=True)
+
+def rrn_open_issues():
+    """Nummers die de migratie niet kon omzetten en nog niet verbeterd zijn."""
+    return db_query("""
+        SELECT i.contact_id, c.display_name, c.rijksregisternummer, i.probleem
+        FROM rrn_issues i JOIN contacts c ON c.id = i.contact_id
+        WHERE c.rrn IS NULL AND TRIM(IFNULL(c.rijksregisternummer,'')) <> ''
+        ORDER BY c.sort_key
+    """, fetchall=True)
+
+# ------------------ Hoofdstuk 2.N: E-maildomeinen & bedrijfskoppeling ------------------
+# contacts.email_domain wordt door triggers bijgehouden en is geïndexeerd, zodat
+# "iedereen @aannemer.be" een index-seek is. Het voorstel om personen aan hun
+# bedrijf te koppelen loopt één keer over de contacten, gesorteerd op domein.
+
+FREEMAIL_DOMAINS = {
+    "gmail.com", "hotmail.com", "hotmail.be", "outlook.com", "outlook.be", "live.com", "live.be",
+    "yahoo.com", "yahoo.fr", "icloud.com", "me.com", "msn.com", "telenet.be", "skynet.be",
+    "proximus.be", "scarlet.be", "belgacom.net", "pandora.be", "hotmail.nl", "ziggo.nl", "kpnmail.nl",
+}
+
+def email_domain_from_search(text):
+    """'@aannemer.be' of 'aannemer.be' na een '@' → 'aannemer.be'; anders None."""
+    text = (text or "").strip().lower()
+    if text.startswith("@") and len(text) > 1 and " " not in text:
+        return text[1:]
+    return None
+
+def propose_company_links():
+    """
+    Stel per domein het bedrijf voor aan personen met hetzelfde e-maildomein
+    die (nog) niet aan dat bedrijf gekoppeld zijn. Enkel domeinen met precies
+    één bedrijf; gratis mailboxen worden overgeslagen.
+    Geeft tuples (persoon_id, persoon, huidig_bedrijf, voorgesteld_bedrijf, domein).
+    """
+    rows = db_query("""
+        SELECT id, type, display_name, bedrijf, email_domain FROM contacts
+        WHERE email_domain IS NOT NULL
+        ORDER BY email_domain
+    """, fetchall=True)
+    proposals = []
+    i = 0
+    while i < len(rows):
+        domain = rows[i]["email_domain"]
+        j = i
+        while j < len(rows) and rows[j]["email_domain"] == domain:
+            j += 1
+        group = rows[i:j]
+        i = j
+        if domain in FREEMAIL_DOMAINS:
+            continue
+        companies = {(r["bedrijf"] or "").strip() for r in group if r["type"] == "bedrijf"}
+        companies.discard("")
+        if len(companies) != 1:
+            continue
+        company = companies.pop()
+        for r in group:
+            if r["type"] == "persoon" and (r["bedrijf"] or "").strip() != company:
+                proposals.append((r["id"], r["display_name"] or "", r["bedrijf"] or "", company, domain))
+    return proposals
+
+def apply_company_links(proposals, user=None):
+    """Voer voorstellen uit als bulkwijzigingen (één per bedrijf, dus ongedaan te maken)."""
+    per_company = {}
+    for pid, _naam, _huidig, company, _domein in proposals:
+        per_company.setdefault(company, []).append(pid)
+    return [db_bulk_update("contacts", "bedrijf", company, ids, user)
+            for company, ids in per_company.items()]
+
+# ------------------ Hoofdstuk 2.O: Zoeken, projectnummers, import & export ------------------
+# Gedeeld door de zoekvensters en de command line (dela_cli.py).
+
+def contact_search_where(term):
+    """
+    (voorwaarden, parameters) voor een vrije zoekterm op contacten:
+    een geldig rijksregisternummer of '@domein' is een exacte index-lookup,
+    al de rest een LIKE op naam, bedrijf en e-mail.
+    """
+    digits = rrn_from_search(term)
+    if digits:
+        return ["rrn = ?"], [digits]
+    domain = email_domain_from_search(term)
+    if domain:
+        return ["email_domain = ?"], [domain]
+    kw = f"%{(term or '').strip()}%"
+    return ["(bedrijf LIKE ? OR voornaam LIKE ? OR achternaam LIKE ? OR email LIKE ?)"], [kw, kw, kw, kw]
+
+_company_names = {"gen": None, "names": []}
+
+def company_names():
+    """Alle bedrijfsnamen (voor keuzelijsten), herberekend enkel als contacten wijzigden."""
+    gen = data_generation("contacts")
+    if _company_names["gen"] != gen:
+        _company_names["names"] = [r["bedrijf"] for r in db_query(
+            "SELECT bedrijf FROM contacts WHERE type='bedrijf' AND bedrijf<>'' ORDER BY bedrijf", fetchall=True)]
+        _company_names["gen"] = gen
+    return _company_names["names"]
+
+def project_search_where(term):
+    """(voorwaarden, parameters) voor een vrije zoekterm op projecten."""
+    term = (term or "").strip()
+    if not term:
+        return [], []
+    kw = f"%{term}%"
+    return ["(projectnummer LIKE ? OR klant LIKE ? OR projectnaam LIKE ? OR adres LIKE ?)"], [kw, kw, kw, kw]
+
+def next_project_number(bureau, conn=None):
+    """Volgend vrij projectnummer: Delafontaine numeriek, Vector met prefix 'V'."""
+    own = conn is None
+    conn = conn or db_connect()
+    try:
+        # Gearchiveerde nummers tellen mee (project_archive staat in de hoofddatabase)
+        numbers = "(SELECT projectnummer FROM projects UNION ALL SELECT projectnummer FROM project_archive)"
+        if bureau == "Delafontaine":
+            row = conn.execute(
+                f"SELECT projectnummer FROM {numbers} "
+                "WHERE projectnummer NOT LIKE 'V%' "
+                "ORDER BY CAST(projectnummer AS INTEGER) DESC LIMIT 1").fetchone()
+            return str((int(row[0]) if row else 0) + 1)
+        row = conn.execute(
+            f"SELECT projectnummer FROM {numbers} "
+            "WHERE projectnummer LIKE 'V%' "
+            "ORDER BY CAST(SUBSTR(projectnummer,2) AS INTEGER) DESC LIMIT 1").fetchone()
+        return f"V{(int(row[0][1:]) if row else 0) + 1}"
+    finally:
+        if own:
+            db_close(conn)
+
+def reserve_project_number(bureau, user=None):
+    """
+    Reserveer het volgende nummer met een lege projectrij (status 'gereserveerd').
+    BEGIN IMMEDIATE: twee gelijktijdige aanvragen krijgen nooit hetzelfde nummer.
+    """
+    user = user or current_user or ""
+    conn = db_connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        nummer = next_project_number(bureau, conn)
+        stamp = now_str()
+        conn.execute("INSERT INTO projects (bureau, projectnummer, status, jaar, laatst_gewijzigd_door, laatst_gewijzigd_op) "
+                     "VALUES (?,?,?,?,?,?)", (bureau, nummer, "gereserveerd", stamp[:4], user, stamp))
+        conn.commit()
+        return nummer
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        db_close(conn)
+
+EXPORT_COLUMNS = {"contacts": ["id"] + CONTACT_HEADERS, "projects": ["id"] + PROJECT_HEADERS}
+IMPORT_CHUNK = 1000
+
+def iter_rows(table, where=None, params=(), columns=None, limit=None, archive=False):
+    """Rijen één voor één uit de cursor (geen fetchall), als dicts; archive=True: projecten ook uit het archief."""
+    columns = columns or EXPORT_COLUMNS[table]
+    sql = f"SELECT {', '.join(columns)} FROM {{src}}"
+    if where:
+        sql += " WHERE " + " AND ".join(f"({w})" for w in where)
+    if table == "projects":
+        sql, params = project_union(sql, params, archive=archive)
+    else:
+        sql = sql.format(src=table)
+    sql += " ORDER BY id"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    conn = db_connect(readonly=True, archive=archive and table == "projects")
+    try:
+        for row in conn.execute(sql, tuple(params)):
+            yield dict(zip(columns, row))
+    finally:
+        conn.close()
+
+def _import_text(value):
+    """Waarde uit een importbestand als tekst; JSON kan ook getallen of booleans bevatten."""
+    return "" if value is None else str(value).strip()
+
+def import_rows(table, rows, user=None):
+    """
+    Voeg rijen (dicts, bv. uit csv.DictReader) toe in één transactie, per
+    IMPORT_CHUNK tegelijk; onbekende kolommen worden genegeerd. Geeft het aantal terug.
+    """
+    columns = [c for c in EXPORT_COLUMNS[table] if c not in ("id", "laatst_gewijzigd_door", "laatst_gewijzigd_op")]
+    sql = (f"INSERT INTO {table} ({', '.join(columns)}, laatst_gewijzigd_door, laatst_gewijzigd_op) "
+           f"VALUES ({', '.join('?' * (len(columns) + 2))})")
+    user = user or current_user or ""
+    stamp = now_str()
+    n = 0
+    conn = db_connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        batch = []
+        for row in rows:
+            batch.append([_import_text(row.get(c)) for c in columns] + [user, stamp])
+            if len(batch) >= IMPORT_CHUNK:
+                conn.executemany(sql, batch)
+                n += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(sql, batch)
+            n += len(batch)
+        conn.commit()
+        return n
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        db_close(conn)
+
+# ------------------ Hoofdstuk 2.P: Bijlagen (content-addressed blob-store) ------------------
+# Plannen, vergunningen en foto's per project. Elk bestand wordt tijdens het
+# kopiëren gehasht (SHA-256) en bewaard onder bijlagen/objects/ab/cdef…; een
+# identiek bestand wordt dus maar één keer opgeslagen. De database bewaart
+# enkel metadata + hash, zodat `projects` klein en snel blijft.
+# Miniaturen worden in een procespool gemaakt (PIL, enkel in de werkprocessen
+# geïmporteerd zodat dela_core zonder PIL bruikbaar blijft).
+
+import hashlib
+
+ATTACH_DIR = os.path.join(BASE_DIR, "bijlagen")
+ATTACH_CHUNK = 1024 * 1024
+ATTACH_CATEGORIES = ["Plan", "Vergunning", "Foto", "Ander"]
+THUMB_SIZE = (160, 160)
+THUMB_WORKERS = 2
+BLOB_GC_GRACE_SEC = 3600     # jongere blobs nooit opruimen (kunnen nog aan een bijlage gekoppeld worden)
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tif", ".tiff", ".webp"}
+
+_thumb_pool = None
+
+def blob_path(sha256):
+    return os.path.join(ATTACH_DIR, "objects", sha256[:2], sha256[2:])
+
+def thumb_path(sha256):
+    return os.path.join(ATTACH_DIR, "thumbs", sha256[:2], sha256[2:] + ".png")
+
+def blob_store(src_path):
+    """
+    Kopieer een bestand in de store en geef (sha256, grootte) terug.
+    Hash en kopie gebeuren in één leesbeurt; bestaat de inhoud al, dan
+    wordt de tijdelijke kopie weggegooid (deduplicatie).
+    """
+    tmp_dir = os.path.join(ATTACH_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as out, open(src_path, "rb") as src:
+            while True:
+                chunk = src.read(ATTACH_CHUNK)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha = digest.hexdigest()
+        final = blob_path(sha)
+        try:
+            # Bestaande blob: mtime verversen, zodat blob_collect hem binnen de
+            # wachttijd laat staan tot de nieuwe bijlage-rij er is
+            os.utime(final)
+            os.remove(tmp)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(final), exist_ok=True)
+            os.replace(tmp, final)
+        return sha, size
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def add_attachment(project_id, src_path, categorie="Ander", user=None):
+    """Bewaar een bestand bij een project; geeft het id van de bijlage terug."""
+    sha, size = blob_store(src_path)
+    return db_insert("project_attachments", {
+        "project_id": int(project_id),
+        "sha256": sha,
+        "bestandsnaam": os.path.basename(src_path),
+        "categorie": categorie,
+        "grootte": size,
+        "toegevoegd_door": user or current_user or "",
+        "toegevoegd_op": now_str(),
+    })
+
+def list_attachments(project_id, readonly=False):
+    return db_query("""
+        SELECT id, sha256, bestandsnaam, categorie, grootte, toegevoegd_door, toegevoegd_op
+        FROM project_attachments WHERE project_id=? ORDER BY categorie, bestandsnaam
+    """, (int(project_id),), fetchall=True, readonly=readonly)
+
+def remove_attachment(attachment_id):
+    """Verwijder een bijlage; het bestand verdwijnt pas als geen enkel project het nog gebruikt."""
+    row = db_query("SELECT sha256 FROM project_attachments WHERE id=?", (attachment_id,), fetchone=True)
+    if not row:
+        return
+    db_query("DELETE FROM project_attachments WHERE id=?", (attachment_id,), commit=True)
+    blob_collect([row["sha256"]])
+
+def blob_collect(shas=None):
+    """
+    Ruim blobs (en miniaturen) op waarnaar geen bijlage meer verwijst; geeft het aantal terug.
+    shas=None → de hele store (onderhoud, Hoofdstuk 2.E). Blobs jonger dan
+    BLOB_GC_GRACE_SEC blijven staan: add_attachment bewaart eerst de blob en
+    schrijft pas daarna de rij, en dat mag een gelijktijdige opruiming niet kruisen.
+    """
+    if shas is None:
+        objects = os.path.join(ATTACH_DIR, "objects")
+        shas = [d + f for d in _listdir(objects) for f in _listdir(os.path.join(objects, d))]
+    cutoff = time.time() - BLOB_GC_GRACE_SEC
+    removed = 0
+    for sha in shas:
+        try:
+            if os.path.getmtime(blob_path(sha)) > cutoff:
+                continue
+        except FileNotFoundError:
+            pass  # blob al weg: enkel nog een eventuele miniatuur
+        used = db_query("SELECT 1 FROM project_attachments WHERE sha256=? LIMIT 1", (sha,), fetchone=True)
+        if used:
+            continue
+        for path in (blob_path(sha), thumb_path(sha)):
+            if os.path.exists(path):
+                os.remove(path)
+        removed += 1
+    return removed
+
+def _listdir(path):
+    return os.listdir(path) if os.path.isdir(path) else []
+
+def is_image(bestandsnaam):
+    return os.path.splitext(bestandsnaam)[1].lower() in IMAGE_EXTENSIONS
+
+def make_thumbnail(src, dst, size=THUMB_SIZE):
+    """Werkproces: maak een PNG-miniatuur. PIL wordt hier pas geïmporteerd."""
+    from PIL import Image
+    with Image.open(src) as img:
+        img.thumbnail(size)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = dst + ".part"
+        img.save(tmp, "PNG")
+    os.replace(tmp, dst)
+    return dst
+
+def request_thumbnail(sha256, bestandsnaam):
+    """
+    Geef een Future voor de miniatuur (of None als het geen afbeelding is).
+    Bestaat de miniatuur al, dan is de Future meteen klaar.
+    """
+    from concurrent.futures import Future, ProcessPoolExecutor
+    global _thumb_pool
+    if not is_image(bestandsnaam):
+        return None
+    dst = thumb_path(sha256)
+    if os.path.exists(dst):
+        done = Future()
+        done.set_result(dst)
+        return done
+    if _thumb_pool is None:
+        _thumb_pool = ProcessPoolExecutor(max_workers=THUMB_WORKERS)
+    return _thumb_pool.submit(make_thumbnail, blob_path(sha256), dst)
+
+def stop_thumbnail_pool():
+    global _thumb_pool
+    if _thumb_pool is not None:
+        _thumb_pool.shutdown(wait=False, cancel_futures=True)
+        _thumb_pool = None
+
+def attachment_copy(sha256, bestandsnaam):
+    """Kopie met de oorspronkelijke naam in een tijdelijke map (om te openen of te bewaren)."""
+    dest = os.path.join(tempfile.gettempdir(), "dela_bijlagen", sha256[:12])
+    os.makedirs(dest, exist_ok=True)
+    path = os.path.join(dest, os.path.basename(bestandsnaam))
+    if not os.path.exists(path):
+        shutil.copyfile(blob_path(sha256), path)
+    return path
+
+# ------------------ Hoofdstuk 2.Q: Archief voor afgesloten projecten ------------------
+# Afgesloten projecten verhuizen in batches naar een apart bestand
+# (dela_archief.db) met hetzelfde schema en dezelfde indexen. Zoeken raakt
+# standaard enkel de actieve projecten; met "archief meezoeken" wordt het
+# bestand gekoppeld (ATTACH als 'archief') en worden beide tabellen met
+# UNION ALL samengevoegd. In de hoofddatabase blijft per gearchiveerd project
+# een kleine rij in project_archive (nummer, postcode), zodat projectnummers
+# uniek blijven en bijlagen en coördinaten niet mee verdwijnen.
+
+from datetime import timedelta
+
+ARCHIVE_PATH = os.path.join(BASE_DIR, "dela_archief.db")
+ARCHIVE_STATUSES = ("afgerond", "afgewerkt", "gesloten", "geannuleerd", "stopgezet")
+ARCHIVE_MIN_AGE_DAYS = 90    # pas archiveren als het project zo lang niet meer gewijzigd is
+ARCHIVE_BATCH = 500          # projecten per transactie
+
+def archive_available():
+    return os.path.exists(ARCHIVE_PATH)
+
+def attach_archive(conn, readonly=False, create=False):
+    """Koppel het archief als schema 'archief'; False als er (nog) geen archief is."""
+    if not (create or archive_available()):
+        return False
+    if readonly:
+        conn.execute("ATTACH DATABASE ? AS archief", (readonly_uri(ARCHIVE_PATH),))
+    else:
+        conn.execute("ATTACH DATABASE ? AS archief", (ARCHIVE_PATH,))
+    return True
+
+def project_union(select_sql, params=(), archive=False):
+    """
+    select_sql met {src} als projecttabel → (query, parameters). Met archive=True
+    (en een bestaand archief) een UNION ALL over actief en archief; de query moet
+    dan uitgevoerd worden met db_query(..., archive=True).
+    """
+    if not (archive and archive_available()):
+        return select_sql.format(src="projects"), tuple(params)
+    sources = ("main.projects", "archief.projects")
+    return " UNION ALL ".join(select_sql.format(src=src) for src in sources), tuple(params) * len(sources)
+
+def _archive_sync_schema(conn):
+    """
+    Maak archief.projects (en de indexen) aan naar het model van de actieve
+    tabel en vul ontbrekende kolommen aan. Geeft de gemeenschappelijke kolommen terug.
+    """
+    sql = conn.execute("SELECT sql FROM main.sqlite_master WHERE type='table' AND name='projects'").fetchone()[0]
+    conn.execute(re.sub(r'^CREATE TABLE\s+(IF NOT EXISTS\s+)?"?projects"?',
+                        "CREATE TABLE IF NOT EXISTS archief.projects", sql))
+    main_info = conn.execute("PRAGMA main.table_info(projects)").fetchall()
+    arch_cols = {r[1] for r in conn.execute("PRAGMA archief.table_info(projects)")}
+    for _, name, coltype, *_ in main_info:
+        if name not in arch_cols:
+            conn.execute(f"ALTER TABLE archief.projects ADD COLUMN {name} {coltype}")
+    for (sql,) in conn.execute("SELECT sql FROM main.sqlite_master WHERE type='index' AND tbl_name='projects' "
+                               "AND sql IS NOT NULL").fetchall():
+        conn.execute(re.sub(r"^CREATE (UNIQUE )?INDEX\s+(IF NOT EXISTS\s+)?",
+                            r"CREATE \1INDEX IF NOT EXISTS archief.", sql))
+    conn.commit()
+    return [r[1] for r in main_info]
+
+def _archive_where(statuses, min_age_days):
+    cutoff = (datetime.now() - timedelta(days=min_age_days)).strftime("%Y-%m-%d %H:%M:%S")
+    marks = ", ".join("?" * len(statuses))
+    # Zelfde expressie als idx_projects_sort_status, dus een indexbereik
+    return (f"IFNULL(status,'') COLLATE NOCASE IN ({marks}) AND IFNULL(laatst_gewijzigd_op,'') < ?",
+            list(statuses) + [cutoff])
+
+def archive_candidates(statuses=None, min_age_days=None):
+    """Aantal projecten dat bij de volgende archive_projects() zou verhuizen."""
+    where, params = _archive_where(statuses or ARCHIVE_STATUSES,
+                                   ARCHIVE_MIN_AGE_DAYS if min_age_days is None else min_age_days)
+    return db_query(f"SELECT COUNT(*) AS n FROM projects WHERE {where}", params, fetchone=True)["n"]
+
+def archive_projects(statuses=None, min_age_days=None, batch=None, progress=None):
+    """
+    Verhuis afgesloten projecten naar het archief, `batch` per transactie
+    (korte schrijflocks; andere gebruikers kunnen tussendoor verder).
+    progress(aantal) wordt na elke batch opgeroepen. Geeft het totaal terug.
+    """
+    where, params = _archive_where(statuses or ARCHIVE_STATUSES,
+                                   ARCHIVE_MIN_AGE_DAYS if min_age_days is None else min_age_days)
+    batch = batch or ARCHIVE_BATCH
+    conn = db_connect()
+    moved = 0
+    try:
+        attach_archive(conn, create=True)
+        cols = ", ".join(_archive_sync_schema(conn))
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = [r[0] for r in conn.execute(f"SELECT id FROM main.projects WHERE {where} LIMIT ?",
+                                                  params + [batch])]
+                if not ids:
+                    conn.rollback()
+                    break
+                in_ids = "id IN (SELECT value FROM json_each(?))"
+                j = json.dumps(ids)
+                conn.execute(f"INSERT OR REPLACE INTO archief.projects ({cols}) "
+                             f"SELECT {cols} FROM main.projects WHERE {in_ids}", (j,))
+                # Blijven meetellen in het dashboard (Hoofdstuk 2.I)
+                _archive_stats_update(conn, "main.projects", in_ids, (j,), +1)
+                # Eerst project_archive vullen: de DELETE-triggers slaan deze ids dan over
+                conn.execute(f"INSERT OR REPLACE INTO main.project_archive "
+                             f"(id, projectnummer, postcode, stad, uid, gearchiveerd_op) "
+                             f"SELECT id, projectnummer, postcode, stad, uid, ? FROM main.projects WHERE {in_ids}",
+                             (now_str(), j))
+                conn.execute(f"DELETE FROM main.projects WHERE {in_ids}", (j,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            moved += len(ids)
+            if progress:
+                progress(moved)
+    finally:
+        db_close(conn)
+    return moved
+
+def restore_projects(ids):
+    """Zet gearchiveerde projecten terug bij de actieve (bv. om ze te bewerken)."""
+    ids = [int(i) for i in ids]
+    if not ids or not archive_available():
+        return 0
+    conn = db_connect()
+    try:
+        attach_archive(conn)
+        cols = ", ".join(_archive_sync_schema(conn))
+        j = json.dumps(ids)
+        in_ids = "id IN (SELECT value FROM json_each(?))"
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(f"INSERT INTO main.projects ({cols}) "
+                               f"SELECT {cols} FROM archief.projects WHERE {in_ids}", (j,))
+            n = cur.rowcount
+            _archive_stats_update(conn, "archief.projects", in_ids, (j,), -1)
+            conn.execute(f"DELETE FROM archief.projects WHERE {in_ids}", (j,))
+            conn.execute(f"DELETE FROM main.project_archive WHERE {in_ids}", (j,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        db_close(conn)
+    return n
+
+def archived_project_ids(ids):
+    """De ids uit `ids` die in het archief staan (enkel de hoofddatabase nodig)."""
+    rows = db_query("SELECT id FROM project_archive WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps([int(i) for i in ids]),), fetchall=True)
+    return {r["id"] for r in rows}
+
+def project_row(project_id, readonly=False):
+    """Eén project, actief of gearchiveerd (None als het niet bestaat)."""
+    row = db_query("SELECT * FROM projects WHERE id=?", (project_id,), fetchone=True, readonly=readonly)
+    if row is None and archived_project_ids([project_id]) and archive_available():
+        row = db_query("SELECT * FROM archief.projects WHERE id=?", (project_id,), fetchone=True,
+                       readonly=readonly, archive=True)
+    return row
+
+# ------------------ Hoofdstuk 2.R: Synchronisatie tussen databasekopieën ------------------
+# Voor werken zonder netwerk (laptop op de werf). Elke rij heeft een uid;
+# elke lokale wijziging krijgt in sync_log het volgende volgnummer van dit
+# toestel (één logregel per rij: de laatste versie telt). sync_vector houdt
+# per toestel bij tot welk volgnummer deze database alles kent, sync_peers
+# wat een ander toestel volgens zijn laatste pakket kent.
+#
+# Een pakket (gzip-JSON) bevat enkel de rijen die de andere kant nog niet
+# heeft. Bij het inlezen wint per rij de versie met de jongste
+# laatst_gewijzigd_op; bij gelijke tijd het grootste toestel-id. Beide
+# kanten beslissen dus hetzelfde, ongeacht de volgorde van synchroniseren.
+# Een rij die niet past (bv. rijksregisternummer lokaal al bij een ander
+# contact) gaat naar sync_conflicts: het volgnummer telt als ontvangen, dus
+# ze wordt nooit opnieuw gestuurd en moet hier opgelost worden
+# (sync_retry_conflicts na het rechtzetten, of sync_discard_conflict).
+
+import gzip
+import uuid
+
+SYNC_FORMAT = 1
+SYNC_TABLES = tuple(SYNC_COLUMNS)
+
+def _same_file(a, b):
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+def _sync_device(conn, commit=True):
+    """
+    Toestel-id van deze database. Een kopie (bv. met de verkenner genomen)
+    staat op een ander pad en krijgt bij de eerste opstart een nieuw id, zodat
+    volgnummers van origineel en kopie nooit botsen.
+    """
+    meta = dict(conn.execute("SELECT sleutel, waarde FROM sync_meta WHERE sleutel IN ('device', 'pad')").fetchall())
+    here = os.path.abspath(DB_PATH)
+    if meta.get("device") and (meta.get("pad") == here or _same_file(meta.get("pad") or "", here)):
+        return meta["device"]
+    device = uuid.uuid4().hex[:12]
+    conn.executemany("INSERT OR REPLACE INTO sync_meta (sleutel, waarde) VALUES (?, ?)",
+                     [("device", device), ("pad", here)])
+    conn.execute("INSERT OR IGNORE INTO sync_vector (device, seq) VALUES (?, 0)", (device,))
+    if commit:
+        conn.commit()
+    return device
+
+def _sync_vector(conn, table="sync_vector", peer=None):
+    if peer is None:
+        return dict(conn.execute(f"SELECT device, seq FROM {table}").fetchall())
+    return dict(conn.execute("SELECT device, seq FROM sync_peers WHERE peer=?", (peer,)).fetchall())
+
+def _sync_columns(conn, tabel):
+    """Kolommen die meereizen en lokaal ook bestaan."""
+    present = {r[1] for r in conn.execute(f"PRAGMA table_info({tabel})")}
+    return [c for c in SYNC_COLUMNS[tabel] if c in present]
+
+def sync_make_copy(dest):
+    """
+    Maak een offline kopie (online back-up-API) met een eigen toestel-id.
+    Origineel en kopie weten meteen van elkaar wat de ander heeft.
+    """
+    if os.path.exists(dest):
+        raise FileExistsError(f"{dest} bestaat al")
+    src = db_connect()
+    try:
+        origin = _sync_device(src)
+        dst = sqlite3.connect(dest)
+        try:
+            src.backup(dst)
+            dst.execute("BEGIN")
+            device = uuid.uuid4().hex[:12]
+            dst.executemany("INSERT OR REPLACE INTO sync_meta (sleutel, waarde) VALUES (?, ?)",
+                            [("device", device), ("pad", os.path.abspath(dest))])
+            dst.execute("INSERT OR IGNORE INTO sync_vector (device, seq) VALUES (?, 0)", (device,))
+            dst.execute("DELETE FROM sync_peers WHERE peer=?", (origin,))
+            dst.execute("INSERT INTO sync_peers (peer, device, seq) SELECT ?, device, seq FROM sync_vector "
+                        "WHERE device <> ?", (origin, device))
+            dst.commit()
+        finally:
+            dst.close()
+        src.execute("DELETE FROM sync_peers WHERE peer=?", (device,))
+        src.execute("INSERT INTO sync_peers (peer, device, seq) SELECT ?, device, seq FROM sync_vector", (device,))
+        src.commit()
+    finally:
+        db_close(src)
+    return device
+
+def sync_peers():
+    """{toestel: {toestel: volgnummer}} zoals gekend uit de laatste pakketten."""
+    peers = {}
+    for r in db_query("SELECT peer, device, seq FROM sync_peers", fetchall=True):
+        peers.setdefault(r["peer"], {})[r["device"]] = r["seq"]
+    return peers
+
+def sync_status():
+    """(eigen toestel-id, eigen vector, kennis per ander toestel)."""
+    conn = db_connect()
+    try:
+        device = _sync_device(conn)
+        return device, _sync_vector(conn), sync_peers()
+    finally:
+        db_close(conn)
+
+def sync_export(path, peer=None):
+    """
+    Schrijf de wijzigingen die `peer` nog niet heeft naar `path` (gzip-JSON).
+    Zonder peer: het enige gekende toestel, of alles als er meerdere zijn.
+    Geeft het aantal rijen in het pakket terug.
+    """
+    conn = db_connect()
+    try:
+        device = _sync_device(conn)
+        if peer is None:
+            known = [r[0] for r in conn.execute("SELECT DISTINCT peer FROM sync_peers")]
+            peer = known[0] if len(known) == 1 else None
+        conn.execute("BEGIN")  # één consistente leesmomentopname
+        since = _sync_vector(conn, peer=peer) if peer else {}
+        vector = _sync_vector(conn)
+        columns = {t: _sync_columns(conn, t) for t in SYNC_TABLES}
+        changes = []
+        for dev, seq in vector.items():
+            if seq <= since.get(dev, 0):
+                continue
+            for tabel, uid, dev_seq, op, stamp in conn.execute(
+                    "SELECT tabel, uid, dev_seq, op, gewijzigd_op FROM sync_log "
+                    "WHERE device=? AND dev_seq>? ORDER BY dev_seq", (dev, since.get(dev, 0))).fetchall():
+                row = None
+                if op == "upsert":
+                    found = conn.execute(f"SELECT {', '.join(columns[tabel])} FROM {tabel} WHERE uid=?",
+                                         (uid,)).fetchone()
+                    if found is None:
+                        continue  # intussen gearchiveerd
+                    row = dict(zip(columns[tabel], found))
+                changes.append([tabel, uid, dev, dev_seq, op, stamp, row])
+        conn.rollback()
+    finally:
+        db_close(conn)
+    payload = {"formaat": SYNC_FORMAT, "device": device, "since": since, "vector": vector,
+               "aangemaakt": now_str(), "changes": changes}
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return len(changes)
+
+def sync_import(path):
+    """
+    Pas een pakket toe in één transactie. Geeft een rapport terug:
+    {"toegepast": n, "ouder": n, "conflicten": [(tabel, uid, reden), ...]}.
+    Conflicten worden ook in sync_conflicts bewaard.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        payload = json.load(f)
+    if payload.get("formaat") != SYNC_FORMAT:
+        raise ValueError(f"Onbekend pakketformaat: {payload.get('formaat')}")
+    report = {"toegepast": 0, "ouder": 0, "conflicten": []}
+    conn = db_connect()
+    try:
+        device = _sync_device(conn)
+        if payload["device"] == device:
+            raise ValueError("Dit pakket komt van deze database zelf.")
+        columns = {t: set(_sync_columns(conn, t)) for t in SYNC_TABLES}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            mine = _sync_vector(conn)
+            conn.execute("INSERT OR REPLACE INTO sync_meta (sleutel, waarde) VALUES ('applying', '1')")
+            received = {}
+            for tabel, uid, dev, dev_seq, op, stamp, row in payload["changes"]:
+                if tabel not in SYNC_TABLES:
+                    continue
+                received[dev] = max(received.get(dev, 0), dev_seq)
+                _sync_apply_change(conn, columns[tabel], report, tabel, uid, dev, dev_seq, op, stamp, row,
+                                   payload["vector"])
+            # Hadden we alles tot `since`, dan kennen we nu alles tot hun vector
+            if all(mine.get(d, 0) >= s for d, s in payload["since"].items()):
+                received = {d: max(s, received.get(d, 0)) for d, s in payload["vector"].items()}
+            conn.executemany("INSERT INTO sync_vector (device, seq) VALUES (?, ?) "
+                             "ON CONFLICT(device) DO UPDATE SET seq = MAX(seq, excluded.seq)", received.items())
+            conn.execute("DELETE FROM sync_peers WHERE peer=?", (payload["device"],))
+            conn.executemany("INSERT INTO sync_peers (peer, device, seq) VALUES (?, ?, ?)",
+                             [(payload["device"], d, s) for d, s in payload["vector"].items()])
+            conn.execute("DELETE FROM sync_meta WHERE sleutel='applying'")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        db_close(conn)
+    return report
+
+def _sync_apply_change(conn, columns, report, tabel, uid, dev, dev_seq, op, stamp, row, sender=None):
+    """
+    _sync_apply + rapport bijwerken; een conflict gaat naar sync_conflicts,
+    een gelukte rij eruit. Geeft de uitkomst van _sync_apply terug.
+    """
+    outcome = _sync_apply(conn, columns, tabel, uid, dev, dev_seq, op, stamp, row, sender)
+    if outcome is True:
+        report["toegepast"] += 1
+        conn.execute("DELETE FROM sync_conflicts WHERE tabel=? AND uid=?", (tabel, uid))
+    elif outcome is False:
+        report["ouder"] += 1
+    else:
+        report["conflicten"].append((tabel, uid, outcome))
+        conn.execute("INSERT OR REPLACE INTO sync_conflicts (tabel, uid, device, dev_seq, op, gewijzigd_op, rij, "
+                     "reden, ontvangen_op) VALUES (?,?,?,?,?,?,?,?,?)",
+                     (tabel, uid, dev, dev_seq, op, stamp, json.dumps(row, ensure_ascii=False), outcome, now_str()))
+    return outcome
+
+def sync_conflicts():
+    """Bewaarde conflicten: [(tabel, uid, op, gewijzigd_op, rij als dict, reden, ontvangen_op)]."""
+    return [(r["tabel"], r["uid"], r["op"], r["gewijzigd_op"], json.loads(r["rij"]) if r["rij"] else None,
+             r["reden"], r["ontvangen_op"])
+            for r in db_query("SELECT * FROM sync_conflicts ORDER BY ontvangen_op, tabel, uid", fetchall=True)]
+
+def sync_retry_conflicts():
+    """
+    Probeer de bewaarde conflicten opnieuw (nadat de oorzaak lokaal rechtgezet
+    is), in één transactie. Geeft een rapport zoals sync_import terug.
+    """
+    report = {"toegepast": 0, "ouder": 0, "conflicten": []}
+    conn = db_connect()
+    try:
+        _sync_device(conn)
+        columns = {t: set(_sync_columns(conn, t)) for t in SYNC_TABLES}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO sync_meta (sleutel, waarde) VALUES ('applying', '1')")
+            for tabel, uid, dev, dev_seq, op, stamp, rij in conn.execute(
+                    "SELECT tabel, uid, device, dev_seq, op, gewijzigd_op, rij FROM sync_conflicts").fetchall():
+                outcome = _sync_apply_change(conn, columns[tabel], report, tabel, uid, dev, dev_seq, op, stamp,
+                                             json.loads(rij) if rij else None)
+                if outcome is False:  # lokaal intussen nieuwer: niets meer op te lossen
+                    conn.execute("DELETE FROM sync_conflicts WHERE tabel=? AND uid=?", (tabel, uid))
+            conn.execute("DELETE FROM sync_meta WHERE sleutel='applying'")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        db_close(conn)
+    return report
+
+def sync_discard_conflict(tabel, uid):
+    """Laat een conflict vallen: de lokale versie blijft zoals ze is."""
+    db_query("DELETE FROM sync_conflicts WHERE tabel=? AND uid=?", (tabel, uid), commit=True)
+
+def _sync_apply(conn, columns, tabel, uid, dev, dev_seq, op, stamp, row, sender=None):
+    """
+    Eén rij uit een pakket: True = toegepast, False = lokaal nieuwer, tekst = conflict.
+    sender: vector van de afzender. Kende die onze versie al en stuurt hij toch
+    de zijne, dan vervangt de zijne de onze (ook binnen dezelfde seconde).
+    """
+    logged = conn.execute("SELECT device, dev_seq, gewijzigd_op FROM sync_log WHERE tabel=? AND uid=?",
+                          (tabel, uid)).fetchone()
+    current = conn.execute(f"SELECT id, laatst_gewijzigd_op FROM {tabel} WHERE uid=?", (uid,)).fetchone()
+    if logged and logged[0] == dev:
+        if logged[1] >= dev_seq:
+            return False  # deze versie (of een latere van hetzelfde toestel) hebben we al
+        local_key = None  # latere versie van hetzelfde toestel: nieuwer, ook binnen dezelfde seconde
+    elif logged and sender and sender.get(logged[0], 0) >= logged[1]:
+        local_key = None  # afzender kende onze versie al: zijn versie is de opvolger
+    elif logged:
+        local_key = (logged[2] or "", logged[0])
+    elif current:
+        local_key = (current[1] or "", "")
+    else:
+        local_key = None
+    if local_key is not None and (stamp or "", dev) <= local_key:
+        return False
+    if tabel == "projects" and current is None and conn.execute(
+            "SELECT 1 FROM project_archive WHERE uid=?", (uid,)).fetchone():
+        return "gearchiveerd; eerst terugzetten"
+
+    conn.execute("SAVEPOINT sync_rij")
+    try:
+        if op == "delete":
+            if current:
+                conn.execute(f"DELETE FROM {tabel} WHERE id=?", (current[0],))
+        else:
+            data = {k: v for k, v in row.items() if k in columns}
+            if current:
+                conn.execute(f"UPDATE {tabel} SET {', '.join(f'{k}=?' for k in data)} WHERE id=?",
+                             (*data.values(), current[0]))
+            else:
+                data["uid"] = uid
+                conn.execute(f"INSERT INTO {tabel} ({', '.join(data)}) VALUES ({', '.join('?' * len(data))})",
+                             tuple(data.values()))
+        conn.execute("INSERT INTO sync_log (tabel, uid, device, dev_seq, op, gewijzigd_op) VALUES (?,?,?,?,?,?) "
+                     "ON CONFLICT(tabel, uid) DO UPDATE SET device = excluded.device, dev_seq = excluded.dev_seq, "
+                     "op = excluded.op, gewijzigd_op = excluded.gewijzigd_op", (tabel, uid, dev, dev_seq, op, stamp))
+        conn.execute("RELEASE sync_rij")
+    except sqlite3.IntegrityError as e:
+        # bv. hetzelfde rijksregisternummer lokaal al bij een ander contact
+        conn.execute("ROLLBACK TO sync_rij")
+        conn.execute("RELEASE sync_rij")
+        return str(e)
+    return True
+
+# ------------------ Hoofdstuk 2.S: Fuzzy zoeken ("bedoelde je …?") ------------------
+# LIKE vindt "Peters" niet als er "Peeters" staat. Triggers houden per tabel
+# een woordenlijst bij (fuzzy_vocab: elk woord uit namen, bedrijven, klanten
+# en projectnamen met het aantal rijen waarin het voorkomt); daarover ligt een
+# FTS5-trigramindex (fuzzy_words, migratie 16). Een verkeerd gespeld woord
+# wordt in trigrammen geknipt, de index levert per trigram de woorden die het
+# bevatten en de woorden met de meeste gedeelde trigrammen worden op
+# gelijkenis gerangschikt.
+# De lijst is veel kleiner dan de tabellen en er komt geen tabelscan aan te pas.
+
+from collections import Counter
+from itertools import product
+
+FUZZY_CANDIDATES = 200        # kandidaat-woorden (meeste gedeelde trigrammen) per woord
+FUZZY_MIN_SIMILARITY = 0.3    # ondergrens voor een suggestie (0..1)
+FUZZY_FEW_HITS = 3            # minder exacte resultaten → suggesties tonen
+
+def _fuzzy_fold(text):
+    return (text or "").translate(FUZZY_FOLD_TABLE).lower()
+
+def _trigram_set(text):
+    """Trigrammen per woord, met opvulling (zoals pg_trgm): 'jan' → '  j', ' ja', 'jan', 'an '."""
+    grams = set()
+    for word in _fuzzy_fold(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def trigram_similarity(a, b):
+    """Jaccard-gelijkenis van de trigrammen (1.0 = gelijk, 0.0 = niets gemeen)."""
+    ga, gb = _trigram_set(a), _trigram_set(b)
+    return len(ga & gb) / len(ga | gb) if ga and gb else 0.0
+
+def fuzzy_terms(word, tabel, limit=5, readonly=False):
+    """Woorden uit `tabel` die op `word` lijken: [(vorm, gelijkenis, aantal_rijen), ...]."""
+    key = _fuzzy_fold(word).strip()
+    if len(key) < FUZZY_MIN_WORD:
+        return []
+    grams = _trigram_set(key)
+    # Per trigram enkel de rowids uit de index (geen bm25: dat rangschikt alle
+    # treffers), meteen beperkt tot `tabel` zodat de woorden van de andere tabel
+    # geen kandidaten verdringen; de woorden met de meeste gedeelde trigrammen
+    # worden nagerekend
+    shared = Counter()
+    conn = db_connect(readonly=readonly)
+    try:
+        for g in grams:
+            shared.update(r[0] for r in conn.execute(
+                # CROSS JOIN: eerst de index, dan per treffer de tabel (anders begint SQLite bij fuzzy_vocab)
+                "SELECT f.rowid FROM fuzzy_words f CROSS JOIN fuzzy_vocab v ON v.id = f.rowid "
+                "WHERE fuzzy_words MATCH ? AND v.tabel = ?", ('"' + g.replace('"', '""') + '"', tabel)))
+        best = [vid for vid, _ in shared.most_common(FUZZY_CANDIDATES)]
+        rows = conn.execute("SELECT vorm, sleutel, n FROM fuzzy_vocab WHERE id IN (SELECT value FROM json_each(?))",
+                            (json.dumps(best),)).fetchall()
+    except sqlite3.OperationalError:
+        return []  # geen trigramindex (oude SQLite)
+    finally:
+        conn.close()
+    scored = [(vorm, trigram_similarity(key, sleutel), n) for vorm, sleutel, n in rows]
+    scored = [x for x in scored if x[1] >= FUZZY_MIN_SIMILARITY]
+    scored.sort(key=lambda x: (-x[1], -x[2]))
+    return scored[:limit]
+
+def fuzzy_suggest(text, tabel, limit=5, readonly=False):
+    """
+    "Bedoelde je …?" voor een zoekterm: elk woord vervangen door een gelijkend
+    woord dat wel (of vaker) voorkomt. Geeft [(suggestie, gelijkenis), ...].
+    """
+    words = text.split()[:4]
+    options = []
+    for word in words:
+        terms = fuzzy_terms(word, tabel, limit=3, readonly=readonly) if len(word) >= FUZZY_MIN_WORD else []
+        key = _fuzzy_fold(word)
+        own = next((t for t in terms if _fuzzy_fold(t[0]) == key), None)
+        # Een woord dat al bestaat enkel vervangen door een veel vaker voorkomend woord
+        alternatives = [t for t in terms if t is not own and (own is None or t[2] > 3 * own[2])]
+        options.append([(word, 1.0 if own or not terms else 0.0)] + [(t[0], t[1]) for t in alternatives])
+    suggestions = []
+    for combo in product(*options):
+        tekst = " ".join(w for w, _ in combo)
+        if _fuzzy_fold(tekst) != _fuzzy_fold(" ".join(words)):
+            suggestions.append((tekst, round(sum(sc for _, sc in combo) / len(combo), 2)))
+    suggestions.sort(key=lambda x: -x[1])
+    return suggestions[:limit]
+
+# ------------------ Hoofdstuk 2.T: Omnibox (één zoekvak voor alles) ------------------
+# Eén zoekvak in het hoofdmenu voor projecten (nummer, klant, naam, adres) en
+# contacten (naam, bedrijf, e-mail, telefoon). omni_index (migratie 17) is een
+# FTS5-index met prefixindex voor 2 en 3 tekens, bijgehouden door triggers.
+# Elk getypt woord is een prefix. Exacte woorden komen eerst, daarna de
+# prefixtreffers. Binnen elke groep rangschikt bm25, met een nummer zwaarder
+# dan een naam en een naam zwaarder dan een adres. bm25 kost tijd per treffer,
+# dus bij een breed woord ("gent") worden enkel de OMNI_RANK_WINDOW nieuwste
+# treffers gerangschikt. De index levert die in rowid-volgorde zonder sorteren.
+# De detailgegevens worden per id opgehaald, enkel voor de getoonde rijen.
+
+OMNI_MIN_CHARS = 2                     # kortere invoer: niets zoeken
+OMNI_LIMIT = 15
+OMNI_WEIGHTS = (8.0, 4.0, 1.0, 2.0)    # nummer, naam, adres, contact
+OMNI_RANK_WINDOW = 2000                # max. treffers die bm25 rangschikt (de nieuwste)
+OMNI_DEBOUNCE_MS = 150                 # GUI: pas zoeken als er zo lang niet getypt wordt
+
+def omni_match(text, prefix=True):
+    """FTS5-zoekvraag voor de omnibox (elk woord verplicht), of None als er niets te zoeken valt."""
+    text = (text or "").strip()
+    digits = only_digits(text)
+    if re.fullmatch(r"[\d\s./+()-]+", text) and len(digits) >= 6:
+        # Telefoonnummer: één term zoals in de index (cijfers zonder 0 of landcode vooraan)
+        if text.startswith("+") or digits.startswith("00"):
+            digits = digits.lstrip("0")
+            cc = only_digits(DEFAULT_CC)
+            digits = digits[len(cc):] if digits.startswith(cc) else digits
+        words = [digits.lstrip("0")]
+    else:
+        words = re.findall(r"[^\W_]+", text.lower())
+    if not words or sum(len(w) for w in words) < OMNI_MIN_CHARS:
+        return None
+    star = "*" if prefix else ""
+    return " ".join(f'"{w}"{star}' for w in words)
+
+def omni_search(text, limit=OMNI_LIMIT, readonly=False):
+    """
+    Projecten en contacten voor het zoekvak, best passend eerst:
+    [(tabel, id, titel, detail), ...] met tabel 'projects' of 'contacts'.
+    """
+    exact, prefix = omni_match(text, prefix=False), omni_match(text)
+    if not prefix:
+        return []
+    weights = ", ".join(str(w) for w in OMNI_WEIGHTS)
+    ranked = (f"SELECT rowid FROM (SELECT rowid, bm25(omni_index, {weights}) AS score FROM omni_index "
+              f"WHERE omni_index MATCH ? ORDER BY rowid DESC LIMIT {OMNI_RANK_WINDOW}) ORDER BY score LIMIT ?")
+    conn = db_connect(readonly=readonly)
+    try:
+        rowids = [r[0] for r in conn.execute(ranked, (exact, limit))]
+        if len(rowids) < limit:  # exacte treffers vullen de lijst niet: prefixtreffers erachter
+            rowids += [r[0] for r in conn.execute(ranked, (prefix, limit)) if r[0] not in rowids]
+        rowids = rowids[:limit]
+        ids = {"contacts": [r // 2 for r in rowids if r % 2 == 0],
+               "projects": [r // 2 for r in rowids if r % 2 == 1]}
+        rows = {}
+        for r in conn.execute("SELECT id, display_name, bedrijf, email, stad FROM contacts "
+                              "WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids["contacts"]),)):
+            detail = " · ".join(x for x in (r[2] if r[2] != r[1] else "", r[3], r[4]) if x)
+            rows[r[0] * 2] = ("contacts", r[0], r[1] or "", detail)
+        for r in conn.execute("SELECT id, projectnummer, klant, projectnaam, stad, status FROM projects "
+                              "WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids["projects"]),)):
+            titel = " – ".join(x for x in (r[1], r[3]) if x)
+            rows[r[0] * 2 + 1] = ("projects", r[0], titel, " · ".join(x for x in (r[2], r[4], r[5]) if x))
+    except sqlite3.OperationalError as e:
+        log_once("omnibox", "omnibox niet beschikbaar: %s", e)
+        return []
+    finally:
+        conn.close()
+    return [rows[r] for r in rowids if r in rows]
+
+# ------------------ Hoofdstuk 2.U: Reactiesnelheid van de GUI (lag-watchdog) ------------------
+# "Het programma hangt" zit vaak niet in een query: Treeview-inserts, logo's
+# schalen of een formulier opbouwen gebeuren ook op de Tk-thread. De GUI geeft
+# elke LAG_TICK_MS een hartslag via root.after; komt die te laat, dan was de
+# mainloop geblokkeerd. Een achtergrondthread neemt tijdens zo'n blokkering
+# stack-samples van de GUI-thread (sys._current_frames). De handler is de
+# eerste functie onder tkinter's callback-wrapper (bv. do_search), de
+# hotspot de regel die het vaakst bovenaan de stack stond.
+# Zelf Tk-vrij: de GUI roept enkel beat() op.
+
+from collections import deque
+
+LAG_MONITOR_ENABLED = True
+LAG_TICK_MS = 100           # hartslag op de GUI-thread
+LAG_THRESHOLD_MS = 200      # vanaf deze vertraging een blokkering vastleggen
+LAG_SAMPLE_MS = 20          # interval tussen stack-samples tijdens een blokkering
+LAG_MAX_SAMPLES = 500       # per blokkering (een echte hang blijft begrensd)
+LAG_KEEP = 200              # laatste blokkeringen in het geheugen
+LAG_LOG_MS = 1000           # langere blokkeringen ook in het logboek (dela.log)
+
+# tkinter-functies die een callback van de gebruiker oproepen (bind/command, after);
+# de korte namen voor Python < 3.11 (zonder co_qualname)
+_TK_CALLBACK_FRAMES = {"CallWrapper.__call__", "Misc.after.<locals>.callit", "__call__", "callit"}
+
+def _lag_stack(frame):
+    """Stack van buiten naar binnen als [(bestand, regel, functie), ...]."""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((os.path.basename(code.co_filename), frame.f_lineno,
+                      getattr(code, "co_qualname", code.co_name)))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+def _lag_handler(stack):
+    """Index van de GUI-handler in `stack`: de frame net onder de laatste tkinter-wrapper."""
+    for i in range(len(stack) - 2, -1, -1):
+        filename, _line, func = stack[i]
+        if filename == "__init__.py" and func in _TK_CALLBACK_FRAMES:
+            return i + 1
+    return None
+
+class LagMonitor:
+    """Meet de vertraging van de hartslag en bemonstert de GUI-thread tijdens blokkeringen."""
+
+    def __init__(self, thread_id=None):
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.lock = threading.Lock()
+        self.expected = None     # perf_counter waarop de volgende hartslag verwacht wordt
+        self.samples = []        # stacks van de lopende blokkering
+        self.stalls = deque(maxlen=LAG_KEEP)
+        self.stats = {}          # handler -> [aantal, totaal_ms, max_ms, stack van de ergste]
+        self.stop = threading.Event()
+        self.thread = None
+
+    def beat(self, interval_ms):
+        """Hartslag (op de GUI-thread); de volgende wordt over `interval_ms` verwacht."""
+        now = time.perf_counter()
+        with self.lock:
+            if self.expected is not None:
+                lag_ms = (now - self.expected) * 1000
+                if lag_ms >= LAG_THRESHOLD_MS:
+                    self._record(lag_ms)
+            self.samples = []
+            self.expected = now + interval_ms / 1000
+
+    def _record(self, lag_ms):
+        if self.samples:
+            stack, n = Counter(self.samples).most_common(1)[0]
+        else:
+            stack, n = (), 0   # korter dan één sample-interval
+        i = _lag_handler(stack)
+        handler = stack[i][2] if i is not None else "(onbekend)"
+        frames = stack[i:] if i is not None else stack
+        stall = {"tijd": now_str(), "handler": handler, "ms": round(lag_ms),
+                 "samples": len(self.samples), "hotspot": frames[-1] if frames else None,
+                 "stack": frames, "aandeel": n / len(self.samples) if self.samples else 0.0}
+        self.stalls.append(stall)
+        st = self.stats.setdefault(handler, [0, 0.0, 0.0, ()])
+        st[0] += 1
+        st[1] += lag_ms
+        if lag_ms > st[2]:
+            st[2], st[3] = lag_ms, frames
+        if lag_ms >= LAG_LOG_MS:
+            logger.warning("gui: %s blokkeerde de interface %.0f ms", handler, lag_ms)
+
+    def _sample_loop(self):
+        while not self.stop.wait(LAG_SAMPLE_MS / 1000):
+            with self.lock:
+                due = self.expected
+            if due is None or time.perf_counter() - due < LAG_SAMPLE_MS / 1000:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = _lag_stack(frame)
+            with self.lock:
+                if self.expected == due and len(self.samples) < LAG_MAX_SAMPLES:
+                    self.samples.append(stack)
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return self.thread
+        self.stop.clear()
+        self.thread = threading.Thread(target=self._sample_loop, name="dela-lag-watchdog", daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def report(self):
+        """[(handler, aantal, totaal_ms, max_ms, gemiddeld_ms), ...], traagste totaal eerst."""
+        with self.lock:
+            rows = [(h, n, round(tot), round(mx), round(tot / n)) for h, (n, tot, mx, _) in self.stats.items()]
+        return sorted(rows, key=lambda r: (-r[2], -r[3]))
+
+    def worst_stack(self, handler):
+        with self.lock:
+            st = self.stats.get(handler)
+            return st[3] if st else ()
+
+    def recent(self):
+        with self.lock:
+            return list(reversed(self.stalls))
+
+    def clear(self):
+        with self.lock:
+            self.stalls.clear()
+            self.stats.clear()
+
+_lag_monitor = None
+
+def start_lag_monitor():
+    """Start (eenmalig) de sample-thread; op te roepen vanaf de GUI-thread."""
+    global _lag_monitor
+    if not LAG_MONITOR_ENABLED:
+        return None
+    if _lag_monitor is None:
+        _lag_monitor = LagMonitor(threading.get_ident())
+    _lag_monitor.start()
+    return _lag_monitor
+
+def lag_monitor():
+    return _lag_monitor
+
+def format_lag_stack(frames):
+    """Stack als tekstregels, binnenste (de hotspot) onderaan."""
+    return [f"{filename}:{line}  {func}" for filename, line, func in frames]
+
+# ------------------ Hoofdstuk 2.V: Datakwaliteit ------------------
+# Controle van de gegevens die al in de database staan:
+# - e-mailadressen;
+# - telefoonnummers (format_phone formatteert enkel);
+# - postcode tegenover stad (FLEMISH_CITIES);
+# - rijksregisternummers;
+# - dubbele bedrijven.
+# contacts en projects worden per DQ_CHUNK rijen gelezen (keyset op id) en in
+# een procespool gecontroleerd; enkel de bevindingen komen terug. Dubbele
+# bedrijven vergelijken rijen onderling en worden daarna in dit proces bepaald.
+# Verbeteringen gaan in één transactie en worden per (tabel, veld) als
+# bulkwijziging bewaard (Hoofdstuk 2.F), dus ongedaan te maken.
+# Een bevinding is (tabel, id, veld, probleem, waarde, voorstel); voorstel None
+# = enkel melden.
+
+from functools import lru_cache
+
+DQ_CHUNK = 5000
+DQ_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+DQ_COLUMNS = {
+    "contacts": ["id", "email", "gsm_cc", "gsm_num", "tel_cc", "tel_num",
+                 "rijksregisternummer", "postcode", "stad", "land"],
+    "projects": ["id", "postcode", "stad"],
+}
+DQ_REPORT_COLUMNS = ["tabel", "id", "veld", "probleem", "waarde", "voorstel"]
+DQ_BELGIUM = {"", "belgie", "belgië", "belgium", "belgique", "be"}
+DQ_LEGAL_FORMS = {"bv", "bvba", "nv", "vzw", "cv", "cvba", "vof", "commv", "ep", "asbl", "sa", "sprl",
+                  "srl", "gmbh", "sarl"}
+# Echte mailproviders die op één teken na op een gratis mailbox lijken
+# (email.com ~ gmail.com, mail.com ~ gmail.com): nooit "verbeteren"
+DQ_KNOWN_DOMAINS = {
+    "email.com", "mail.com", "gmx.com", "gmx.net", "gmx.de", "gmx.be", "aol.com", "ymail.com",
+    "hotmail.fr", "hotmail.de", "live.nl", "live.fr", "outlook.fr", "outlook.nl", "yahoo.be", "yahoo.nl",
+    "yahoo.de", "mac.com", "web.de", "free.fr", "orange.fr", "kpn.nl", "home.nl", "planet.nl",
+    "proton.me", "protonmail.com", "mail.be", "tele2.be", "edpnet.be", "base.be",
+}
+_DQ_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[a-z]{2,}$", re.IGNORECASE)
+
+def _dq_one_edit(a, b):
+    """True als a en b exact één bewerking verschillen (teken erbij/weg/anders, of twee omgewisseld)."""
+    if a == b or abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        if a[i + 1:] == b[i + 1:]:
+            return True  # één teken anders
+        return a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]  # twee omgewisseld
+    longer, shorter = (a, b) if len(a) > len(b) else (b, a)
+    return longer[i + 1:] == shorter[i:]
+
+@lru_cache(maxsize=4096)
+def _dq_domain(domain):
+    """
+    Gratis mailbox met één tikfout (gmial.com, hotmal.com) → de juiste; anders
+    ongewijzigd. Bekende providers (DQ_KNOWN_DOMAINS) en domeinen die op meer
+    dan één gratis mailbox lijken, blijven zoals ze zijn.
+    """
+    if domain in FREEMAIL_DOMAINS or domain in DQ_KNOWN_DOMAINS:
+        return domain
+    close = [d for d in FREEMAIL_DOMAINS if _dq_one_edit(domain, d)]
+    return close[0] if len(close) == 1 else domain
+
+def _dq_email(value):
+    """(probleem, voorstel) voor een e-mailadres, of None als het in orde is."""
+    fixed = re.sub(r"\s+", "", value).replace(",", ".").strip(".").lower()
+    while ".." in fixed:
+        fixed = fixed.replace("..", ".")
+    user, at, domain = fixed.rpartition("@")
+    if at:
+        fixed = f"{user}@{_dq_domain(domain)}"
+    valid = bool(_DQ_EMAIL.match(value))
+    if valid and fixed == value.lower():
+        return None
+    if not _DQ_EMAIL.match(fixed):
+        return "ongeldig e-mailadres", None
+    return ("tikfout in domein?" if valid else "ongeldig e-mailadres"), fixed
+
+def _dq_phone(cc, value):
+    """(probleem, voorstel) voor een nummer zoals de formulieren het bewaren (cijfers, zonder 0)."""
+    cc = (cc or DEFAULT_CC).strip()
+    if cc not in {c for c, _ in COUNTRY_CODES}:
+        return "onbekende landcode", None
+    digits, cc_digits = (value if value.isdigit() else only_digits(value)), only_digits(cc)
+    if digits.startswith("00" + cc_digits):
+        digits = digits[2 + len(cc_digits):]
+    elif cc == "+32" and len(digits) in (10, 11) and digits.startswith(cc_digits):
+        digits = digits[len(cc_digits):]
+    digits = digits.lstrip("0")
+    if cc == "+32":
+        ok = len(digits) == 9 and digits[0] == "4" or len(digits) == 8 and digits[0] != "4"
+    else:
+        ok = 6 <= len(digits) <= 12
+    if not ok:
+        return "ongeldig aantal cijfers", None
+    return None if digits == value else ("niet genormaliseerd", digits)
+
+def _dq_city_maps():
+    by_city = {stad.lower(): (stad, pc) for stad, pc in FLEMISH_CITIES.items()}
+    by_postcode = {}
+    for stad, pc in FLEMISH_CITIES.items():
+        by_postcode.setdefault(pc, []).append(stad)
+    return by_city, {pc: steden[0] for pc, steden in by_postcode.items() if len(steden) == 1}
+
+def _dq_place(tabel, rid, postcode, stad, by_city, by_postcode):
+    """Bevindingen voor postcode en stad van één rij."""
+    postcode, stad = (postcode or "").strip(), (stad or "").strip()
+    out = []
+    if postcode and not re.fullmatch(r"\d{4}", postcode):
+        digits = only_digits(postcode)
+        out.append((tabel, rid, "postcode", "ongeldige postcode", postcode, digits if len(digits) == 4 else None))
+        return out
+    known = by_city.get(stad.lower())
+    if known and known[0] != stad:
+        out.append((tabel, rid, "stad", "schrijfwijze stad", stad, known[0]))
+    if stad and not postcode and known:
+        out.append((tabel, rid, "postcode", "postcode ontbreekt", "", known[1]))
+    elif postcode and not stad and postcode in by_postcode:
+        out.append((tabel, rid, "stad", "stad ontbreekt", "", by_postcode[postcode]))
+    elif known and postcode != known[1] and by_postcode.get(postcode, known[0]) != known[0]:
+        # Enkel als de postcode zeker bij een andere stad hoort (deelgemeenten!)
+        out.append((tabel, rid, "postcode", f"postcode hoort bij {by_postcode[postcode]}", postcode, None))
+    return out
+
+def _dq_check_chunk(tabel, rows):
+    """Werkproces: controleer één blok rijen (tuples volgens DQ_COLUMNS); geeft de bevindingen."""
+    by_city, by_postcode = _dq_city_maps()
+    found = []
+    for row in rows:
+        r = dict(zip(DQ_COLUMNS[tabel], row))
+        rid = r["id"]
+        if tabel == "contacts":
+            email = r["email"] or ""
+            res = _dq_email(email) if email.strip() else None
+            if res:
+                found.append((tabel, rid, "email", res[0], email, res[1]))
+            for veld, cc in (("gsm_num", r["gsm_cc"]), ("tel_num", r["tel_cc"])):
+                value = r[veld] or ""
+                res = _dq_phone(cc, value) if value.strip() else None
+                if res:
+                    found.append((tabel, rid, veld, res[0], value, res[1]))
+            rrn = (r["rijksregisternummer"] or "").strip()
+            if rrn:
+                digits = only_digits(rrn)
+                probleem = rrn_problem(digits)
+                if probleem:
+                    found.append((tabel, rid, "rijksregisternummer", f"rijksregisternummer: {probleem}", rrn, None))
+                elif rrn != rrn_format(digits):
+                    found.append((tabel, rid, "rijksregisternummer", "notatie rijksregisternummer", rrn,
+                                  rrn_format(digits)))
+            if (r["land"] or "").strip().lower() not in DQ_BELGIUM:
+                continue  # postcodes van buiten België niet tegen FLEMISH_CITIES houden
+        found.extend(_dq_place(tabel, rid, r["postcode"], r["stad"], by_city, by_postcode))
+    return found
+
+def _dq_company_key(name):
+    """Bedrijfsnaam zonder rechtsvorm, leestekens en accenten, om dubbels te vinden."""
+    words = [w for w in re.findall(r"[^\W_]+", _index_fold(name)) if w not in DQ_LEGAL_FORMS]
+    return " ".join(words)
+
+def _dq_duplicate_companies(conn):
+    first = {}
+    found = []
+    for rid, bedrijf in conn.execute("SELECT id, bedrijf FROM contacts WHERE type='bedrijf' "
+                                     "AND TRIM(IFNULL(bedrijf,'')) <> '' ORDER BY id"):
+        key = _dq_company_key(bedrijf)
+        if not key:
+            continue
+        if key in first:
+            found.append(("contacts", rid, "bedrijf", "mogelijk dubbel bedrijf",
+                          f"{bedrijf} (= contact {first[key]})", None))
+        else:
+            first[key] = rid
+    return found
+
+def _dq_blocks(conn, tabel):
+    cols = ", ".join(DQ_COLUMNS[tabel])
+    last = 0
+    while True:
+        rows = conn.execute(f"SELECT {cols} FROM {tabel} WHERE id > ? ORDER BY id LIMIT ?",
+                            (last, DQ_CHUNK)).fetchall()
+        if not rows:
+            return
+        last = rows[-1][0]
+        yield rows
+
+def dq_scan(tables=("contacts", "projects"), workers=None, progress=None):
+    """
+    Controleer `tables`; geeft de lijst bevindingen. progress(gecontroleerd, totaal)
+    na elk blok. Kleine tabellen (of workers=1) zonder procespool.
+    """
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    workers = workers or DQ_WORKERS
+    found, done = [], 0
+    conn = db_connect()
+    try:
+        total = sum(conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in tables)
+        blocks = ((t, rows) for t in tables for rows in _dq_blocks(conn, t))
+        if workers <= 1 or total <= DQ_CHUNK:
+            for tabel, rows in blocks:
+                found.extend(_dq_check_chunk(tabel, rows))
+                done += len(rows)
+                if progress:
+                    progress(done, total)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = {}
+                for tabel, rows in blocks:
+                    pending[pool.submit(_dq_check_chunk, tabel, rows)] = len(rows)
+                    # Begrensd aantal blokken onderweg: geheugen blijft klein bij 500k rijen
+                    while len(pending) >= 2 * workers:
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in finished:
+                            found.extend(fut.result())
+                            done += pending.pop(fut)
+                        if progress:
+                            progress(done, total)
+                for fut in list(pending):
+                    found.extend(fut.result())
+                    done += pending.pop(fut)
+                    if progress:
+                        progress(done, total)
+        if "contacts" in tables:
+            found.extend(_dq_duplicate_companies(conn))
+    finally:
+        conn.close()
+    return found
+
+def dq_summary(findings):
+    """[(tabel, veld, probleem, aantal, te_verbeteren), ...], grootste groep eerst."""
+    groups = {}
+    for tabel, _rid, veld, probleem, _waarde, voorstel in findings:
+        g = groups.setdefault((tabel, veld, probleem), [0, 0])
+        g[0] += 1
+        g[1] += voorstel is not None
+    return sorted(((*k, n, fix) for k, (n, fix) in groups.items()), key=lambda r: (-r[3], r[:3]))
+
+def dq_apply(findings, user=None):
+    """
+    Voer de voorstellen uit in één transactie, met per (tabel, veld) een
+    bulkwijziging voor ongedaan maken. Rijen die sinds de controle gewijzigd
+    zijn, worden overgeslagen. Geeft de aangepaste (tabel, id, veld) terug;
+    wat ontbreekt, staat nog open.
+    """
+    per_field = {}
+    for tabel, rid, veld, _probleem, waarde, voorstel in findings:
+        if voorstel is not None and veld in DQ_FIX_FIELDS.get(tabel, []):
+            per_field.setdefault((tabel, veld), {}).setdefault(int(rid), (waarde or "", voorstel))
+    stamp = now_str()
+    user = user or current_user or ""
+    applied = []
+    conn = db_connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for (tabel, veld), fixes in per_field.items():
+            cur = conn.execute("INSERT INTO bulk_edits (tabel, veld, nieuwe_waarde, aantal, door, op) "
+                               "VALUES (?,?,?,?,?,?)", (tabel, veld, "(datakwaliteit)", 0, user, stamp))
+            bulk_id = cur.lastrowid
+            same = f"id=? AND IFNULL({veld},'')=?"
+            conn.executemany(f"INSERT INTO bulk_edit_rows (bulk_id, rij_id, oude_waarde) "
+                             f"SELECT ?, id, {veld} FROM {tabel} WHERE {same}",
+                             [(bulk_id, rid, old) for rid, (old, _new) in fixes.items()])
+            cur = conn.executemany(f"UPDATE {tabel} SET {veld}=?, laatst_gewijzigd_door=?, laatst_gewijzigd_op=? "
+                                   f"WHERE {same}",
+                                   [(new, user, stamp, rid, old) for rid, (old, new) in fixes.items()])
+            if cur.rowcount:
+                conn.execute("UPDATE bulk_edits SET aantal=? WHERE id=?", (cur.rowcount, bulk_id))
+            else:
+                conn.execute("DELETE FROM bulk_edits WHERE id=?", (bulk_id,))
+            # bulk_edit_rows kreeg exact de rijen die nog de oude waarde hadden (zelfde voorwaarde, zelfde lock)
+            applied += [(tabel, r[0], veld) for r in
+                        conn.execute("SELECT rij_id FROM bulk_edit_rows WHERE bulk_id=?", (bulk_id,))]
+        conn.commit()
+        return applied
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        db_close(conn)
+
+# ------------------ Hoofdstuk 2.W: Recordcache voor detail- en bewerkvensters ------------------
+# Dubbelklikken opende telkens een nieuwe connectie voor SELECT * … WHERE id=?.
+# Volledige rijen worden nu bewaard in een begrensde LRU per (tabel, id). De
+# resultatenlijsten halen de rij al op de achtergrond op zodra ze geselecteerd
+# wordt (prefetch_record), dus het venster opent zonder databasevraag.
+# Geldigheid: per tabel de generatie van data_generation. Als die veranderd
+# is, worden enkel de rijen uit contact_changes/project_changes met een
+# hogere generatie vergeten.
+# Die controle gebeurt in de prefetch-thread, om de RECORD_CACHE_FRESH_SEC
+# seconden zolang er rijen in de cache zitten; wijzigingen van andere
+# gebruikers zijn dus ten laatste na die tijd zichtbaar. De Tk-thread
+# controleert zelf enkel na een eigen schrijfactie (db_close ziet
+# total_changes): dan moet het venster meteen de nieuwe versie tonen.
+# Raadplegen (readonly=True) leest alleen-lezen, zoals in Hoofdstuk 2.K,
+# en dus uit de momentopname als die actief is; de cache houdt rijen en
+# generaties daarom per bronbestand bij. Bewerkvensters lezen altijd de
+# database zelf.
+
+from collections import OrderedDict
+
+RECORD_CACHE_SIZE = 256
+RECORD_CACHE_FRESH_SEC = 2.0
+RECORD_CACHE_CHANGES = {"contacts": "contact_changes", "projects": "project_changes"}
+
+def _record_source(readonly):
+    """Bestand waaruit een alleen-lezen of gewone leesactie komt."""
+    return readonly_db_path() if readonly else DB_PATH
+
+def _fetch_record(tabel, row_id, readonly=False):
+    """(rij als dict, gearchiveerd) rechtstreeks uit de database, of None."""
+    row = db_query(f"SELECT * FROM {tabel} WHERE id=?", (row_id,), fetchone=True, readonly=readonly)
+    if row:
+        return dict(row), False
+    if tabel == "projects":
+        row = project_row(row_id, readonly=readonly)  # niet bij de actieve: misschien in het archief
+        return (dict(row), True) if row else None
+    return None
+
+class RecordCache:
+    """LRU van volledige rijen per (tabel, id), met controle via de generatieteller."""
+
+    def __init__(self, size=RECORD_CACHE_SIZE):
+        self.size = size
+        self.rows = OrderedDict()   # (bron, tabel, id) -> (dict, gearchiveerd)
+        self.gen = {}               # (bron, tabel) -> generatie waarop de rijen geldig zijn
+        self.checked = {}           # (bron, tabel) -> perf_counter van de laatste controle
+        self.lock = threading.Lock()
+
+    def _drop_table(self, part):
+        for key in [k for k in self.rows if k[:2] == part]:
+            del self.rows[key]
+
+    def validate(self, src, tabel, force=False):
+        part = (src, tabel)
+        with self.lock:
+            old = self.gen.get(part)
+            fresh = time.perf_counter() - self.checked.get(part, 0) < RECORD_CACHE_FRESH_SEC
+        if fresh and not force:
+            return
+        # Alleen-lezen zodra dat hetzelfde bestand oplevert (altijd, zonder momentopname)
+        readonly = src == readonly_db_path()
+        gen = data_generation(tabel, readonly=readonly)
+        changed = None
+        if old is not None and gen > old:
+            changed = [r["id"] for r in db_query(f"SELECT id FROM {RECORD_CACHE_CHANGES[tabel]} WHERE gen > ?",
+                                                 (old,), fetchall=True, readonly=readonly)]
+        with self.lock:
+            if old is not None and gen < old or changed is not None and len(changed) > self.size:
+                self._drop_table(part)   # teruggezette back-up of grote wijziging
+            else:
+                for rid in changed or ():
+                    self.rows.pop((src, tabel, rid), None)
+            self.gen[part] = gen
+            self.checked[part] = time.perf_counter()
+
+    def get(self, tabel, row_id, background=False, readonly=False):
+        """
+        Rij uit de cache of de database. background=True (prefetch-thread):
+        eerst de generatie controleren als die controle verlopen is; anders
+        enkel als de tabel nog nooit of sinds een eigen schrijfactie niet
+        gecontroleerd werd. readonly=True voor raadplegen.
+        """
+        src = _record_source(readonly)
+        key = (src, tabel, int(row_id))
+        with self.lock:
+            unchecked = key[:2] not in self.checked
+        if background or unchecked:
+            self.validate(src, tabel, force=unchecked)
+        with self.lock:
+            hit = self.rows.get(key)
+            if hit is not None:
+                self.rows.move_to_end(key)
+                return hit
+            seen = self.gen.get(key[:2])
+        value = _fetch_record(tabel, key[2], readonly=readonly)
+        if value is not None:
+            with self.lock:
+                # Intussen gecontroleerd (of gewist)? Dan kan deze rij al verouderd
+                # zijn zonder dat de controle hem nog kon vergeten: niet bewaren
+                if self.gen.get(key[:2]) == seen and key[:2] in self.checked:
+                    self.rows[key] = value
+                    while len(self.rows) > self.size:
+                        self.rows.popitem(last=False)
+            _start_prefetch_thread()  # houdt de cache ook zonder selecties actueel
+        return value
+
+    def revalidate(self):
+        """Alle (bron, tabel)-combinaties met rijen in de cache controleren (prefetch-thread)."""
+        with self.lock:
+            parts = {k[:2] for k in self.rows}
+        for src, tabel in parts:
+            self.validate(src, tabel)
+
+    def touch(self):
+        with self.lock:
+            self.checked.clear()
+
+    def clear(self):
+        with self.lock:
+            self.rows.clear()
+            self.gen.clear()
+            self.checked.clear()
+
+_record_cache = RecordCache()
+_prefetch_lock = threading.Lock()
+_prefetch_wanted = []             # enkel de laatste selectie telt (pijltjestoetsen!)
+_prefetch_event = threading.Event()
+_prefetch_thread = None
+
+def cached_record(tabel, row_id, readonly=False):
+    """
+    Volledige rij als dict (eigen kopie), of None als ze niet (meer) bestaat.
+    readonly=True voor detailpagina's (raadplegen); bewerken leest gewoon.
+    """
+    value = _record_cache.get(tabel, row_id, readonly=readonly)
+    return dict(value[0]) if value else None
+
+def cached_project(project_id, readonly=False):
+    """(rij, gearchiveerd) voor project-detail en -bewerken; (None, False) als het niet bestaat."""
+    value = _record_cache.get("projects", project_id, readonly=readonly)
+    return (dict(value[0]), value[1]) if value else (None, False)
+
+def record_cache_touch():
+    """Na een eigen schrijfactie: bij het volgende gebruik eerst de generatie controleren."""
+    _record_cache.touch()
+
+def record_cache_clear():
+    _record_cache.clear()
+
+def prefetch_record(tabel, row_id, readonly=False):
+    """Haal de rij op de achtergrond op (geselecteerde rij in een resultatenlijst)."""
+    with _prefetch_lock:
+        _prefetch_wanted[:] = [(tabel, int(row_id), readonly)]
+    _start_prefetch_thread()
+    _prefetch_event.set()
+
+def _start_prefetch_thread():
+    global _prefetch_thread
+    with _prefetch_lock:
+        if _prefetch_thread is None or not _prefetch_thread.is_alive():
+            _prefetch_thread = threading.Thread(target=_prefetch_loop, name="dela-prefetch", daemon=True)
+            _prefetch_thread.start()
+
+def _prefetch_loop():
+    while True:
+        _prefetch_event.wait(RECORD_CACHE_FRESH_SEC)
+        _prefetch_event.clear()
+        with _prefetch_lock:
+            wanted = _prefetch_wanted[:]
+            _prefetch_wanted.clear()
+        try:
+            _record_cache.revalidate()
+            for tabel, row_id, readonly in wanted:
+                _record_cache.get(tabel, row_id, background=True, readonly=readonly)
+        except sqlite3.Error as e:
+            logger.warning("recordcache: prefetch mislukt: %s", e)
+
+# ------------------ Hoofdstuk 3: Landcodes & Telefoonnummer-formattering ------------------ 
+# ------------------ Landcodes & formattering ------------------ 
+# Dropdown toont "+32 (België)" etc.; we bewaren enkel de code (bv. "+32") 
+COUNTRY_CODES = [ 
+    ("+32", "België"), 
+    ("+31", "Nederland"), 
+    ("+33", "Frankrijk"), 
+    ("+34", "Spanje"), 
+    ("+352", "Luxemburg"), 
+    ("+41", "Zwitserland"), 
+    ("+420", "Tsjechië"), 
+    ("+48", "Polen"), 
+    ("+36", "Hongarije"), 
+    ("+351", "Portugal"), 
+    ("+44", "Engeland/VK"), 
+    ("+353", "Ierland"), 
+    ("+45", "Denemarken"), 
+    ("+39", "Italië"), 
+    ("+30", "Griekenland"), 
+    ("+43", "Oostenrijk"), 
+    ("+46", "Zweden"), 
+    ("+358", "Finland"), 
+    ("+47", "Noorwegen"), 
+] 
+
+DEFAULT_CC = "+32" 
+
+def code_label_list(): 
+    return [f"{cc} ({name})" for cc, name in COUNTRY_CODES] 
+
+def label_to_code(label): 
+    # " +32 (België) " -> "+32" 
+    return label.split(" ", 1)[0].strip() 
+
+def code_to_label(code): 
+    for cc, name in COUNTRY_CODES: 
+        if cc == code: 
+            return f"{cc} ({name})" 
+    return f"{code} (?)" 
+
+def only_digits(s: str) -> str: 
+    return "".join(ch for ch in s if ch.isdigit()) 
+
+def format_phone(cc: str, digits: str, mobile_hint=False) -> str: 
+    """Grove formattering: BE specifiek, anderen generiek in paren.""" 
+    digits = only_digits(digits) 
+    if not cc: 
+        cc = DEFAULT_CC 
+    # België 
+    if cc == "+32": 
+        if not digits: 
+            return "+32 (0)" 
+        if (len(digits) >= 8 and digits[0] == "4") or mobile_hint: 
+            first = digits[:3] 
+            rest = digits[3:] 
+        else: 
+            first = digits[:2] 
+            rest = digits[2:] 
+        pairs = [rest[i:i+2] for i in range(0, len(rest), 2)] 
+        pairs = [p for p in pairs if p] 
+        pieces = " ".join([first] + pairs) if first else " ".join(pairs) 
+        return f"+32 (0) {pieces}".strip() 
+    # NL grove benadering 
+    if cc == "+31": 
+        if not digits: 
+            return "+31 (0)" 
+        first = digits[:2]; rest = digits[2:] 
+        pairs = [rest[i:i+2] for i in range(0, len(rest), 2)] 
+        pairs = [p for p in pairs if p] 
+        return f"+31 (0) {first} " + " ".join(pairs) if pairs else f"+31 (0) {first}" 
+    # Generiek 
+    pairs = [digits[i:i+2] for i in range(0, len(digits), 2)] 
+    pairs = [p for p in pairs if p] 
+    return f"{cc} (0) {' '.join(pairs)}".strip() 
+
+# ------------------ Hoofdstuk 4: Vlaamse steden & Postcodes ------------------ 
+# ------------------ Dit stuk probeert de CSV vlaamse_gemeenten.csv te laden met kolommen stad en postcode. Als dat bestand er niet is, wordt een kleine ingebouwde lijst gebruikt (enkel een aantal bekende steden). Resultaat wordt opgeslagen in FLEMISH_CITIES. ------------------ 
+# ------------------ Vlaamse steden (stad -> postcode) ------------------ 
+def load_flemish_cities(): 
+    """ 
+    Probeert vlaamse_gemeenten.csv te lezen met kolommen: stad, postcode. 
+    Als niet aanwezig, gebruikt een kleine ingebouwde lijst. 
+    """ 
+    data = {} 
+    if os.path.exists(FLEMISH_CITIES_CSV): 
+        enc = "utf-8-sig" 
+        with open(FLEMISH_CITIES_CSV, "r", encoding=enc, newline="") as f: 
+            reader = csv.DictReader(f) 
+            for row in reader: 
+                stad = (row.get("stad") or "").strip() 
+                pc = (row.get("postcode") or "").strip() 
+                if stad and pc: 
+                    data[stad] = pc 
+    else: 
+        # Kleine testlijst — vervang door CSV om ALLES te hebben 
+        sample = [ 
+            ("Antwerpen", "2000"), ("Gent", "9000"), ("Brugge", "8000"), 
+            ("Leuven", "3000"), ("Kortrijk", "8500"), ("Hasselt", "3500"), 
+            ("Mechelen", "2800"), ("Oostende", "8400"), ("Aalst", "9300"), 
+            ("Roeselare", "8800"), ("Sint-Niklaas", "9100") 
+        ] 
+        data = {s: p for s, p in sample} 
+    return data 
+
+FLEMISH_CITIES = load_flemish_cities()
@@ -0,0 +1,44 @@
+"""Dashboardtellingen (Hoofdstuk 2.I) na archiveren (Hoofdstuk 2.Q)."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dela_core as core  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "DB_PATH", str(tmp_path / "dela.db"))
+    monkeypatch.setattr(core, "ARCHIVE_PATH", str(tmp_path / "archief.db"))
+    core.db_init()
+    core.db_migrate()
+    return tmp_path
+
+
+def add_project(nummer, status, jaar, gewijzigd_op):
+    return core.db_insert("projects", {"bureau": "Gent", "projectnummer": nummer, "status": status,
+                                       "jaar": jaar, "laatst_gewijzigd_door": "Kris",
+                                       "laatst_gewijzigd_op": gewijzigd_op})
+
+
+def test_archived_projects_stay_on_the_dashboard(database):
+    ids = [add_project(f"P15{i:02d}", "afgewerkt", "2015", "2015-06-01 10:00:00") for i in range(5)]
+    add_project("P2401", "lopend", "2024", core.now_str())
+    before = core.dashboard_data()
+    assert ("2015", 5) in before["projecten_jaar"]
+
+    assert core.archive_projects() == 5
+    after = core.dashboard_data()
+    assert after["projecten_jaar"] == before["projecten_jaar"]
+    assert after["projecten_status"] == before["projecten_status"]
+    assert after["projecten_bureau"] == [("Gent", 6)]
+    # De zoekfacetten tellen enkel de actieve projecten
+    assert dict(core.project_facet_counts()["jaar"]) == {"2024": 1}
+
+    core.rebuild_statistics()
+    assert core.dashboard_data() == after
+
+    core.restore_projects(ids[:2])
+    assert core.dashboard_data()["projecten_jaar"] == before["projecten_jaar"]
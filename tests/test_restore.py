@@ -0,0 +1,65 @@
+"""Snapshot terugzetten met db_restore (Hoofdstuk 2.D)."""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dela_core as core  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "DB_PATH", str(tmp_path / "dela.db"))
+    monkeypatch.setattr(core, "ARCHIVE_PATH", str(tmp_path / "archief.db"))
+    monkeypatch.setattr(core, "BACKUP_DIR", str(tmp_path / "backups"))
+    core.db_init()
+    core.db_migrate()
+    return tmp_path
+
+
+def old_snapshot(path):
+    """Database zoals vóór de eerste migratie (user_version 0), met één contact."""
+    current = core.DB_PATH
+    core.DB_PATH = path
+    try:
+        core.db_init()
+        core.db_query("INSERT INTO contacts (type, voornaam, achternaam) VALUES ('persoon', 'Oud', 'Contact')",
+                      commit=True)
+    finally:
+        core.DB_PATH = current
+    return path
+
+
+def user_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_old_snapshot_is_migrated_on_restore(database):
+    snapshot = old_snapshot(str(database / "oud.db"))
+    assert user_version(snapshot) == 0
+
+    core.db_restore(snapshot)
+
+    assert user_version(core.DB_PATH) == core.SCHEMA_MIGRATIONS[-1][0]
+    row = core.db_query("SELECT display_name FROM contacts", fetchone=True)
+    assert row[0] == "Oud Contact"
+
+
+def test_newer_snapshot_is_refused(database):
+    core.db_query("INSERT INTO contacts (type, voornaam, achternaam) VALUES ('persoon', 'Blijft', 'Staan')",
+                  commit=True)
+    snapshot = old_snapshot(str(database / "nieuw.db"))
+    conn = sqlite3.connect(snapshot)
+    conn.execute(f"PRAGMA user_version = {core.SCHEMA_MIGRATIONS[-1][0] + 1}")
+    conn.close()
+
+    with pytest.raises(RuntimeError):
+        core.db_restore(snapshot)
+    names = [r[0] for r in core.db_query("SELECT voornaam FROM contacts", fetchall=True)]
+    assert names == ["Blijft"]
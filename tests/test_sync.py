@@ -0,0 +1,109 @@
+"""Synchronisatie tussen twee lokale databasebestanden (Hoofdstuk 2.R)."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dela_core as core  # noqa: E402
+
+CONTACT_COLUMNS = [c for c in core.SYNC_COLUMNS["contacts"] if c != "uid"]
+
+
+def rrn(birth, serial):
+    """Geldig rijksregisternummer (11 cijfers) voor een geboortedatum jjmmdd."""
+    base = int(f"{birth}{serial:03d}")
+    return f"{birth}{serial:03d}{97 - base % 97:02d}"
+
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    main, laptop = str(tmp_path / "main.db"), str(tmp_path / "laptop.db")
+    monkeypatch.setattr(core, "DB_PATH", main)
+    monkeypatch.setattr(core, "ARCHIVE_PATH", str(tmp_path / "archief.db"))
+    core.db_init()
+    core.db_migrate()
+    return main, laptop, tmp_path
+
+
+def use(path):
+    core.DB_PATH = path
+
+
+def add(voornaam, **extra):
+    return core.db_insert("contacts", {"type": "persoon", "voornaam": voornaam, "achternaam": "Test",
+                                       "laatst_gewijzigd_op": core.now_str(), **extra})
+
+
+def edit(cid, **data):
+    core.db_update_by_id("contacts", cid, {**data, "laatst_gewijzigd_op": core.now_str()})
+
+
+def delete(cid):
+    core.db_query("DELETE FROM contacts WHERE id=?", (cid,), commit=True)
+
+
+def contents(path):
+    use(path)
+    rows = core.db_query(f"SELECT uid, {', '.join(CONTACT_COLUMNS)} FROM contacts ORDER BY uid", fetchall=True)
+    return [tuple(r) for r in rows]
+
+
+def exchange(src, dst, package):
+    use(src)
+    n = core.sync_export(package)
+    use(dst)
+    return n, core.sync_import(package)
+
+
+def test_two_copies_converge(databases):
+    main, laptop, tmp = databases
+    a, b, c, e = add("Anna"), add("Bert"), add("Carl"), add("Eva")
+    core.sync_make_copy(laptop)
+
+    edit(a, voornaam="Anna-Marie")
+    delete(b)
+    use(laptop)
+    edit(c, email="carl@werf.be")
+    delete(e)
+    add("Dirk")
+
+    n, report = exchange(main, laptop, str(tmp / "naar_laptop.dsync"))
+    assert n == 2 and report["toegepast"] == 2 and not report["conflicten"]
+    n, report = exchange(laptop, main, str(tmp / "naar_main.dsync"))
+    assert n == 3 and report["toegepast"] == 3 and not report["conflicten"]
+
+    assert contents(main) == contents(laptop)
+    names = {r[CONTACT_COLUMNS.index("voornaam") + 1] for r in contents(main)}
+    assert names == {"Anna-Marie", "Carl", "Dirk"}
+
+    # Main kent nu alles van de laptop; na één (leeg) pakket weet de laptop dat ook
+    n, _ = exchange(main, laptop, str(tmp / "leeg.dsync"))
+    assert n == 0
+    use(laptop)
+    assert core.sync_export(str(tmp / "leeg2.dsync")) == 0
+
+
+def test_rejected_rows_are_kept_until_resolved(databases):
+    main, laptop, tmp = databases
+    core.sync_make_copy(laptop)
+    x = add("Xavier", rijksregisternummer=rrn("850730", 123))
+    use(laptop)
+    add("Yves", rijksregisternummer=rrn("850730", 123))
+
+    _, report = exchange(laptop, main, str(tmp / "naar_main.dsync"))
+    assert len(report["conflicten"]) == 1
+    use(main)
+    assert [c[0] for c in core.sync_conflicts()] == ["contacts"]
+    # Het volgnummer telt als ontvangen: zodra de laptop dat weet, stuurt hij de rij niet opnieuw
+    exchange(main, laptop, str(tmp / "terug.dsync"))
+    use(laptop)
+    assert core.sync_export(str(tmp / "opnieuw.dsync")) == 0
+    use(main)
+    assert len(core.sync_conflicts()) == 1
+
+    edit(x, rijksregisternummer="")
+    report = core.sync_retry_conflicts()
+    assert report["toegepast"] == 1 and not report["conflicten"]
+    assert core.sync_conflicts() == []
+    assert core.db_query("SELECT COUNT(*) FROM contacts WHERE voornaam='Yves'", fetchone=True)[0] == 1